@@ -1,10 +1,11 @@
 """AST utilities."""
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-import hashlib
-from typing import Dict, List
+from collections import ChainMap
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Mapping, MutableMapping, Tuple
 from sortedcontainers import SortedDict
+import betterproto
 from betterproto.lib.google.protobuf import Empty
 
 from nada_mir_proto.nillion.nada.operations import v1 as proto_op
@@ -69,12 +70,45 @@ class ASTOperation(ABC):
         raise NotImplementedError("Operation should implement to_mir method")
 
 
+def type_key(ty: proto_ty.NadaType) -> str | bytes:
+    """Returns a hashable key that identifies a type.
+
+    Scalar types are identified by the name of their variant, which avoids encoding them.
+    Compound types are identified by their encoding.
+    """
+    name, value = betterproto.which_one_of(ty, "nada_type")
+    if isinstance(value, Empty):
+        return name
+    return bytes(ty)
+
+
 # Map of operations identified by the Python compiler
 # The key is the operation identifier, the value the operation
 AST_OPERATIONS: Dict[int, ASTOperation] = SortedDict()
 
-# Map of literal hashes to index
-LITERALS: Dict[str, int] = {}
+# Cache of the Nada functions created from Python functions, by key (see
+# `nada_dsl.nada_types.function.function_cache_key`). The values hold the AST
+# operation stored for the function, so the cache is cleared with the AST.
+FUNCTIONS: Dict[Tuple, Tuple[Any, ASTOperation]] = {}
+
+
+def reset_ast():
+    """Clears the AST and the function cache, and resets the operation identifiers,
+    so that a new program is compiled from a clean state."""
+    AST_OPERATIONS.clear()
+    FUNCTIONS.clear()
+    OperationId.reset()
+
+
+def operation_overlay() -> MutableMapping[int, ASTOperation]:
+    """Returns a view of `AST_OPERATIONS` that keeps the operations added or replaced
+    through it, without changing the AST.
+
+    The optimization passes rewrite the operations of a program in an overlay (see
+    `nada_dsl.compiler_frontend.ProgramGraph`), so the same outputs can be compiled
+    again with other optimizations.
+    """
+    return ChainMap({}, AST_OPERATIONS)
 
 
 @dataclass
@@ -187,46 +221,25 @@ class InputASTOperation(ASTOperation):
 
 @dataclass
 class LiteralASTOperation(ASTOperation):
-    """AST Representation of a Literal."""
+    """AST Representation of a Literal.
+
+    Literals are stored in the literal table of the program and referenced by name.
+    The name is assigned by the compiler, which shares a single table entry
+    between all the literals with the same value and type.
+    """
 
     name: str
     value: object
-    literal_index: str
-
-    def __init__(
-        self,
-        operation_id: int,
-        name: str,
-        ty: str | Dict[str, Dict],
-        value: object,
-        source_ref: SourceRef,
-    ):
-        self.id = operation_id
-        self.name = name
-        self.ty = ty
-        self.value = value
-        self.source_ref = source_ref
-        # Generate a unique name depending on the value and type
-        # to prevent duplicating literals in the bytecode.
-        literal_name = hashlib.md5(
-            (str(self.value) + str(self.ty)).encode("UTF-8")
-        ).hexdigest()
-
-        # Replace the literal name by an index so it is shorter
-        if literal_name not in LITERALS:
-            LITERALS[literal_name] = len(LITERALS)
-
-        self.literal_index = str(LITERALS[literal_name])
-
-        super().__init__(id=self.id, source_ref=self.source_ref, ty=self.ty)
 
-    def to_mir(self) -> proto_op.Operation:
+    # pylint: disable=arguments-differ
+    def to_mir(self, literal_name: str) -> proto_op.Operation:
+        """Convert a literal to MIR referring to the given literal table entry."""
         return proto_op.Operation(
             id=self.id,
             type=self.ty,
             source_ref_index=self.source_ref.to_index(),
             literal_ref=proto_op.LiteralReference(
-                refers_to=self.literal_index,
+                refers_to=literal_name,
             ),
         )
 
@@ -332,13 +345,16 @@ class NadaFunctionASTOperation(ASTOperation):
     child: int
 
     # pylint: disable=arguments-differ
-    def to_mir(self, operations):
-        """Convert a function to MIR."""
+    def to_mir(self, operations, ast_operations: Mapping[int, ASTOperation]):
+        """Convert a function to MIR.
+
+        The arguments of the function are read from `ast_operations`.
+        """
         args: List[proto_mir.NadaFunctionArg] = [
             proto_mir.NadaFunctionArg(
-                name=AST_OPERATIONS[arg].name,
-                type=AST_OPERATIONS[arg].ty,
-                source_ref_index=AST_OPERATIONS[arg].source_ref.to_index(),
+                name=ast_operations[arg].name,
+                type=ast_operations[arg].ty,
+                source_ref_index=ast_operations[arg].source_ref.to_index(),
             )
             for arg in self.args
         ]  # type: ignore
@@ -381,6 +397,28 @@ class CastASTOperation(ASTOperation):
         )
 
 
+@dataclass
+class ArrayAccessorASTOperation(ASTOperation):
+    """AST representation of an array accessor operation."""
+
+    index: int
+    source: int
+
+    def child_operations(self):
+        return [self.source]
+
+    def to_mir(self) -> proto_op.Operation:
+        return proto_op.Operation(
+            id=self.id,
+            type=self.ty,
+            source_ref_index=self.source_ref.to_index(),
+            array_accessor=proto_op.ArrayAccessor(
+                index=self.index,
+                source=self.source,
+            ),
+        )
+
+
 @dataclass
 class TupleAccessorASTOperation(ASTOperation):
     """AST representation of a tuple accessor operation."""
@@ -447,3 +485,41 @@ class ObjectAccessorASTOperation(ASTOperation):
                 source=self.source,
             ),
         )
+
+
+# Fields of every operation that refer to child operations
+CHILD_FIELDS: Dict[type, Tuple[str, ...]] = {
+    BinaryASTOperation: ("left", "right"),
+    UnaryASTOperation: ("child",),
+    IfElseASTOperation: ("condition", "true_branch_child", "false_branch_child"),
+    ReduceASTOperation: ("child", "initial"),
+    MapASTOperation: ("child",),
+    NewASTOperation: ("elements",),
+    NadaFunctionASTOperation: ("child",),
+    CastASTOperation: ("target",),
+    ArrayAccessorASTOperation: ("source",),
+    TupleAccessorASTOperation: ("source",),
+    NTupleAccessorASTOperation: ("source",),
+    ObjectAccessorASTOperation: ("source",),
+}
+
+
+def replace_children(
+    operation: ASTOperation, replacements: Dict[int, int]
+) -> ASTOperation:
+    """Returns the operation with its children replaced according to the given
+    replacements. The operation itself is returned when none of its children is replaced.
+
+    The arguments of a function are never replaced, only its return operation.
+    """
+    changes = {}
+    for name in CHILD_FIELDS.get(type(operation), ()):
+        value = getattr(operation, name)
+        if isinstance(value, list):
+            if any(child in replacements for child in value):
+                changes[name] = [replacements.get(child, child) for child in value]
+        elif value in replacements:
+            changes[name] = replacements[value]
+    if len(changes) == 0:
+        return operation
+    return replace(operation, **changes)
@@ -10,13 +10,32 @@ from nada_dsl.audit.strict import strict
 def _main():
     parser = argparse.ArgumentParser()
     parser.add_argument("path", nargs=1, help="Nada DSL source file path")
-    parser.add_argument("--strict", action="store_true", required=True)
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--strict", action="store_true")
+    mode.add_argument(
+        "--cost", action="store_true", help="compile and render a cost heat map"
+    )
+    parser.add_argument(
+        "-O",
+        dest="optimization_level",
+        type=int,
+        default=0,
+        help="optimization level of the compilation (with --cost)",
+    )
     args = parser.parse_args()
     path = args.path[0]
 
-    with open(path, "r", encoding="UTF-8") as file:
-        source = file.read()
-        report = strict(source)
+    if args.cost:
+        # Imported here because the compiler depends on the package exports.
+        from nada_dsl.audit.heatmap import (  # pylint: disable=import-outside-toplevel
+            heatmap,
+        )
+
+        report = heatmap(path, args.optimization_level)
+    else:
+        with open(path, "r", encoding="UTF-8") as file:
+            source = file.read()
+            report = strict(source)
 
     with open(path[:-2] + "html", "w", encoding="UTF-8") as file:
         file.write(html(report))
@@ -7,9 +7,24 @@ component.
 # pylint: disable=too-many-lines
 # pylint: disable=too-few-public-methods
 from __future__ import annotations
-from typing import Union, Tuple, Sequence
+from typing import Dict, Union, Tuple, Sequence
 import ast
 
+# Operations counted by the abstract interpreter. Additions, subtractions and
+# negations are linear, so they are computed locally even on secret values (as in
+# :obj:`nada_dsl.cost.estimate`), but they are counted all the same.
+_OPERATIONS = ("add", "sub", "neg", "mul", "cmp", "eq", "ne", "ife")
+
+# Secrecy of the result of a counted operation (see :obj:`Metaclass.shape`).
+_SECRECIES = ("constant", "public", "secret")
+
+
+def _counts() -> Dict[str, int]:
+    """
+    Return a dictionary with a zero count for every operation.
+    """
+    return {operation: 0 for operation in _OPERATIONS}
+
 
 class Metaclass(type):
     """
@@ -130,7 +145,8 @@ class Abstract(metaclass=Metaclass):
     value types are derived from this class.
 
     The attributes of this class are also used as global aggregators of the
-    signature components (parties, inputs, and outputs) during abstract execution.
+    signature components (parties, inputs, and outputs) and of the counts of
+    operations during abstract execution.
 
     >>> Abstract.initialize()
     >>> party = Party("party")
@@ -149,6 +165,7 @@ class Abstract(metaclass=Metaclass):
     outputs = None
     context = None
     analysis = None
+    secrecy = None
 
     @staticmethod
     def initialize(context=None):
@@ -156,7 +173,8 @@ class Abstract(metaclass=Metaclass):
         Abstract.inputs = []
         Abstract.outputs = []
         Abstract.context = context if context is not None else {}
-        Abstract.analysis = {"add": 0, "mul": 0, "cmp": 0, "eq": 0, "ne": 0, "ife": 0}
+        Abstract.analysis = _counts()
+        Abstract.secrecy = {secrecy: _counts() for secrecy in _SECRECIES}
 
     @staticmethod
     def party(party: Party):
@@ -174,8 +192,59 @@ class Abstract(metaclass=Metaclass):
     def signature() -> Tuple[list[Party], list[Input], list[Output]]:
         return (Abstract.parties, Abstract.inputs, Abstract.outputs)
 
+    @staticmethod
+    def record(result: Abstract, operands: Sequence[Abstract], operation=None):
+        """
+        Record the operands from which a result is computed and, if the
+        operation is one of :obj:`_OPERATIONS`, count it according to the
+        secrecy of its result. The recorded operands make it possible to
+        count the operations each output depends on.
+        """
+        secrecy = type(result).shape().__name__.lower()
+        if operation is not None:
+            Abstract.analysis[operation] += 1
+            Abstract.secrecy[secrecy][operation] += 1
+        result.origin = (
+            operation,
+            secrecy,
+            tuple(operand.origin for operand in operands),
+        )
+
+    @staticmethod
+    def summary() -> dict:
+        """
+        Return the counts of the operations performed so far, by secrecy of
+        their result, both in total and for every output (counting only the
+        operations that the output depends on).
+
+        The counts are those of the executed operations, so an operation
+        within a loop is counted once per iteration.
+        """
+        outputs = {}
+        for output in Abstract.outputs:
+            counts = {secrecy: _counts() for secrecy in _SECRECIES}
+            (visited, stack) = (set(), [output.value.origin])
+            while len(stack) > 0:
+                origin = stack.pop()
+                if origin is None or id(origin) in visited:
+                    continue
+                visited.add(id(origin))
+                (operation, secrecy, operands) = origin
+                if operation is not None:
+                    counts[secrecy][operation] += 1
+                stack.extend(operands)
+            outputs[output.name] = counts
+
+        return {
+            "total": {
+                secrecy: dict(counts) for (secrecy, counts) in Abstract.secrecy.items()
+            },
+            "outputs": outputs,
+        }
+
     def __init__(self: Abstract, cls: type = None):
         self.value = None
+        self.origin = None
         if cls is not None:
             self.__class__ = cls
 
@@ -387,6 +456,7 @@ class AbstractInteger(Abstract):
         ):  # Base case for compatibility with :obj:`sum`.
             result = Abstract(type(self))
             result.value = self.value
+            result.origin = self.origin
             return result
 
         if not isinstance(other, (Integer, PublicInteger, SecretInteger)):
@@ -394,7 +464,7 @@ class AbstractInteger(Abstract):
 
         result = Abstract(max(type(self), type(other)))
 
-        Abstract.analysis["add"] += 1
+        Abstract.record(result, (self, other), "add")
 
         result.value = None
         if self.value is not None and other.value is not None:
@@ -420,6 +490,8 @@ class AbstractInteger(Abstract):
 
         result = Abstract(max(type(self), type(other)))
 
+        Abstract.record(result, (self, other), "sub")
+
         result.value = None
         if self.value is not None and other.value is not None:
             result.value = self.value - other.value
@@ -447,6 +519,8 @@ class AbstractInteger(Abstract):
         """
         result = Abstract(type(self))
 
+        Abstract.record(result, (self,), "neg")
+
         result.value = None
         if self.value is not None:
             result.value = -self.value
@@ -515,7 +589,7 @@ class AbstractInteger(Abstract):
 
         result = Abstract(max(type(self), type(other)))
 
-        Abstract.analysis["mul"] += 1
+        Abstract.record(result, (self, other), "mul")
 
         result.value = None
         if self.value is not None and other.value is not None:
@@ -584,7 +658,7 @@ class AbstractInteger(Abstract):
 
         shape = max(type(self), type(other)).shape()
         result = (AbstractBoolean.shape(shape))()
-        Abstract.analysis["cmp"] += 1
+        Abstract.record(result, (self, other), "cmp")
         result.value = None
         if self.value is not None and other.value is not None:
             result.value = self.value < other.value
@@ -602,7 +676,7 @@ class AbstractInteger(Abstract):
         shape = max(type(self), type(other)).shape()
         result = (AbstractBoolean.shape(shape))()
 
-        Abstract.analysis["cmp"] += 1
+        Abstract.record(result, (self, other), "cmp")
 
         result.value = None
         if self.value is not None and other.value is not None:
@@ -621,7 +695,7 @@ class AbstractInteger(Abstract):
         shape = max(type(self), type(other)).shape()
         result = (AbstractBoolean.shape(shape))()
 
-        Abstract.analysis["cmp"] += 1
+        Abstract.record(result, (self, other), "cmp")
 
         result.value = None
         if self.value is not None and other.value is not None:
@@ -640,7 +714,7 @@ class AbstractInteger(Abstract):
         shape = max(type(self), type(other)).shape()
         result = (AbstractBoolean.shape(shape))()
 
-        Abstract.analysis["cmp"] += 1
+        Abstract.record(result, (self, other), "cmp")
 
         result.value = None
         if self.value is not None and other.value is not None:
@@ -659,7 +733,7 @@ class AbstractInteger(Abstract):
         shape = max(type(self), type(other)).shape()
         result = (AbstractBoolean.shape(shape))()
 
-        Abstract.analysis["eq"] += 1
+        Abstract.record(result, (self, other), "eq")
 
         result.value = None
         if self.value is not None and other.value is not None:
@@ -678,7 +752,7 @@ class AbstractInteger(Abstract):
         shape = max(type(self), type(other)).shape()
         result = (AbstractBoolean.shape(shape))()
 
-        Abstract.analysis["ne"] += 1
+        Abstract.record(result, (self, other), "ne")
 
         result.value = None
         if self.value is not None and other.value is not None:
@@ -960,7 +1034,7 @@ class AbstractBoolean(Abstract):
         shape = max([type(self), type(true), type(false)]).shape()
         result = (AbstractInteger.shape(shape))()
 
-        Abstract.analysis["ife"] += 1
+        Abstract.record(result, (self, true, false), "ife")
 
         result.value = None
         if (
@@ -1046,6 +1120,54 @@ def signature(source: str) -> Tuple[list[Party], list[Input], list[Output]]:
       ...
     ValueError: nada_main must be defined
     """
+    _execute(source)
+    return Abstract.signature()
+
+
+def cost_summary(source: str) -> dict:
+    """
+    Return a summary of the cost of the supplied Nada program (represented as
+    a string), obtained by abstract execution (*i.e.*, without compiling the
+    program). The counts of the operations are broken down by the secrecy of
+    their result, and are given in total and for every output (see
+    :obj:`Abstract.summary`).
+
+    >>> source = '\\n'.join([
+    ...     'from nada_dsl import *',
+    ...     '',
+    ...     'def nada_main():',
+    ...     '    party1 = Party(name="Party1")',
+    ...     '    a = SecretInteger(Input(name="a", party=party1))',
+    ...     '    b = PublicInteger(Input(name="b", party=party1))',
+    ...     '',
+    ...     '    c = a * a',
+    ...     '    for _ in range(3):',
+    ...     '        c = c + a * a',
+    ...     '    d = (b < b).if_else(b, b * b)',
+    ...     '',
+    ...     '    return [Output(c, "c", party1), Output(d, "d", party1)]'
+    ... ])
+    >>> summary = cost_summary(source)
+    >>> summary["total"]["secret"]
+    {'add': 3, 'sub': 0, 'neg': 0, 'mul': 4, 'cmp': 0, 'eq': 0, 'ne': 0, 'ife': 0}
+    >>> summary["total"]["public"]
+    {'add': 0, 'sub': 0, 'neg': 0, 'mul': 1, 'cmp': 1, 'eq': 0, 'ne': 0, 'ife': 1}
+    >>> summary["outputs"]["c"]["secret"]["mul"]
+    4
+    >>> summary["outputs"]["c"]["public"]["mul"]
+    0
+    >>> summary["outputs"]["d"]["secret"]["mul"]
+    0
+    """
+    _execute(source)
+    return Abstract.summary()
+
+
+def _execute(source: str) -> list[Output]:
+    """
+    Perform the abstract execution of the supplied Nada program (represented
+    as a string) and return its outputs.
+    """
     root = ast.parse(source)
 
     if (
@@ -1080,14 +1202,13 @@ def signature(source: str) -> Tuple[list[Party], list[Input], list[Output]]:
     if "nada_main" not in context:
         raise ValueError("nada_main must be defined")
 
-    # Perform abstract execution of the main function and return the signature of
-    # the result.
+    # Perform abstract execution of the main function and return its outputs.
     outputs = context["nada_main"]()
     if (
         isinstance(outputs, Sequence)
         and len(outputs) > 0
         and all(isinstance(output, Output) for output in outputs)
     ):
-        return Abstract.signature()
+        return outputs
 
     raise ValueError("nada_main must return a sequence of outputs")
@@ -0,0 +1,172 @@
+"""
+Static analysis submodule that compiles a Nada DSL program and attributes
+its MPC cost to the lines of its source code, in order to render the program
+as a heat map.
+
+The cost of a line is the weighted number of operations that need
+communication built by that line (see :obj:`nada_dsl.cost.estimate`), and its
+depth contribution is the number of rounds it adds to the critical path of
+every output (see :obj:`nada_dsl.cost.depth`). The operations of a function
+count once per call.
+"""
+
+from __future__ import annotations
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import html as html_
+import os.path
+import richreports
+
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+
+from nada_dsl.compile import compile_script
+from nada_dsl.cost.depth import analyze_depth
+from nada_dsl.cost.estimate import DEFAULT_WEIGHTS, cost_by_source_ref, weighted_cost
+from nada_dsl.mir_util import operations_by_id
+
+# Number of heat levels of the report, the hottest lines are at the last level
+HEAT_LEVELS = 4
+
+
+@dataclass
+class LineCost:
+    """
+    Cost of the operations built by a line of source code.
+
+    Attributes
+    ----------
+    counts: Dict[str, int]
+        The number of operations of every kind of cost
+    cost: int
+        The weighted cost of the operations
+    rounds: Dict[str, int]
+        The number of rounds the line adds to the critical path of the outputs,
+        by output name
+    """
+
+    counts: Dict[str, int] = field(default_factory=dict)
+    cost: int = 0
+    rounds: Dict[str, int] = field(default_factory=dict)
+
+    def detail(self) -> str:
+        """
+        Return the human-readable breakdown of the cost of the line.
+        """
+        kinds = ", ".join(
+            f"{count} {kind}"
+            for (kind, count) in sorted(self.counts.items())
+            if count > 0
+        )
+        parts = [f"cost {self.cost}" + (": " + kinds if kinds else "")]
+        parts.extend(
+            f"{rounds} rounds of the critical path of {name}"
+            for (name, rounds) in self.rounds.items()
+        )
+        return "; ".join(parts)
+
+
+def line_costs(
+    mir: proto_mir.ProgramMir,
+    file: str,
+    weights: Optional[Dict[str, int]] = None,
+) -> Dict[int, LineCost]:
+    """
+    Attribute the cost of a compiled program to the lines of one of its
+    source files, using the source references of its operations.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+    file: str
+        The name of the source file, as found in the source references
+    weights: Optional[Dict[str, int]]
+        The weights of the kinds of costs, replacing the default ones
+
+    Returns
+    -------
+    Dict[int, LineCost]
+        The cost of every line that builds operations, by line number
+    """
+    all_weights = dict(DEFAULT_WEIGHTS)
+    all_weights.update(weights or {})
+
+    counts: Dict[int, Counter] = defaultdict(Counter)
+    for index, source_counts in cost_by_source_ref(mir).items():
+        if index < len(mir.source_refs) and mir.source_refs[index].file == file:
+            counts[mir.source_refs[index].lineno].update(source_counts)
+
+    rounds: Dict[int, Counter] = defaultdict(Counter)
+    operations = operations_by_id(mir)
+    for output in analyze_depth(mir).outputs:
+        for step in output.critical_path:
+            index = operations[step.operation_id].source_ref_index
+            if index < len(mir.source_refs) and mir.source_refs[index].file == file:
+                rounds[mir.source_refs[index].lineno][output.name] += (
+                    step.rounds * step.repeat
+                )
+
+    return {
+        lineno: LineCost(
+            dict(counts[lineno]),
+            weighted_cost(counts[lineno], all_weights),
+            dict(rounds[lineno]),
+        )
+        for lineno in sorted(set(counts) | set(rounds))
+    }
+
+
+def heat_level(line_cost: LineCost, maximum: int) -> int:
+    """
+    Return the heat level of a line (from 0 for the lines without cost to
+    :obj:`HEAT_LEVELS`), relative to the largest cost of a line.
+    """
+    if line_cost.cost == 0:
+        return 1 if len(line_cost.rounds) > 0 else 0
+    return max(1, -(-HEAT_LEVELS * line_cost.cost // maximum))
+
+
+def heatmap(
+    path: str,
+    optimization_level: int = 0,
+    weights: Optional[Dict[str, int]] = None,
+) -> richreports.report:
+    """
+    Take the path of a Python source file representing a Nada DSL program,
+    compile it, and generate an interactive HTML report wherein every line is
+    coloured according to its cost, with a breakdown of the cost of the line
+    when the mouse hovers over it.
+    """
+    with open(path, "r", encoding="UTF-8") as file:
+        source = file.read()
+    output = compile_script(path, optimization_level)
+    mir = proto_mir.ProgramMir().parse(output.mir)
+    costs = line_costs(mir, os.path.basename(path), weights)
+    maximum = max((line_cost.cost for line_cost in costs.values()), default=0)
+
+    # Operations built by the same line share a source reference that spans
+    # the whole line, so each line is enriched (at most) once.
+    report = richreports.report(source, line=1, column=0)
+    for i, line in enumerate(report.lines):
+        line_cost = costs.get(i + 1)
+        if line_cost is not None and len(line.strip()) > 0:
+            report.enrich(
+                (i + 1, 0),
+                (i + 1, len(line) - 1),
+                '<span class="cost-' + str(heat_level(line_cost, maximum)) + '">',
+                "</span>",
+                skip_whitespace=True,
+            )
+            report.enrich(
+                (i + 1, 0),
+                (i + 1, len(line) - 1),
+                '<span class="detail" data-detail="'
+                + html_.escape(line_cost.detail())
+                + '">',
+                "</span>",
+                skip_whitespace=True,
+            )
+        report.enrich((i + 1, 0), (i + 1, len(line)), "<div>", "</div>")
+
+    return report
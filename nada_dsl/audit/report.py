@@ -365,6 +365,10 @@ def html(report: richreports.report) -> str:
       .types-Boolean { font-weight:bold; color:#009900; }
       .types-PublicBoolean { font-weight:bold; color:#009900; }
       .types-SecretBoolean { font-weight:bold; color:#0000FF; }
+      .cost-1 { background-color:#FFF3C4; }
+      .cost-2 { background-color:#FFD88A; }
+      .cost-3 { background-color:#FFA66B; }
+      .cost-4 { background-color:#FF6B6B; font-weight:bold; }
       div { height:18px; line-height:18px; white-space:pre; }
       div span { padding-top:3px; padding-bottom:3px; line-height:18px; cursor:pointer; }
       .detail { cursor:pointer; }
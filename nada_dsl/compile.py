@@ -6,12 +6,23 @@ import sys
 import os.path
 import base64
 import json
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 import traceback
 import importlib.util
-from nada_dsl.compiler_frontend import nada_compile
-from nada_dsl.errors import MissingEntryPointError, MissingProgramArgumentError
+from typing import Dict, Optional
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_dsl.compiler_frontend import nada_compile_to_stream, nada_dsl_to_nada_mir
+from nada_dsl.cost.budget import Budget, check_budget
+from nada_dsl.errors import (
+    BudgetExceededError,
+    MirValidationError,
+    MissingEntryPointError,
+    MissingProgramArgumentError,
+)
+from nada_dsl.mir_stream import MirBuilder, replay_elements
+from nada_dsl.passes import PassStatistics, pass_manager
 from nada_dsl.timer import add_timer, timer
+from nada_dsl.validate import check_mir, check_mir_stream
 
 
 @dataclass
@@ -19,17 +30,110 @@ class CompilerOutput:
     """Compiler Output"""
 
     mir: bytes
+    pass_statistics: Dict[str, PassStatistics] = field(default_factory=dict)
 
 
 @add_timer(timer_name="nada_dsl.compile.compile")
-def compile_script(script_path: str) -> CompilerOutput:
+def compile_script(
+    script_path: str,
+    optimization_level: int = 0,
+    verbose: bool = False,
+    budget: Optional[Budget] = None,
+    probabilistic_truncation: bool = False,
+) -> CompilerOutput:
     """Compiles a NADA program
 
     Args:
         script_path (str): The nada program path
+        optimization_level (int): The optimization level (see `nada_dsl.passes`)
+        verbose (bool): Whether the notes of the optimization passes are printed
+        budget (Optional[Budget]): The cost budget of the program (see
+            `nada_dsl.cost.budget`)
+        probabilistic_truncation (bool): Whether divisions of secret integers by
+            powers of two may be rewritten into probabilistic truncations at level 2
+            (see `nada_dsl.passes.strength`)
 
     Returns:
         CompilerOutput: The Compiler Output
+
+    Raises:
+        MirValidationError: If the compiled program is not valid (see
+            `nada_dsl.validate`)
+        BudgetExceededError: If the program exceeds its budget
+    """
+    outputs = run_script(script_path)
+    passes = pass_manager(optimization_level, verbose, probabilistic_truncation)
+    compiled = nada_dsl_to_nada_mir(outputs, passes.run)
+    compile_output = bytes(compiled)
+    check_program(compiled, len(compile_output), budget)
+    return CompilerOutput(compile_output, passes.statistics)
+
+
+@add_timer(timer_name="nada_dsl.compile.compile_to_file")
+def compile_script_to_file(
+    script_path: str,
+    mir_path: str,
+    optimization_level: int = 0,
+    verbose: bool = False,
+    budget: Optional[Budget] = None,
+    probabilistic_truncation: bool = False,
+) -> Dict[str, PassStatistics]:
+    """Compiles a NADA program writing the MIR into a file
+
+    The MIR is streamed into the file while it is generated, and validated while it
+    is read back, which keeps the memory usage low for very large programs. The
+    program is only loaded in memory to check its budget, if there is one.
+
+    Args:
+        script_path (str): The nada program path
+        mir_path (str): The path of the file where the MIR is written
+        optimization_level (int): The optimization level (see `nada_dsl.passes`)
+        verbose (bool): Whether the notes of the optimization passes are printed
+        budget (Optional[Budget]): The cost budget of the program (see
+            `nada_dsl.cost.budget`)
+        probabilistic_truncation (bool): Whether divisions of secret integers by
+            powers of two may be rewritten into probabilistic truncations at level 2
+            (see `nada_dsl.passes.strength`)
+
+    Returns:
+        Dict[str, PassStatistics]: The statistics of the optimization passes
+
+    Raises:
+        MirValidationError: If the compiled program is not valid (see
+            `nada_dsl.validate`). The MIR file is removed
+        BudgetExceededError: If the program exceeds its budget. The MIR file is
+            removed
+    """
+    outputs = run_script(script_path)
+    passes = pass_manager(optimization_level, verbose, probabilistic_truncation)
+    with open(mir_path, "wb") as mir_file:
+        nada_compile_to_stream(outputs, mir_file, passes.run)
+    try:
+        # The MIR file is validated one element at a time, the program is only
+        # built in memory for the analyses of the budget, which need all of it
+        with open(mir_path, "rb") as mir_file:
+            check_mir_stream(mir_file)
+        if budget is not None:
+            timer.start("nada_dsl.compile.compile_to_file.read_back")
+            builder = MirBuilder()
+            with open(mir_path, "rb") as mir_file:
+                mir_size = replay_elements(mir_file, builder)
+            timer.stop("nada_dsl.compile.compile_to_file.read_back")
+            enforce_budget(builder.mir, mir_size, budget)
+    except (MirValidationError, BudgetExceededError):
+        os.remove(mir_path)
+        raise
+    return passes.statistics
+
+
+def run_script(script_path: str) -> list:
+    """Runs the entry point of a NADA program
+
+    Args:
+        script_path (str): The nada program path
+
+    Returns:
+        list: The outputs of the program
     """
     script_dir = os.path.dirname(script_path)
     sys.path.insert(0, script_dir)
@@ -46,20 +150,36 @@ def compile_script(script_path: str) -> CompilerOutput:
         raise MissingEntryPointError(
             "'nada_dsl' entrypoint function is missing in program " + script_name
         ) from exc
-    outputs = main()
-    compile_output = nada_compile(outputs)
-    return CompilerOutput(compile_output)
+    return main()
 
 
 @add_timer(timer_name="nada_dsl.compile.compile_string")
-def compile_string(script: str) -> CompilerOutput:
+def compile_string(
+    script: str,
+    optimization_level: int = 0,
+    verbose: bool = False,
+    budget: Optional[Budget] = None,
+    probabilistic_truncation: bool = False,
+) -> CompilerOutput:
     """Compiles a NADA program from a string
 
     Args:
         script (str): The nada program as a base64 encoded string (UTF-8)
+        optimization_level (int): The optimization level (see `nada_dsl.passes`)
+        verbose (bool): Whether the notes of the optimization passes are printed
+        budget (Optional[Budget]): The cost budget of the program (see
+            `nada_dsl.cost.budget`)
+        probabilistic_truncation (bool): Whether divisions of secret integers by
+            powers of two may be rewritten into probabilistic truncations at level 2
+            (see `nada_dsl.passes.strength`)
 
     Returns:
         CompilerOutput: The Compiler Output
+
+    Raises:
+        MirValidationError: If the compiled program is not valid (see
+            `nada_dsl.validate`)
+        BudgetExceededError: If the program exceeds its budget
     """
     decoded_program = base64.b64decode(script).decode("utf-8")
     temp_name = "temp_program"
@@ -70,8 +190,50 @@ def compile_string(script: str) -> CompilerOutput:
     globals()[temp_name] = module
 
     outputs = module.nada_main()
-    compile_output = nada_compile(outputs)
-    return CompilerOutput(compile_output)
+    passes = pass_manager(optimization_level, verbose, probabilistic_truncation)
+    compiled = nada_dsl_to_nada_mir(outputs, passes.run)
+    compile_output = bytes(compiled)
+    check_program(compiled, len(compile_output), budget)
+    return CompilerOutput(compile_output, passes.statistics)
+
+
+def check_program(mir: proto_mir.ProgramMir, mir_size: int, budget: Optional[Budget]):
+    """Runs the checks of a compiled program, the same for every way of compiling it
+
+    Args:
+        mir (proto_mir.ProgramMir): The compiled program
+        mir_size (int): The size of the MIR in bytes
+        budget (Optional[Budget]): The cost budget of the program, nothing is
+            checked if it is None
+
+    Raises:
+        MirValidationError: If the compiled program is not valid (see
+            `nada_dsl.validate`)
+        BudgetExceededError: If the program exceeds its budget
+    """
+    check_mir(mir)
+    enforce_budget(mir, mir_size, budget)
+
+
+def enforce_budget(mir: proto_mir.ProgramMir, mir_size: int, budget: Optional[Budget]):
+    """Checks the cost of a compiled program against its budget
+
+    Args:
+        mir (proto_mir.ProgramMir): The compiled program
+        mir_size (int): The size of the MIR in bytes
+        budget (Optional[Budget]): The cost budget of the program, nothing is
+            checked if it is None
+
+    Raises:
+        BudgetExceededError: If the program exceeds its budget
+    """
+    if budget is None:
+        return
+    timer.start("nada_dsl.compile.enforce_budget")
+    violations = check_budget(mir, mir_size, budget)
+    timer.stop("nada_dsl.compile.enforce_budget")
+    if len(violations) > 0:
+        raise BudgetExceededError(violations)
 
 
 def print_output(out: CompilerOutput):
@@ -84,22 +246,106 @@ def print_output(out: CompilerOutput):
         "result": "Success",
         "mir": list(out.mir),
     }
+    if len(out.pass_statistics) > 0:
+        output_json["passes"] = statistics_to_json(out.pass_statistics)
     print(json.dumps(output_json))
 
 
+def statistics_to_json(statistics: Dict[str, PassStatistics]) -> Dict[str, Dict]:
+    """Converts the statistics of the optimization passes to JSON
+
+    Args:
+        statistics (Dict[str, PassStatistics]): The statistics, by pass name
+
+    Returns:
+        Dict[str, Dict]: The statistics as JSON objects
+    """
+    return {
+        name: asdict(pass_statistics) for name, pass_statistics in statistics.items()
+    }
+
+
+def parse_optimization_level(args: list) -> int:
+    """Removes the optimization level flag (`-O0`, `-O1` or `-O2`) from the arguments
+
+    Args:
+        args (list): The command line arguments, updated in place
+
+    Returns:
+        int: The optimization level, 0 if there is no flag
+    """
+    optimization_level = 0
+    for arg in list(args):
+        if len(arg) == 3 and arg.startswith("-O") and arg[2].isdigit():
+            optimization_level = int(arg[2])
+            args.remove(arg)
+    return optimization_level
+
+
+def parse_budget(args: list) -> Optional[Budget]:
+    """Removes the budget flag (`--budget <path>`) from the arguments and loads the
+    budget from the JSON file it refers to
+
+    Args:
+        args (list): The command line arguments, updated in place
+
+    Returns:
+        Optional[Budget]: The budget, None if there is no flag
+    """
+    if "--budget" not in args:
+        return None
+    index = args.index("--budget")
+    if index + 1 >= len(args):
+        raise MissingProgramArgumentError("expected budget file after --budget")
+    with open(args[index + 1], "r", encoding="utf-8") as budget_file:
+        budget = Budget.from_dict(json.load(budget_file))
+    del args[index : index + 2]
+    return budget
+
+
 if __name__ == "__main__":
     try:
         if os.environ.get("NADA_TIMER"):
             timer.enable()
+        level = parse_optimization_level(sys.argv)
+        program_budget = parse_budget(sys.argv)
+        is_verbose = "-v" in sys.argv
+        if is_verbose:
+            sys.argv.remove("-v")
+        allows_trunc_pr = "--probabilistic-truncation" in sys.argv
+        if allows_trunc_pr:
+            sys.argv.remove("--probabilistic-truncation")
         args_length = len(sys.argv)
         if args_length < 2:
             raise MissingProgramArgumentError("expected program as argument")
         if args_length == 2:
-            output = compile_script(sys.argv[1])
+            output = compile_script(
+                sys.argv[1], level, is_verbose, program_budget, allows_trunc_pr
+            )
             print_output(output)
         if args_length == 3 and sys.argv[1] == "-s":
-            output = compile_string(sys.argv[2])
+            output = compile_string(
+                sys.argv[2], level, is_verbose, program_budget, allows_trunc_pr
+            )
             print_output(output)
+        if args_length == 4 and sys.argv[2] == "-o":
+            pass_statistics = compile_script_to_file(
+                sys.argv[1],
+                sys.argv[3],
+                level,
+                is_verbose,
+                program_budget,
+                allows_trunc_pr,
+            )
+            print(
+                json.dumps(
+                    {
+                        "result": "Success",
+                        "mir_path": sys.argv[3],
+                        "passes": statistics_to_json(pass_statistics),
+                    }
+                )
+            )
 
     except Exception as ex:
         output = {
@@ -107,6 +353,8 @@ if __name__ == "__main__":
             "reason": str(ex),
             "traceback": str(traceback.format_exc()),
         }
+        if isinstance(ex, (BudgetExceededError, MirValidationError)):
+            output["violations"] = [asdict(violation) for violation in ex.violations]
         print(json.dumps(output))
 
     finally:
@@ -3,10 +3,22 @@ Compiler frontend consisting of wrapper functions for the classes and functions
 that constitute the Nada embedded domain-specific language (EDSL).
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 import os
-from typing import List, Dict, Tuple
-from sortedcontainers import SortedDict
+import sys
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Dict,
+    Mapping,
+    MutableMapping,
+    Set,
+    Tuple,
+)
+from sortedcontainers import SortedDict, SortedSet
 
 
 from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
@@ -17,6 +29,7 @@ from nada_mir_proto.nillion.nada.types import v1 as proto_ty
 from nada_dsl import Party
 from nada_dsl.ast_util import (
     AST_OPERATIONS,
+    ArrayAccessorASTOperation,
     ASTOperation,
     BinaryASTOperation,
     CastASTOperation,
@@ -33,10 +46,16 @@ from nada_dsl.ast_util import (
     RandomASTOperation,
     ReduceASTOperation,
     UnaryASTOperation,
+    operation_overlay,
+    replace_children,
+    type_key,
 )
+from nada_dsl.disassemble import DisassemblyFilter, disassemble, write_operations
+from nada_dsl.mir_stream import MirBuilder, MirSink, MirWriter
 from nada_dsl.timer import timer
 from nada_dsl.source_ref import SourceRef
 from nada_dsl.program_io import Output
+from nada_dsl.validate import check_mir
 
 
 @dataclass
@@ -51,6 +70,13 @@ class CompilationContext:
     literals: Dict[str, Tuple[str, proto_ty.NadaType]] = field(
         default_factory=lambda: {}
     )
+    literal_names: Dict[Tuple[object, str | bytes], str] = field(
+        default_factory=lambda: {}
+    )
+    function_aliases: Dict[int, int] = field(default_factory=lambda: {})
+    operations: Mapping[int, ASTOperation] = field(
+        default_factory=lambda: AST_OPERATIONS
+    )
 
 
 def get_target_dir() -> str:
@@ -69,55 +95,237 @@ def get_target_dir() -> str:
     return os.path.join(cwd, "target")
 
 
-def nada_compile(outputs: List[Output]) -> bytes:
-    """Compile Nada to MIR and dump it as JSON."""
-    compiled = nada_dsl_to_nada_mir(outputs)
+def nada_compile(
+    outputs: List[Output], optimize: Callable[["ProgramGraph"], object] | None = None
+) -> bytes:
+    """Compile Nada to MIR and dump it as JSON.
+
+    The structure of the MIR is validated before it is serialized (see
+    `nada_dsl.validate`).
+    """
+    compiled = nada_dsl_to_nada_mir(outputs, optimize)
+    check_mir(compiled)
     return bytes(compiled)
 
 
-def nada_dsl_to_nada_mir(outputs: List[Output]) -> proto_mir.ProgramMir:
+def nada_compile_to_stream(
+    outputs: List[Output],
+    stream: BinaryIO,
+    optimize: Callable[["ProgramGraph"], object] | None = None,
+):
+    """Compile Nada to MIR and write it into a binary stream.
+
+    The MIR elements are serialized as soon as they are produced, so the complete
+    `ProgramMir` is never held in memory.
+    """
+    emit_mir(outputs, MirWriter(stream), optimize)
+
+
+def nada_dsl_to_nada_mir(
+    outputs: List[Output], optimize: Callable[["ProgramGraph"], object] | None = None
+) -> proto_mir.ProgramMir:
     """Convert Nada DSL to Nada MIR."""
-    new_outputs = []
-    ctx = CompilationContext()
-    operations: Dict[int, proto_op.Operation] = SortedDict()
-    # Process outputs
-    for output in outputs:
-        timer.start(
-            f"nada_dsl.compiler_frontend.nada_dsl_to_nada_mir.{output.name}.process_operation"
+    builder = MirBuilder()
+    emit_mir(outputs, builder, optimize)
+    return builder.mir
+
+
+@dataclass
+class ProgramGraph:
+    """The operations of a program that are reachable from its outputs.
+
+    This is the representation the optimization passes work on (see `nada_dsl.passes`).
+    Passes update the operations in `operations` and redirect the users of the
+    operations they remove with `replace_operations`. The MIR is emitted from
+    `operations` too, while `AST_OPERATIONS` keeps the operations built by the
+    program, so the same outputs can be compiled again with other optimizations.
+
+    Attributes
+    ----------
+    outputs: List[Output]
+        The outputs of the program
+    roots: List[int]
+        The identifier of the operation computing every output
+    operation_ids: SortedSet
+        The identifiers of the operations reachable from the outputs
+    function_bodies: Dict[int, SortedSet]
+        The identifiers of the operations in the body of every function called
+        by the program, by function identifier
+    operations: MutableMapping[int, ASTOperation]
+        The operations of the program, by identifier. It is an overlay of
+        `AST_OPERATIONS` (see `operation_overlay`) that keeps the rewrites of the
+        passes
+    """
+
+    outputs: List[Output]
+    roots: List[int]
+    operation_ids: SortedSet = field(default_factory=SortedSet)
+    function_bodies: Dict[int, SortedSet] = field(default_factory=SortedDict)
+    operations: MutableMapping[int, ASTOperation] = field(
+        default_factory=operation_overlay
+    )
+
+    @classmethod
+    def from_outputs(cls, outputs: List[Output]) -> "ProgramGraph":
+        """Finds the operations reachable from the given outputs."""
+        graph = cls(outputs, [output.child.child.id for output in outputs])
+        for output, root in zip(outputs, graph.roots):
+            timer.start(
+                f"nada_dsl.compiler_frontend.nada_dsl_to_nada_mir.{output.name}.process_operation"
+            )
+            traverse_operations(root, graph.operation_ids, graph.operations)
+            timer.stop(
+                f"nada_dsl.compiler_frontend.nada_dsl_to_nada_mir.{output.name}.process_operation"
+            )
+        timer.start("nada_dsl.compiler_frontend.nada_dsl_to_nada_mir.sweep_functions")
+        graph.function_bodies = sweep_functions(
+            called_functions(graph.operation_ids, graph.operations), graph.operations
         )
-        out_operation_id = output.child.child.id
-        traverse_and_process_operations(out_operation_id, operations, ctx)
-        timer.stop(
-            f"nada_dsl.compiler_frontend.nada_dsl_to_nada_mir.{output.name}.process_operation"
+        timer.stop("nada_dsl.compiler_frontend.nada_dsl_to_nada_mir.sweep_functions")
+        return graph
+
+    def sweep(self):
+        """Finds again the reachable operations, dropping the ones that are not used
+        anymore."""
+        self.operation_ids = SortedSet()
+        for root in self.roots:
+            traverse_operations(root, self.operation_ids, self.operations)
+        self.function_bodies = sweep_functions(
+            called_functions(self.operation_ids, self.operations), self.operations
         )
-        party = output.party
-        ctx.parties[party.name] = party
-        new_outputs.append(
-            proto_mir.Output(
-                operation_id=out_operation_id,
-                name=output.name,
-                party=party.name,
-                type=AST_OPERATIONS[out_operation_id].ty,
-                source_ref_index=output.source_ref.to_index(),
+
+    def all_operation_ids(self) -> SortedSet:
+        """Returns the identifiers of all the operations in the program and its
+        functions."""
+        return self.operation_ids.union(*self.function_bodies.values())
+
+    def operation_count(self) -> int:
+        """Returns the number of operations in the program and its functions."""
+        return len(self.all_operation_ids())
+
+    def postorder(self) -> List[int]:
+        """Returns the identifiers of all the operations in the program and its
+        functions, every operation after its children."""
+        order = []
+        visited = set()
+        for start_id in self.all_operation_ids():
+            stack = [(start_id, False)]
+            while len(stack) > 0:
+                operation_id, children_done = stack.pop()
+                if children_done:
+                    order.append(operation_id)
+                    continue
+                if operation_id in visited:
+                    continue
+                visited.add(operation_id)
+                stack.append((operation_id, True))
+                stack.extend(
+                    (child, False)
+                    for child in self.operations[operation_id].child_operations()
+                    if child not in visited
+                )
+        return order
+
+    def users(self) -> Dict[int, List[int]]:
+        """Returns the identifiers of the operations using every operation."""
+        users: Dict[int, List[int]] = {}
+        for operation_id in self.all_operation_ids():
+            for child in self.operations[operation_id].child_operations():
+                users.setdefault(child, []).append(operation_id)
+        return users
+
+    def use_counts(self) -> Dict[int, int]:
+        """Returns the number of uses of every operation. Outputs count as uses."""
+        counts = {
+            operation_id: len(users) for operation_id, users in self.users().items()
+        }
+        for root in self.roots:
+            counts[root] = counts.get(root, 0) + 1
+        return counts
+
+    def replace_operations(self, replacements: Dict[int, int]):
+        """Replaces every use of the operations in `replacements` by the operation
+        they are mapped to, and drops the operations that are not reachable anymore.
+
+        Operations are compared by identifier, so a replacement can be replaced again.
+        """
+        if len(replacements) == 0:
+            return
+        resolved = {}
+        for operation_id in replacements:
+            target = replacements[operation_id]
+            while target in replacements:
+                target = replacements[target]
+            resolved[operation_id] = target
+        function_ids = set(self.function_bodies)
+        for operation_id in self.all_operation_ids() | function_ids:
+            operation = self.operations[operation_id]
+            replaced = replace_children(operation, resolved)
+            if replaced is not operation:
+                self.operations[operation_id] = replaced
+        self.roots = [resolved.get(root, root) for root in self.roots]
+        self.sweep()
+
+
+def emit_mir(
+    outputs: List[Output],
+    sink: MirSink,
+    optimize: Callable[[ProgramGraph], object] | None = None,
+):
+    """Convert Nada DSL to Nada MIR, writing every MIR element into the sink.
+
+    The operations reachable from the outputs are discovered first (see `ProgramGraph`).
+    Only their identifiers are kept, so the optimization passes can rewrite them and
+    every operation can be converted to MIR and written in identifier order right after.
+
+    Arguments
+    ---------
+    outputs: List[Output]
+        The outputs of the program
+    sink: MirSink
+        The destination of the MIR elements
+    optimize: Callable[[ProgramGraph], object] | None
+        The optimization passes to run on the program graph before the MIR is
+        emitted, for instance `nada_dsl.passes.PassManager.run`
+    """
+    graph = ProgramGraph.from_outputs(outputs)
+    ctx = CompilationContext(operations=graph.operations)
+    for output in outputs:
+        ctx.parties[output.party.name] = output.party
+    if optimize is not None:
+        optimize(graph)
+
+    # Functions are emitted first, so the operations can refer to the merged functions.
+    for function in iter_functions(ctx, graph.function_bodies):
+        sink.write_function(function)
+
+    timer.start("nada_dsl.compiler_frontend.nada_dsl_to_nada_mir.emit_operations")
+    for operation_id in graph.operation_ids:
+        maybe_op = process_operation(graph.operations[operation_id], ctx)
+        if maybe_op is not None:
+            sink.write_operation(
+                proto_mir.OperationMapEntry(id=operation_id, operation=maybe_op)
             )
-        )
+    timer.stop("nada_dsl.compiler_frontend.nada_dsl_to_nada_mir.emit_operations")
 
-    operations = [
-        proto_mir.OperationMapEntry(id=id, operation=op)
-        for id, op in operations.items()
-    ]
+    emit_tables(graph, ctx, sink)
 
-    mir = proto_mir.ProgramMir(
-        functions=process_functions(ctx),
-        parties=to_party_list(ctx.parties),
-        inputs=to_input_list(ctx.inputs),
-        literals=to_literal_list(ctx.literals),
-        outputs=new_outputs,
-        operations=operations,
-        source_files=SourceRef.get_sources(),
-        source_refs=SourceRef.get_refs(),
-    )
-    return mir
+
+def emit_tables(graph: ProgramGraph, ctx: CompilationContext, sink: MirSink):
+    """Writes the parties, inputs, literals, outputs and source references of the
+    program into the sink. It is invoked after all the operations are emitted."""
+    for party in to_party_list(ctx.parties):
+        sink.write_party(party)
+    for mir_input in to_input_list(ctx.inputs):
+        sink.write_input(mir_input)
+    for literal in to_literal_list(ctx.literals):
+        sink.write_literal(literal)
+    for mir_output in to_output_list(graph.outputs, graph.roots, graph.operations):
+        sink.write_output(mir_output)
+    for name, source in SourceRef.get_sources().items():
+        sink.write_source_file(name, source)
+    for source_ref in SourceRef.get_refs():
+        sink.write_source_ref(source_ref)
 
 
 def to_party_list(parties: Dict[str, Party]) -> List[proto_mir.Party]:
@@ -131,6 +339,28 @@ def to_party_list(parties: Dict[str, Party]) -> List[proto_mir.Party]:
     ]
 
 
+def to_output_list(
+    outputs: List[Output],
+    roots: List[int],
+    operations: Mapping[int, ASTOperation],
+) -> List[proto_mir.Output]:
+    """Convert outputs to a list in MIR format.
+
+    `roots` contains the identifier of the operation computing every output, which
+    is read from `operations`.
+    """
+    return [
+        proto_mir.Output(
+            operation_id=root,
+            name=output.name,
+            party=output.party.name,
+            type=operations[root].ty,
+            source_ref_index=output.source_ref.to_index(),
+        )
+        for output, root in zip(outputs, roots)
+    ]
+
+
 def to_input_list(inputs: Dict[int, InputASTOperation]) -> List[proto_mir.Input]:
     """Convert inputs to a list in MIR format."""
     input_list = []
@@ -163,50 +393,210 @@ def to_literal_list(
     return literal_list
 
 
-def process_functions(
+def iter_functions(
     ctx: CompilationContext,
-) -> List[proto_mir.NadaFunction]:
-    """Convert functions to a list in MIR format.
+    function_bodies: Dict[int, Set[int]],
+) -> Iterator[proto_mir.NadaFunction]:
+    """Convert functions to MIR format, yielding every function as soon as it is processed.
 
-    From a starting dictionary of functions, it traverses each one of them,
-    generating the corresponding MIR representation, discovering all the operations
-    in the function.
+    The structurally identical functions are merged first (see `merge_functions`):
+    only the one with the lowest identifier is converted, and the operations referring
+    to the others are redirected to it through `ctx.function_aliases`.
 
-    The algorithm might find new function calls while processing the operations
-    in a function. These function calls might discover of new functions that are not
-    in the original dictionary. These functions will be processed in turn.
+    Then, every remaining function is processed exactly once, in identifier order,
+    converting the operations of its body to MIR. The processing time of every
+    function is reported by the timer.
 
-    This function is designed to be invoked after the initial operation discovery
-    which will find the starting set of functions.
+    This function is designed to be invoked after the function discovery
+    (see `sweep_functions`).
 
     Arguments
     ---------
-    functions: Dict[int, NadaFunctionASTOperation]
-        A dictionary containing a starting list of functions
+    ctx: CompilationContext
+        The compilation context
+    function_bodies: Dict[int, Set[int]]
+        The identifiers of the operations in the body of every function, by function
+        identifier
     """
-    mir_functions = []
-    stack = list(ctx.functions.values())
-    ctx.functions = {}
-    while len(stack) > 0:
-        function = stack.pop()
-        function_operations = SortedDict()
-
-        traverse_and_process_operations(
-            function.child,
-            function_operations,
-            ctx,
+    functions = {
+        function_id: ctx.operations[function_id] for function_id in function_bodies
+    }
+    ctx.function_aliases.update(merge_functions(functions, ctx.operations))
+    for function_id in sorted(function_bodies):
+        if function_id in ctx.function_aliases:
+            continue
+        function = functions[function_id]
+        timer_name = (
+            f"nada_dsl.compiler_frontend.iter_functions.{function.name}.{function_id}"
         )
-        if len(ctx.functions) > 0:
-            stack.extend(ctx.functions.values())
-            ctx.functions = {}
+        timer.start(timer_name)
+        function_operations = []
+        for operation_id in sorted(function_bodies[function_id]):
+            maybe_op = process_operation(ctx.operations[operation_id], ctx)
+            if maybe_op is not None:
+                function_operations.append(
+                    proto_mir.OperationMapEntry(id=operation_id, operation=maybe_op)
+                )
+        mir_function = function.to_mir(function_operations, ctx.operations)
+        timer.stop(timer_name)
+        yield mir_function
+
+
+def called_functions(
+    operation_ids: Iterable[int],
+    operations: Mapping[int, ASTOperation],
+) -> Iterator[int]:
+    """Yields the identifiers of the functions called by the map and reduce
+    operations among the given operations, which are read from `operations`."""
+    for operation_id in operation_ids:
+        operation = operations[operation_id]
+        if isinstance(operation, (MapASTOperation, ReduceASTOperation)):
+            yield operation.fn
+
+
+def sweep_functions(
+    function_ids: Iterable[int],
+    operations: Mapping[int, ASTOperation],
+) -> Dict[int, SortedSet]:
+    """Finds the operations in the body of the given functions and of all the
+    functions called by map and reduce operations in them, recursively.
+
+    Functions are taken from a worklist in identifier order and the body of every
+    function is traversed exactly once (see `traverse_operations`). The functions
+    and their bodies are read from `operations`.
+
+    Returns a dictionary, sorted by function identifier, with the identifiers of
+    the operations in the body of every function.
+    """
+    bodies = SortedDict()
+    pending = SortedSet(function_ids)
+    while len(pending) > 0:
+        function_id = pending.pop(0)
+        body = SortedSet()
+        traverse_operations(operations[function_id].child, body, operations)
+        bodies[function_id] = body
+        pending.update(
+            called_id
+            for called_id in called_functions(body, operations)
+            if called_id not in bodies
+        )
+    return bodies
+
 
-        function_operations = [
-            proto_mir.OperationMapEntry(id=id, operation=op)
-            for id, op in function_operations.items()
-        ]
+def merge_functions(
+    functions: Dict[int, NadaFunctionASTOperation],
+    operations: Mapping[int, ASTOperation],
+) -> Dict[int, int]:
+    """Finds the structurally identical functions, whose bodies are read from
+    `operations`.
+
+    Returns a dictionary that maps every duplicated function to the function
+    with the lowest identifier among its duplicates.
+    """
+    structures = FunctionStructures(operations)
+    canonical: Dict[int, int] = {}
+    aliases = {}
+    for function_id in sorted(functions):
+        structure = structures.number(functions[function_id])
+        canonical_id = canonical.setdefault(structure, function_id)
+        if canonical_id != function_id:
+            aliases[function_id] = canonical_id
+    return aliases
+
+
+class FunctionStructures:
+    """Numbering of the structure of functions.
+
+    Two functions get the same number when they have the same argument and return
+    types and their bodies apply the same operations to their arguments.
+
+    The operations in a function body are numbered in post-order from the return
+    operation. Every operation is represented by its kind, its attributes, its type
+    and the numbers of its children. The arguments of the function are represented
+    by their position and the functions called by map and reduce operations by their
+    own structure number, so the representation does not depend on the operation
+    identifiers. Inputs, random values and arguments of enclosing functions are
+    represented by their identifier.
+
+    Arguments
+    ---------
+    operations: Mapping[int, ASTOperation]
+        The operations the function bodies are read from
+    """
+
+    def __init__(self, operations: Mapping[int, ASTOperation]):
+        self.operations = operations
+        self.functions: Dict[int, int] = {}
+        self.structures: Dict[Tuple, int] = {}
+
+    def number(self, function: NadaFunctionASTOperation) -> int:
+        """Returns the structure number of a function."""
+        if function.id in self.functions:
+            return self.functions[function.id]
+
+        numbers: Dict[int, int] = {}
+        nodes = []
+        stack = [(function.child, False)]
+        while len(stack) > 0:
+            operation_id, children_done = stack.pop()
+            if operation_id in numbers:
+                continue
+            operation = self.operations[operation_id]
+            children = operation.child_operations()
+            if not children_done:
+                stack.append((operation_id, True))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+            numbers[operation_id] = len(nodes)
+            nodes.append(
+                (
+                    self.operation_key(operation, function),
+                    type_key(operation.ty),
+                    tuple(numbers[child] for child in children),
+                )
+            )
 
-        mir_functions.append(function.to_mir(function_operations))
-    return mir_functions
+        structure = (
+            tuple(type_key(self.operations[arg].ty) for arg in function.args),
+            type_key(function.ty),
+            tuple(nodes),
+        )
+        number = self.structures.setdefault(structure, len(self.structures))
+        self.functions[function.id] = number
+        return number
+
+    # pylint: disable=too-many-return-statements
+    def operation_key(
+        self, operation: ASTOperation, function: NadaFunctionASTOperation
+    ) -> Tuple:
+        """Returns the kind and attributes of an operation in a function body."""
+        kind = operation.__class__.__name__
+        if isinstance(operation, NadaFunctionArgASTOperation):
+            if operation.fn == function.id:
+                return (kind, function.args.index(operation.id))
+            return (kind, "id", operation.id)
+        if isinstance(operation, LiteralASTOperation):
+            return (kind, operation.value)
+        if isinstance(operation, (MapASTOperation, ReduceASTOperation)):
+            return (kind, self.number(self.operations[operation.fn]))
+        if isinstance(operation, (BinaryASTOperation, UnaryASTOperation)):
+            return (kind, operation.variant)
+        if isinstance(operation, (IfElseASTOperation, CastASTOperation)):
+            return (kind,)
+        if isinstance(
+            operation,
+            (
+                ArrayAccessorASTOperation,
+                TupleAccessorASTOperation,
+                NTupleAccessorASTOperation,
+            ),
+        ):
+            return (kind, operation.index)
+        if isinstance(operation, ObjectAccessorASTOperation):
+            return (kind, operation.key)
+        if isinstance(operation, NewASTOperation):
+            return (kind, operation.name)
+        return (kind, "id", operation.id)
 
 
 def add_input_to_map(
@@ -223,47 +613,49 @@ def add_input_to_map(
     return operation.to_mir()
 
 
+def add_literal_to_map(operation: LiteralASTOperation, ctx: CompilationContext) -> str:
+    """Adds a literal to the literal table of the compilation and returns its name.
+
+    Literals with the same value and type share a single entry. Entries are named
+    with dense indices in the order in which they are emitted.
+    """
+    key = (operation.value, type_key(operation.ty))
+    literal_name = ctx.literal_names.get(key)
+    if literal_name is None:
+        literal_name = str(len(ctx.literal_names))
+        ctx.literal_names[key] = literal_name
+        ctx.literals[literal_name] = (str(operation.value), operation.ty)
+    return literal_name
+
+
 class CompilerException(Exception):
     """Generic compiler exception"""
 
 
-def traverse_and_process_operations(
+def traverse_operations(
     operation_id: int,
-    operations: Dict[int, proto_op.Operation],
-    ctx: CompilationContext,
-) -> Dict[int, NadaFunctionASTOperation]:
-    """Traverses the AST operations finding all the operation tree rooted at the given
+    operation_ids: Set[int],
+    operations: Mapping[int, ASTOperation],
+):
+    """Finds the identifiers of all the operations in the tree rooted at the given
     operation. Uses an iterative DFS algorithm.
 
-    It invokes `process_operation` which in turn generates a MIR and optionally discover
-    extra functions.
-
     Arguments
     ---------
     operation_id: int
-        The identifier of the root operation where the algorithm will start traversing the
-        operation graph
-    operations: Dict[int, Dict]
-        Dictionary that will be updated with the operations found
-    functions: Dict[int, NadaFunctionASTOperation]
-        Dictionary of existing functions. If a function is found that is not in this dictionary
-        it will added to the result dictionary
-
-    Returns
-    -------
-    Dict[int, NadaFunctionASTOperation]
-        Dictionary with all the new functions being found while traversing the operation tree
+        The identifier of the root operation
+    operation_ids: Set[int]
+        Set of the operation identifiers already found, updated with the new ones.
+        The operations in this set are not traversed again.
+    operations: Mapping[int, ASTOperation]
+        The operations, by identifier
     """
-
     stack = [operation_id]
     while len(stack) > 0:
         operation_id = stack.pop()
-        if operation_id not in operations:
-            operation = AST_OPERATIONS[operation_id]
-            maybe_op = process_operation(operation, ctx)
-            if maybe_op is not None:
-                operations[operation_id] = maybe_op
-            stack.extend(operation.child_operations())
+        if operation_id not in operation_ids:
+            operation_ids.add(operation_id)
+            stack.extend(operations[operation_id].child_operations())
 
 
 def process_operation(
@@ -294,6 +686,7 @@ def process_operation(
             NewASTOperation,
             RandomASTOperation,
             NadaFunctionArgASTOperation,
+            ArrayAccessorASTOperation,
             TupleAccessorASTOperation,
             NTupleAccessorASTOperation,
             ObjectAccessorASTOperation,
@@ -305,138 +698,26 @@ def process_operation(
         add_input_to_map(operation, ctx)
         return operation.to_mir()
     if isinstance(operation, LiteralASTOperation):
-        ctx.literals[operation.literal_index] = (str(operation.value), operation.ty)
-        return operation.to_mir()
+        return operation.to_mir(add_literal_to_map(operation, ctx))
     if isinstance(operation, (MapASTOperation, ReduceASTOperation)):
+        if operation.fn in ctx.function_aliases:
+            operation = replace(operation, fn=ctx.function_aliases[operation.fn])
         if operation.fn not in ctx.functions:
-            ctx.functions[operation.fn] = AST_OPERATIONS[operation.fn]
+            ctx.functions[operation.fn] = ctx.operations[operation.fn]
         return operation.to_mir()
     if isinstance(operation, NadaFunctionASTOperation):
         if operation.id not in ctx.functions:
-            ctx.functions[operation.id] = AST_OPERATIONS[operation.id]
+            ctx.functions[operation.id] = ctx.operations[operation.id]
         return None
 
     raise CompilerException(f"Compilation of Operation {operation} is not supported")
 
 
-class PrintMirException(Exception):
-    """Generic exception for printing MIR"""
-
-
 def print_mir(mir: proto_mir.ProgramMir):
-    """Prints the MIR in a human-readable format."""
-    print("Parties:")
-    for party in mir.parties:
-        print(f"  {party.name}")
-    print("Inputs:")
-    for mir_input in mir.inputs:
-        print(
-            f"  {mir_input.name} ty({type_to_str(mir_input.type)}) party({mir_input.party})"
-        )
-    print("Literals:")
-    for literal in mir.literals:
-        print(f"  {literal.name} ty({type_to_str(literal.type)}) val({literal.value})")
-    print("Outputs:")
-    for output in mir.outputs:
-        print(
-            f"  {output.name} ty({type_to_str(output.type)}) oid({output.operation_id})"
-        )
-    print("Functions:")
-    for function in mir.functions:
-        args = ", ".join(
-            [f"{arg.name}: ty({type_to_str(arg.type)})" for arg in function.args]
-        )
-        print(f"  {function.name} fn_id({function.id}), args({args})")
-        print_operations(function.operations)
+    """Prints the MIR in a human-readable format (see `nada_dsl.disassemble`)."""
+    disassemble(mir, sys.stdout)
 
-    print("Operations:")
-    print_operations(mir.operations)
 
-
-# pylint: disable=too-many-branches
 def print_operations(operation: List[proto_mir.OperationMapEntry]):
     """Prints a list of operations in a human-readable format."""
-    print()
-    for entry in operation:
-        op_id, op = entry.id, entry.operation
-        line = f"oid({op_id}) rty({type_to_str(op.type)}) = "
-        if hasattr(op, "binary"):
-            line += f"{op.binary.variant} oid({op.binary.left}) oid({op.binary.right})"
-        elif hasattr(op, "unary"):
-            line += f"{op.unary.variant} oid({op.unary.this})"
-        elif hasattr(op, "cast"):
-            line += f"cast oid({op.cast.target})"
-        elif hasattr(op, "ifelse"):
-            line += f"ifelse cond({op.ifelse.cond}) true({op.ifelse.first}) false({op.ifelse.second})"
-        elif hasattr(op, "random"):
-            line += "random "
-        elif hasattr(op, "input_ref"):
-            line += f"input_ref to({op.input_ref.refers_to})"
-        elif hasattr(op, "arg_ref"):
-            line += (
-                f"arg_ref fn_id({op.arg_ref.function_id}) to({op.arg_ref.refers_to})"
-            )
-        elif hasattr(op, "literal_ref"):
-            line += f"literal_ref to({op.literal_ref.refers_to})"
-        elif hasattr(op, "map"):
-            line += f"map fn({(op.map.fn)}) oid({op.map.child})"
-        elif hasattr(op, "reduce"):
-            line += f"reduce fn({(op.reduce.fn)}) init({op.reduce.initial}) oid({op.reduce.child})"
-        elif hasattr(op, "new"):
-            oids = ", ".join([f"oid({oid})" for oid in op.new.elements])
-            line += f"new {oids}"
-        elif hasattr(op, "array_accessor"):
-            line += f"array_accessor oid({op.array_accessor.source}) {op.array_accessor.index}"
-        elif hasattr(op, "tuple_accessor"):
-            line += f"tuple_accessor oid({op.tuple_accessor.source}) {op.tuple_accessor.index}"
-        elif hasattr(op, "ntuple_accessor"):
-            line += f"ntuple_accessor oid({op.ntuple_accessor.source}) {op.ntuple_accessor.index}"
-        elif hasattr(op, "object_accessor"):
-            line += f"object_accessor oid({op.object_accessor.source}) {op.object_accessor.key}"
-        elif hasattr(op, "cast"):
-            line += f"cast oid({op.cast.target}) {op.cast.to}"
-        else:
-            raise PrintMirException(f"Unknown operation {op}")
-        print(line)
-
-
-# pylint: disable=too-many-branches,too-many-return-statements
-def type_to_str(ty: proto_ty.NadaType):
-    """Converts a Nada type to a string."""
-    if hasattr(ty, "integer"):
-        return "Integer"
-    if hasattr(ty, "unsigned_integer"):
-        return "UnsignedInteger"
-    if hasattr(ty, "boolean"):
-        return "Boolean"
-    if hasattr(ty, "secret_integer"):
-        return "SecretInteger"
-    if hasattr(ty, "secret_unsigned_integer"):
-        return "SecretUnsignedInteger"
-    if hasattr(ty, "secret_boolean"):
-        return "SecretBoolean"
-    if hasattr(ty, "ecdsa_private_key"):
-        return "EcdsaPrivateKey"
-    if hasattr(ty, "ecdsa_public_key"):
-        return "EcdsaPublicKey"
-    if hasattr(ty, "ecdsa_digest_message"):
-        return "EcdsaDigestMessage"
-    if hasattr(ty, "ecdsa_signature"):
-        return "EcdsaSignature"
-    if hasattr(ty, "eddsa_private_key"):
-        return "EddsaPrivateKey"
-    if hasattr(ty, "eddsa_public_key"):
-        return "EddsaPublicKey"
-    if hasattr(ty, "eddsa_message"):
-        return "EddsaMessage"
-    if hasattr(ty, "eddsa_signature"):
-        return "EddsaSignature"
-    if hasattr(ty, "array"):
-        return f"Array[{type_to_str(ty.collection.contained_type)}:{ty.collection.array.size}]"
-    if hasattr(ty, "tuple"):
-        return f"Tuple[{type_to_str(ty.tuple.left)}, {type_to_str(ty.tuple.right)}]"
-    if hasattr(ty, "object"):
-        return "Object"
-    if hasattr(ty, "ntuple"):
-        return f"NTuple[{', '.join([type_to_str(t) for t in ty.ntuple.fields])}]"
-    raise PrintMirException("Unknown type {ty}")
+    write_operations(sys.stdout, operation, DisassemblyFilter())
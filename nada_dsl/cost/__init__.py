@@ -0,0 +1,37 @@
+"""Export classes and functions for Nada DSL cost estimation.
+
+The cost of a compiled program can be estimated from the command line:
+
+    python -m nada_dsl.cost program.nada.bin
+    python -m nada_dsl.cost program.py -O2 --weights weights.json
+
+The round depth and the critical path of every output are printed instead with
+`--critical-path`, and the secret operations that are only revealed with
+`--reveals` (`--revealable <input>` allows revealing a secret input earlier).
+"""
+
+from nada_dsl.cost.budget import Budget, BudgetViolation, check_budget
+from nada_dsl.cost.depth import (
+    DEFAULT_ROUNDS,
+    DepthReport,
+    OutputDepth,
+    PathStep,
+    analyze_depth,
+    format_critical_paths,
+)
+from nada_dsl.cost.estimate import (
+    DEFAULT_WEIGHTS,
+    CostReport,
+    FunctionCost,
+    OutputCost,
+    cost_by_source_ref,
+    estimate_cost,
+)
+from nada_dsl.cost.reveal import (
+    RevealCombination,
+    RevealFinding,
+    RevealPolicy,
+    RevealReport,
+    analyze_reveals,
+    format_reveal_report,
+)
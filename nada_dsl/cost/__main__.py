@@ -0,0 +1,77 @@
+"""Execute the command line interface entry point."""
+
+import argparse
+import json
+from dataclasses import asdict
+
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+
+from nada_dsl.compile import compile_script
+from nada_dsl.cost import (
+    RevealPolicy,
+    analyze_depth,
+    analyze_reveals,
+    estimate_cost,
+    format_critical_paths,
+    format_reveal_report,
+)
+
+
+def _main():
+    parser = argparse.ArgumentParser(
+        prog="python -m nada_dsl.cost",
+        description="Estimates the MPC cost of a Nada program.",
+    )
+    parser.add_argument(
+        "path", help="compiled program (MIR) or Nada DSL source file (.py) path"
+    )
+    parser.add_argument(
+        "-O",
+        dest="optimization_level",
+        type=int,
+        default=0,
+        help="optimization level used to compile a source file",
+    )
+    parser.add_argument(
+        "--weights", help="JSON file with the weight of every kind of cost"
+    )
+    parser.add_argument(
+        "--critical-path",
+        action="store_true",
+        help="print the round depth and the critical path of every output",
+    )
+    parser.add_argument(
+        "--reveals",
+        action="store_true",
+        help="print the secret operations whose results are only revealed",
+    )
+    parser.add_argument(
+        "--revealable",
+        action="append",
+        default=[],
+        metavar="INPUT",
+        help="secret input that may be revealed earlier (with --reveals)",
+    )
+    args = parser.parse_args()
+
+    if args.path.endswith(".py"):
+        mir_bytes = compile_script(args.path, args.optimization_level).mir
+    else:
+        with open(args.path, "rb") as mir_file:
+            mir_bytes = mir_file.read()
+    weights = None
+    if args.weights is not None:
+        with open(args.weights, "r", encoding="UTF-8") as weights_file:
+            weights = json.load(weights_file)
+
+    mir = proto_mir.ProgramMir().parse(mir_bytes)
+    if args.critical_path:
+        print(format_critical_paths(analyze_depth(mir)))
+    elif args.reveals:
+        policy = RevealPolicy(set(args.revealable))
+        print(format_reveal_report(analyze_reveals(mir, policy)))
+    else:
+        print(json.dumps(asdict(estimate_cost(mir, weights)), indent=2))
+
+
+_main()
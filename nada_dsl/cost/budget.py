@@ -0,0 +1,249 @@
+"""
+Cost budgets of compiled programs.
+
+A budget limits the number of secret multiplications, the number of secret
+comparisons and the round depth of a program or of some of its outputs, and the
+size of the MIR of the program. Every limit is optional.
+
+The operations used by several outputs count towards the budget of each of them.
+When a limit is exceeded, the source code lines that contribute the most to it are
+reported.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional, Tuple
+
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+
+from nada_dsl.cost.depth import DepthReport, analyze_depth
+from nada_dsl.cost.estimate import cost_by_source_ref
+from nada_dsl.errors import InvalidBudgetError
+from nada_dsl.mir_util import source_location
+
+# Number of source code lines reported for every exceeded limit
+MAX_OFFENDERS = 5
+
+# Limits of the budget of the whole program that the budgets of outputs do not have
+PROGRAM_LIMITS = {"mir_size", "outputs"}
+
+# Kind of cost limited by every budget count
+BUDGET_COUNTS = {"multiplications": "multiplication", "comparisons": "comparison"}
+
+
+@dataclass
+class Budget:
+    """Limits of the cost of a program.
+
+    Attributes
+    ----------
+    multiplications: Optional[int]
+        The maximum number of secret multiplications
+    comparisons: Optional[int]
+        The maximum number of secret comparisons
+    depth: Optional[int]
+        The maximum round depth (see `nada_dsl.cost.depth`)
+    mir_size: Optional[int]
+        The maximum size of the MIR in bytes, only for the whole program
+    outputs: Dict[str, Budget]
+        The budgets of some outputs, by output name
+    """
+
+    multiplications: Optional[int] = None
+    comparisons: Optional[int] = None
+    depth: Optional[int] = None
+    mir_size: Optional[int] = None
+    outputs: Dict[str, "Budget"] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict, output: Optional[str] = None) -> "Budget":
+        """Builds a budget from its JSON representation, e.g.
+        `{"multiplications": 1000, "outputs": {"result": {"depth": 10}}}`.
+
+        `output` is the name of the output the budget applies to, None for the whole
+        program. The budgets of outputs can not limit the MIR size nor have budgets
+        of outputs themselves. Limits are non-negative integers, or null for no
+        limit."""
+        scope = "program" if output is None else f"output '{output}'"
+        if not isinstance(data, dict):
+            raise InvalidBudgetError(f"the budget of {scope} is not an object")
+        names = {budget_field.name for budget_field in fields(cls)}
+        if output is not None:
+            names -= PROGRAM_LIMITS
+        unknown = sorted(set(data) - names)
+        if len(unknown) > 0:
+            raise InvalidBudgetError(
+                f"unsupported budget limits for {scope}: {', '.join(unknown)}"
+            )
+        for name, value in data.items():
+            if name == "outputs" or value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                raise InvalidBudgetError(
+                    f"invalid {name} limit {value!r} for {scope}, expected a"
+                    " non-negative integer"
+                )
+        outputs = data.get("outputs", {})
+        if not isinstance(outputs, dict):
+            raise InvalidBudgetError("the budgets of the outputs are not an object")
+        limits = dict(data)
+        limits["outputs"] = {
+            name: cls.from_dict(output_budget, name)
+            for name, output_budget in outputs.items()
+        }
+        return cls(**limits)
+
+
+@dataclass
+class BudgetViolation:
+    """A limit of a budget that is exceeded.
+
+    Attributes
+    ----------
+    scope: str
+        The name of the output whose budget is exceeded, or `program`
+    limit: str
+        The name of the exceeded limit
+    maximum: int
+        The value of the limit
+    value: int
+        The value exceeding the limit
+    offenders: List[Tuple[str, int]]
+        The source code lines that contribute the most to the value, with their
+        contribution. For the MIR size, the contribution of a line is its number of
+        operations
+    """
+
+    scope: str
+    limit: str
+    maximum: int
+    value: int
+    offenders: List[Tuple[str, int]] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        lines = [f"{self.scope}: {self.limit} {self.value} exceeds {self.maximum}"]
+        lines.extend(f"  {count} at {source}" for source, count in self.offenders)
+        return "\n".join(lines)
+
+
+def top_offenders(
+    mir: proto_mir.ProgramMir, contributions: Dict[int, int]
+) -> List[Tuple[str, int]]:
+    """Returns the source code lines with the largest contributions, merging the
+    source references of the same line."""
+    lines: Counter = Counter()
+    for index, contribution in contributions.items():
+        if contribution > 0:
+            lines[source_location(mir, index)] += contribution
+    return lines.most_common(MAX_OFFENDERS)
+
+
+def check_limits(
+    mir: proto_mir.ProgramMir,
+    budget: Budget,
+    scope: str,
+    operation_ids: List[int],
+    depth_report: Optional[DepthReport],
+) -> List[BudgetViolation]:
+    """Returns the violations of the count and depth limits of a budget by the
+    given operations. The depth report of the program is only needed if the budget
+    limits the depth."""
+    violations = []
+    if budget.multiplications is not None or budget.comparisons is not None:
+        sources = cost_by_source_ref(mir, operation_ids)
+        for limit, kind in BUDGET_COUNTS.items():
+            maximum = getattr(budget, limit)
+            contributions = {
+                index: counts.get(kind, 0) for index, counts in sources.items()
+            }
+            value = sum(contributions.values())
+            if maximum is not None and value > maximum:
+                violations.append(
+                    BudgetViolation(
+                        scope,
+                        limit,
+                        maximum,
+                        value,
+                        top_offenders(mir, contributions),
+                    )
+                )
+    if budget.depth is not None:
+        for output in depth_report.outputs:
+            if output.depth <= budget.depth or scope not in ("program", output.name):
+                continue
+            lines: Counter = Counter()
+            for step in output.critical_path:
+                lines[step.source] += step.rounds * step.repeat
+            violations.append(
+                BudgetViolation(
+                    scope if scope != "program" else f"{scope} ({output.name})",
+                    "depth",
+                    budget.depth,
+                    output.depth,
+                    lines.most_common(MAX_OFFENDERS),
+                )
+            )
+    return violations
+
+
+def check_budget(
+    mir: proto_mir.ProgramMir, mir_size: int, budget: Budget
+) -> List[BudgetViolation]:
+    """Checks the cost of a compiled program against a budget.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+    mir_size: int
+        The size of the MIR in bytes
+    budget: Budget
+        The budget
+
+    Returns
+    -------
+    List[BudgetViolation]
+        The exceeded limits, empty if the program is within the budget
+    """
+    violations = []
+    if budget.mir_size is not None and mir_size > budget.mir_size:
+        operations: Counter = Counter()
+        for entry in mir.operations:
+            operations[entry.operation.source_ref_index] += 1
+        for function in mir.functions:
+            for entry in function.operations:
+                operations[entry.operation.source_ref_index] += 1
+        violations.append(
+            BudgetViolation(
+                "program",
+                "mir_size",
+                budget.mir_size,
+                mir_size,
+                top_offenders(mir, operations),
+            )
+        )
+    # The depths of all the outputs are computed at once, and only if needed
+    depth_report = None
+    if budget.depth is not None or any(
+        output_budget.depth is not None for output_budget in budget.outputs.values()
+    ):
+        depth_report = analyze_depth(mir)
+    violations.extend(
+        check_limits(
+            mir,
+            budget,
+            "program",
+            [output.operation_id for output in mir.outputs],
+            depth_report,
+        )
+    )
+    outputs = {output.name: output for output in mir.outputs}
+    for name, output_budget in budget.outputs.items():
+        if name not in outputs:
+            raise InvalidBudgetError(f"budget of unknown output '{name}'")
+        violations.extend(
+            check_limits(
+                mir, output_budget, name, [outputs[name].operation_id], depth_report
+            )
+        )
+    return violations
@@ -0,0 +1,246 @@
+"""
+Round depth and critical path analysis of a compiled program.
+
+The latency of an MPC program is dominated by the number of communication rounds,
+not by the number of operations. The round depth of an operation is the largest
+number of rounds along a path from an input to the operation: operations that need
+communication (see `nada_dsl.cost.estimate`) add rounds, any other operation is free.
+
+A map operation calls its function on all the elements of the array at the same
+time, so it adds the depth of the function once. A reduce operation calls its
+function once per element, one call after the other, so it adds the depth of the
+function multiplied by the size of the array.
+
+The critical path of an output is a path of operations that reaches its round depth.
+Only the operations that add rounds are part of the reported path, with the source
+code line that built them.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import betterproto
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.cost.estimate import called_function, operation_cost_kind
+from nada_dsl.mir_util import (
+    array_size,
+    operation_children,
+    operation_name,
+    operations_by_id,
+    source_location,
+)
+from nada_dsl.timer import add_timer
+
+# Number of communication rounds of every kind of cost
+DEFAULT_ROUNDS: Dict[str, int] = {
+    "multiplication": 1,
+    "comparison": 1,
+    "division": 1,
+    "right_shift": 1,
+    "trunc_pr": 1,
+    "random": 0,
+    "reveal": 1,
+    "ecdsa_sign": 1,
+    "eddsa_sign": 1,
+}
+
+
+@dataclass
+class PathStep:
+    """An operation of a critical path.
+
+    Attributes
+    ----------
+    operation_id: int
+        The identifier of the operation
+    operation: str
+        The kind of operation
+    rounds: int
+        The number of rounds of the operation
+    repeat: int
+        The number of times the operation is executed one after the other, because
+        it is part of the function of a reduce operation
+    function: str
+        The name of the function whose body contains the operation, empty for the
+        operations of the program
+    source: str
+        The source code line that built the operation
+    """
+
+    operation_id: int
+    operation: str
+    rounds: int
+    repeat: int
+    function: str
+    source: str
+
+
+@dataclass
+class OutputDepth:
+    """Round depth and critical path of an output."""
+
+    name: str
+    depth: int
+    critical_path: List[PathStep] = field(default_factory=list)
+
+
+@dataclass
+class DepthReport:
+    """Round depth of a program and of its outputs."""
+
+    depth: int
+    outputs: List[OutputDepth] = field(default_factory=list)
+
+
+class DepthAnalysis:
+    """Computes the round depth of the operations of a program.
+
+    The depth of every operation, and of the body of every function, is computed once,
+    so the analysis is linear in the size of the MIR.
+    """
+
+    def __init__(self, mir: proto_mir.ProgramMir, rounds: Dict[str, int]):
+        self.mir = mir
+        self.rounds = rounds
+        self.operations = operations_by_id(mir)
+        self.functions: Dict[int, proto_mir.NadaFunction] = {
+            function.id: function for function in mir.functions
+        }
+        self.depths: Dict[int, int] = {}
+
+    def function_depth(self, function_id: int) -> int:
+        """Returns the round depth of a single call of a function."""
+        return self.depth(self.functions[function_id].return_operation_id)
+
+    def call_repeat(self, operation: proto_op.Operation) -> int:
+        """Returns the number of calls of the function of a map or reduce operation
+        that are executed one after the other."""
+        kind, value = betterproto.which_one_of(operation, "operation")
+        if kind == "reduce":
+            return array_size(self.operations[value.child].type)
+        return 1
+
+    def own_rounds(self, operation: proto_op.Operation) -> int:
+        """Returns the number of rounds added by an operation, including the calls of
+        its function for map and reduce operations."""
+        kind = operation_cost_kind(operation, self.operations)
+        rounds = 0 if kind is None else self.rounds.get(kind, 0)
+        function_call = called_function(operation)
+        if function_call is not None:
+            rounds += self.call_repeat(operation) * self.function_depth(
+                function_call[0]
+            )
+        return rounds
+
+    def depth(self, operation_id: int) -> int:
+        """Returns the round depth of an operation."""
+        stack = [(operation_id, False)]
+        while len(stack) > 0:
+            current_id, children_done = stack.pop()
+            if current_id in self.depths:
+                continue
+            operation = self.operations[current_id]
+            children = operation_children(operation)
+            if children_done:
+                self.depths[current_id] = self.own_rounds(operation) + max(
+                    (self.depths[child] for child in children), default=0
+                )
+                continue
+            stack.append((current_id, True))
+            stack.extend(
+                (child, False) for child in children if child not in self.depths
+            )
+        return self.depths[operation_id]
+
+    def critical_path(
+        self, operation_id: int, function: str = "", repeat: int = 1
+    ) -> List[PathStep]:
+        """Returns the operations that add rounds along a path reaching the depth of
+        an operation, in execution order."""
+        self.depth(operation_id)
+        steps: List[PathStep] = []
+        current_id: Optional[int] = operation_id
+        while current_id is not None:
+            operation = self.operations[current_id]
+            function_call = called_function(operation)
+            if function_call is not None:
+                called = self.functions[function_call[0]]
+                body = self.critical_path(
+                    called.return_operation_id,
+                    called.name,
+                    repeat * self.call_repeat(operation),
+                )
+                steps.extend(reversed(body))
+            else:
+                kind = operation_cost_kind(operation, self.operations)
+                rounds = 0 if kind is None else self.rounds.get(kind, 0)
+                if rounds > 0:
+                    steps.append(
+                        PathStep(
+                            current_id,
+                            operation_name(operation),
+                            rounds,
+                            repeat,
+                            function,
+                            source_location(self.mir, operation.source_ref_index),
+                        )
+                    )
+            children = operation_children(operation)
+            current_id = max(children, key=self.depths.get, default=None)
+        steps.reverse()
+        return steps
+
+    def report(self) -> DepthReport:
+        """Computes the round depth of every output and returns the report."""
+        outputs = [
+            OutputDepth(
+                output.name,
+                self.depth(output.operation_id),
+                self.critical_path(output.operation_id),
+            )
+            for output in self.mir.outputs
+        ]
+        return DepthReport(
+            max((output.depth for output in outputs), default=0), outputs
+        )
+
+
+@add_timer(timer_name="nada_dsl.cost.analyze_depth")
+def analyze_depth(
+    mir: proto_mir.ProgramMir, rounds: Optional[Dict[str, int]] = None
+) -> DepthReport:
+    """Computes the round depth and the critical path of every output of a compiled
+    program.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+    rounds: Optional[Dict[str, int]]
+        The number of rounds of the kinds of costs, replacing the default ones
+        (see `DEFAULT_ROUNDS`)
+
+    Returns
+    -------
+    DepthReport
+        The round depth of the program and the critical path of every output
+    """
+    all_rounds = dict(DEFAULT_ROUNDS)
+    all_rounds.update(rounds or {})
+    return DepthAnalysis(mir, all_rounds).report()
+
+
+def format_critical_paths(report: DepthReport) -> str:
+    """Formats the critical path of every output as text, one operation per line."""
+    lines = []
+    for output in report.outputs:
+        lines.append(f"{output.name}: {output.depth} rounds")
+        for step in output.critical_path:
+            function = f" in {step.function}" if step.function else ""
+            repeat = f" x{step.repeat}" if step.repeat > 1 else ""
+            lines.append(
+                f"  {step.rounds}{repeat} {step.operation}{function} at {step.source}"
+            )
+    return "\n".join(lines)
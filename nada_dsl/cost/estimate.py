@@ -0,0 +1,407 @@
+"""
+Static estimation of the MPC cost of a compiled program.
+
+The cost of a program is estimated from its MIR, without running it, by counting
+the operations that need communication between the nodes:
+
+- `multiplication`: multiplications, boolean operations and inner products of two
+  secret values, and if-else operations with a secret condition.
+- `comparison`: comparisons with a secret operand.
+- `division`: divisions and modulos with a secret operand.
+- `right_shift`: right shifts of a secret value.
+- `trunc_pr`: probabilistic truncations.
+- `random`: random secret values.
+- `reveal`: secret values made public.
+- `ecdsa_sign` and `eddsa_sign`: signatures.
+
+Operations on public values, additions, and multiplications by a public value are
+computed locally by every node and are free.
+
+Map and reduce operations apply their function once per element of the array, so
+the cost of the function is multiplied by the size of the array. The operations
+of the program used by a function are part of the body of the function, so they are
+counted once per call too.
+
+The operations of the program are attributed to the first output that uses them,
+in the order of the outputs, so the costs of the outputs add up to the cost of the
+program. The cost of a function is the cost of a single call.
+
+The counts are weighted to give a single cost figure. The default weights are rough
+relative costs, in multiplications.
+
+The report also gives the round depth of the program and of every output (see
+`nada_dsl.cost.depth`), which grows with chains of multiplications such as the ones
+that compute the powers of secret values.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import betterproto
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.mir_util import (
+    array_size,
+    is_secret,
+    operation_children,
+    operations_by_id,
+)
+from nada_dsl.timer import add_timer
+
+Variant = proto_op.BinaryOperationVariant
+
+# Weight of every counted operation
+DEFAULT_WEIGHTS: Dict[str, int] = {
+    "multiplication": 1,
+    "comparison": 8,
+    "division": 32,
+    "right_shift": 8,
+    "trunc_pr": 2,
+    "random": 1,
+    "reveal": 1,
+    "ecdsa_sign": 64,
+    "eddsa_sign": 64,
+}
+
+# Binary operations that need communication when both operands are secret
+BOTH_SECRET_VARIANTS: Dict[Variant, str] = {
+    Variant.MULTIPLICATION: "multiplication",
+    Variant.BOOL_AND: "multiplication",
+    Variant.BOOL_OR: "multiplication",
+    Variant.BOOL_XOR: "multiplication",
+    Variant.INNER_PRODUCT: "multiplication",
+}
+
+# Binary operations that need communication when any operand is secret
+ANY_SECRET_VARIANTS: Dict[Variant, str] = {
+    Variant.LESS_THAN: "comparison",
+    Variant.LESS_EQ: "comparison",
+    Variant.GREATER_THAN: "comparison",
+    Variant.GREATER_EQ: "comparison",
+    Variant.EQUALS: "comparison",
+    Variant.NOT_EQUALS: "comparison",
+    Variant.EQUALS_PUBLIC_OUTPUT: "comparison",
+    Variant.DIVISION: "division",
+    Variant.MODULO: "division",
+    Variant.RIGHT_SHIFT: "right_shift",
+}
+
+# Binary operations that always need communication
+ALWAYS_VARIANTS: Dict[Variant, str] = {
+    Variant.TRUNC_PR: "trunc_pr",
+    Variant.ECDSA_SIGN: "ecdsa_sign",
+    Variant.EDDSA_SIGN: "eddsa_sign",
+}
+
+
+@dataclass
+class OutputCost:
+    """Cost of the operations attributed to an output, and round depth of the
+    output."""
+
+    name: str
+    counts: Dict[str, int]
+    cost: int
+    depth: int = 0
+
+
+@dataclass
+class FunctionCost:
+    """Cost of a single call of a function, and number of calls of the function
+    in the whole program."""
+
+    id: int
+    name: str
+    calls: int
+    counts: Dict[str, int]
+    cost: int
+
+
+@dataclass
+class CostReport:
+    """Estimated cost of a program.
+
+    Attributes
+    ----------
+    counts: Dict[str, int]
+        The number of operations of every kind in the program
+    cost: int
+        The weighted cost of the program
+    outputs: List[OutputCost]
+        The cost of the operations attributed to every output
+    functions: List[FunctionCost]
+        The cost of every function
+    weights: Dict[str, int]
+        The weights used to compute the costs
+    depth: int
+        The round depth of the program, the largest round depth of its outputs
+    """
+
+    counts: Dict[str, int]
+    cost: int
+    outputs: List[OutputCost] = field(default_factory=list)
+    functions: List[FunctionCost] = field(default_factory=list)
+    weights: Dict[str, int] = field(default_factory=dict)
+    depth: int = 0
+
+
+# pylint: disable=too-many-return-statements
+def operation_cost_kind(
+    operation: proto_op.Operation, operations: Dict[int, proto_op.Operation]
+) -> Optional[str]:
+    """Returns the kind of cost of an operation, or None if the operation is free.
+
+    Arguments
+    ---------
+    operation: proto_op.Operation
+        The operation
+    operations: Dict[int, proto_op.Operation]
+        All the operations of the program, used to find the types of the operands
+    """
+    kind, value = betterproto.which_one_of(operation, "operation")
+    if kind == "binary":
+        if value.variant in ALWAYS_VARIANTS:
+            return ALWAYS_VARIANTS[value.variant]
+        left_secret = is_secret(operations[value.left].type)
+        right_secret = is_secret(operations[value.right].type)
+        if value.variant in BOTH_SECRET_VARIANTS and left_secret and right_secret:
+            return BOTH_SECRET_VARIANTS[value.variant]
+        if value.variant in ANY_SECRET_VARIANTS and (left_secret or right_secret):
+            return ANY_SECRET_VARIANTS[value.variant]
+        return None
+    if kind == "unary":
+        if value.variant == proto_op.UnaryOperationVariant.REVEAL:
+            return "reveal"
+        return None
+    if kind == "ifelse":
+        if is_secret(operations[value.cond].type):
+            return "multiplication"
+        return None
+    if kind == "random":
+        return "random"
+    return None
+
+
+def called_function(operation: proto_op.Operation) -> Optional[Tuple[int, int]]:
+    """Returns the identifiers of the function and of the array of a map or reduce
+    operation, None for any other operation."""
+    kind, value = betterproto.which_one_of(operation, "operation")
+    if kind in ("map", "reduce"):
+        return value.fn, value.child
+    return None
+
+
+def weighted_cost(counts: Dict[str, int], weights: Dict[str, int]) -> int:
+    """Returns the sum of the counts multiplied by their weight."""
+    return sum(weights.get(kind, 0) * count for kind, count in counts.items())
+
+
+class CostEstimator:
+    """Counts the operations of a program.
+
+    The body of every function is counted once, whatever the number of times the
+    function is called, so the estimation is linear in the size of the MIR.
+    """
+
+    def __init__(self, mir: proto_mir.ProgramMir, weights: Dict[str, int]):
+        self.mir = mir
+        self.weights = weights
+        self.operations = operations_by_id(mir)
+        self.functions: Dict[int, proto_mir.NadaFunction] = {
+            function.id: function for function in mir.functions
+        }
+        self.function_counts: Dict[int, Counter] = {}
+        self.function_calls: Dict[int, Counter] = {}
+        self.function_sources: Dict[int, Dict[int, Counter]] = {}
+
+    def count_operation(
+        self, operation: proto_op.Operation, counts: Counter, calls: Counter
+    ):
+        """Adds the cost of an operation, including the calls of its function for
+        map and reduce operations, to the counts."""
+        kind = operation_cost_kind(operation, self.operations)
+        if kind is not None:
+            counts[kind] += 1
+        function_call = called_function(operation)
+        if function_call is not None:
+            function_id, array_id = function_call
+            size = array_size(self.operations[array_id].type)
+            for kind, count in self.count_function(function_id).items():
+                counts[kind] += size * count
+            calls[function_id] += size
+            for called_id, count in self.function_calls[function_id].items():
+                calls[called_id] += size * count
+
+    def count_function(self, function_id: int) -> Counter:
+        """Returns the counts of a single call of a function.
+
+        The number of calls of every function called by the function, for a single
+        call, is recorded in `function_calls`.
+        """
+        if function_id not in self.function_counts:
+            counts: Counter = Counter()
+            calls: Counter = Counter()
+            for entry in self.functions[function_id].operations:
+                self.count_operation(entry.operation, counts, calls)
+            self.function_counts[function_id] = counts
+            self.function_calls[function_id] = calls
+        return self.function_counts[function_id]
+
+    def count_operation_source(
+        self, operation: proto_op.Operation, sources: Dict[int, Counter]
+    ):
+        """Adds the cost of an operation, including the calls of its function for
+        map and reduce operations, to the counts of the source references that built
+        the operations."""
+        kind = operation_cost_kind(operation, self.operations)
+        if kind is not None:
+            sources.setdefault(operation.source_ref_index, Counter())[kind] += 1
+        function_call = called_function(operation)
+        if function_call is not None:
+            function_id, array_id = function_call
+            size = array_size(self.operations[array_id].type)
+            for index, counts in self.count_function_sources(function_id).items():
+                source_counts = sources.setdefault(index, Counter())
+                for kind, count in counts.items():
+                    source_counts[kind] += size * count
+
+    def count_function_sources(self, function_id: int) -> Dict[int, Counter]:
+        """Returns the counts of a single call of a function, by source reference."""
+        if function_id not in self.function_sources:
+            sources: Dict[int, Counter] = {}
+            for entry in self.functions[function_id].operations:
+                self.count_operation_source(entry.operation, sources)
+            self.function_sources[function_id] = sources
+        return self.function_sources[function_id]
+
+    def count_sources(self, operation_ids: Iterable[int]) -> Dict[int, Counter]:
+        """Returns the counts of the operations used by the given operations, by
+        source reference."""
+        sources: Dict[int, Counter] = {}
+        visited = set()
+        stack = list(operation_ids)
+        while len(stack) > 0:
+            operation_id = stack.pop()
+            if operation_id in visited:
+                continue
+            visited.add(operation_id)
+            operation = self.operations[operation_id]
+            self.count_operation_source(operation, sources)
+            stack.extend(operation_children(operation))
+        return sources
+
+    def counts_to_dict(self, counts: Counter) -> Dict[str, int]:
+        """Returns the counts of all the kinds of costs, including the ones that
+        are zero."""
+        kinds = list(self.weights) + sorted(set(counts) - set(self.weights))
+        return {kind: counts[kind] for kind in kinds}
+
+    def report(self) -> CostReport:
+        """Counts the operations of the program and returns the report."""
+        total: Counter = Counter()
+        calls: Counter = Counter()
+        outputs = []
+        visited = set()
+        for output in self.mir.outputs:
+            counts: Counter = Counter()
+            stack = [output.operation_id]
+            while len(stack) > 0:
+                operation_id = stack.pop()
+                if operation_id in visited:
+                    continue
+                visited.add(operation_id)
+                operation = self.operations[operation_id]
+                self.count_operation(operation, counts, calls)
+                stack.extend(operation_children(operation))
+            total.update(counts)
+            outputs.append(
+                OutputCost(
+                    output.name,
+                    self.counts_to_dict(counts),
+                    weighted_cost(counts, self.weights),
+                )
+            )
+        functions = [
+            FunctionCost(
+                function.id,
+                function.name,
+                calls[function.id],
+                self.counts_to_dict(self.count_function(function.id)),
+                weighted_cost(self.count_function(function.id), self.weights),
+            )
+            for function in self.mir.functions
+        ]
+        return CostReport(
+            self.counts_to_dict(total),
+            weighted_cost(total, self.weights),
+            outputs,
+            functions,
+            dict(self.weights),
+        )
+
+
+def cost_by_source_ref(
+    mir: proto_mir.ProgramMir, operation_ids: Optional[Iterable[int]] = None
+) -> Dict[int, Dict[str, int]]:
+    """Counts the operations of a compiled program by source reference.
+
+    Every operation is counted once, even when it is used by several outputs, and the
+    operations of functions are counted once per call.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+    operation_ids: Optional[Iterable[int]]
+        The operations whose cost is counted, with the operations they use.
+        All the outputs by default
+
+    Returns
+    -------
+    Dict[int, Dict[str, int]]
+        The number of operations of every kind of cost, by source reference index
+    """
+    if operation_ids is None:
+        operation_ids = [output.operation_id for output in mir.outputs]
+    estimator = CostEstimator(mir, DEFAULT_WEIGHTS)
+    return {
+        index: dict(counts)
+        for index, counts in estimator.count_sources(operation_ids).items()
+    }
+
+
+@add_timer(timer_name="nada_dsl.cost.estimate_cost")
+def estimate_cost(
+    mir: proto_mir.ProgramMir, weights: Optional[Dict[str, int]] = None
+) -> CostReport:
+    """Estimates the MPC cost of a compiled program.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+    weights: Optional[Dict[str, int]]
+        The weights of the kinds of costs, replacing the default ones
+        (see `DEFAULT_WEIGHTS`)
+
+    Returns
+    -------
+    CostReport
+        The cost of the program, of its outputs and of its functions, with the
+        round depth of the program and of its outputs
+    """
+    # Imported here because the depth analysis uses the cost kinds of this module
+    from nada_dsl.cost.depth import (  # pylint: disable=import-outside-toplevel
+        analyze_depth,
+    )
+
+    all_weights = dict(DEFAULT_WEIGHTS)
+    all_weights.update(weights or {})
+    report = CostEstimator(mir, all_weights).report()
+    depth_report = analyze_depth(mir)
+    report.depth = depth_report.depth
+    for output, output_depth in zip(report.outputs, depth_report.outputs):
+        output.depth = output_depth.depth
+    return report
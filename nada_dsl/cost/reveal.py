@@ -0,0 +1,422 @@
+"""
+Secret flow analysis of the reveals of a compiled program.
+
+Any operation with a secret operand is secret, so programs often compute large
+parts of their graph on secret values only to reveal the result. A secret operation
+is only revealed when all its users are reveals or operations that are only revealed
+themselves, and it is not an output. Nothing secret escapes from the operations
+that are only revealed, so they can be computed on public values if their secret
+operands are revealed instead, which removes their cost.
+
+Revealing the operands earlier discloses more than the original reveal, so it is
+only suggested under an explicit `RevealPolicy`, which lists the secret inputs that
+may be disclosed. A secret value may be revealed when all the secret inputs it
+depends on are listed by the policy and it does not depend on secret random values.
+
+Reveals that are only combined by public additions and subtractions are reported
+too: combining the secret values first and revealing the result once needs fewer
+reveals and discloses less, whatever the policy.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.cost.estimate import DEFAULT_WEIGHTS, CostEstimator
+from nada_dsl.mir_util import (
+    is_secret,
+    operation_children,
+    operation_kind,
+    source_location,
+)
+from nada_dsl.timer import add_timer
+
+# Public binary operations that could be computed on secret values for free
+LINEAR_VARIANTS = (
+    proto_op.BinaryOperationVariant.ADDITION,
+    proto_op.BinaryOperationVariant.SUBTRACTION,
+)
+
+
+@dataclass
+class RevealPolicy:
+    """The secret values that may be revealed earlier than the program does.
+
+    Attributes
+    ----------
+    revealable_inputs: Set[str]
+        The names of the secret inputs that may be disclosed
+    """
+
+    revealable_inputs: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class RevealFinding:
+    """Secret operations whose results are only revealed.
+
+    Attributes
+    ----------
+    reveals: List[str]
+        The source code lines of the reveals of the operations
+    secret_operations: int
+        The number of secret operations that are only revealed
+    counts: Dict[str, int]
+        The cost of these operations (see `nada_dsl.cost.estimate`)
+    inputs: List[str]
+        The secret inputs these operations depend on
+    public_operations: int
+        The number of these operations that can be computed on public values under
+        the policy
+    saved: Dict[str, int]
+        The cost of the operations that can be computed on public values
+    reveal_points: List[str]
+        The secret values to reveal instead, so that these operations are computed
+        on public values: the name of an input or the source code line of an
+        operation
+    """
+
+    reveals: List[str]
+    secret_operations: int
+    counts: Dict[str, int]
+    inputs: List[str]
+    public_operations: int = 0
+    saved: Dict[str, int] = field(default_factory=dict)
+    reveal_points: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RevealCombination:
+    """Reveals only combined by public additions and subtractions.
+
+    Attributes
+    ----------
+    source: str
+        The source code line of the operation combining the reveals
+    reveals: List[str]
+        The source code lines of the reveals
+    """
+
+    source: str
+    reveals: List[str]
+
+
+@dataclass
+class RevealReport:
+    """Secret flow analysis of the reveals of a program."""
+
+    findings: List[RevealFinding] = field(default_factory=list)
+    combinations: List[RevealCombination] = field(default_factory=list)
+
+
+def is_reveal(operation: proto_op.Operation) -> bool:
+    """Returns True if the operation reveals a secret value."""
+    return (
+        operation_kind(operation) == "unary"
+        and operation.unary.variant == proto_op.UnaryOperationVariant.REVEAL
+    )
+
+
+class RevealAnalysis:
+    """Finds the secret operations of a program that are only revealed.
+
+    Only the operations of the program are analyzed, the operations used by a
+    function are never considered as only revealed. Every operation is visited a
+    constant number of times, so the analysis is linear in the size of the MIR.
+    """
+
+    def __init__(self, mir: proto_mir.ProgramMir, policy: RevealPolicy):
+        self.policy = policy
+        self.estimator = CostEstimator(mir, DEFAULT_WEIGHTS)
+        self.operations = self.estimator.operations
+        self.order = self.postorder(mir)
+        self.users: Dict[int, List[int]] = {op_id: [] for op_id in self.order}
+        for op_id in self.order:
+            for child in operation_children(self.operations[op_id]):
+                self.users[child].append(op_id)
+        self.escaping = {output.operation_id for output in mir.outputs}
+        for function in mir.functions:
+            self.escaping.update(
+                entry.id for entry in function.operations if entry.id in self.users
+            )
+        self.function_revealable: Dict[int, bool] = {}
+
+    def postorder(self, mir: proto_mir.ProgramMir) -> List[int]:
+        """Returns the operations used by the outputs, operands first."""
+        order = []
+        visited = set()
+        stack = [(output.operation_id, False) for output in mir.outputs]
+        while len(stack) > 0:
+            op_id, children_done = stack.pop()
+            if children_done:
+                order.append(op_id)
+                continue
+            if op_id in visited:
+                continue
+            visited.add(op_id)
+            stack.append((op_id, True))
+            stack.extend(
+                (child, False)
+                for child in operation_children(self.operations[op_id])
+                if child not in visited
+            )
+        return order
+
+    def find_only_revealed(self) -> Set[int]:
+        """Returns the secret operations whose results are only revealed."""
+        only_revealed: Set[int] = set()
+        for op_id in reversed(self.order):
+            operation = self.operations[op_id]
+            if (
+                op_id in self.escaping
+                or not is_secret(operation.type)
+                or operation_kind(operation) in ("input_ref", "random")
+                or len(self.users[op_id]) == 0
+            ):
+                continue
+            if all(
+                is_reveal(self.operations[user]) or user in only_revealed
+                for user in self.users[op_id]
+            ):
+                only_revealed.add(op_id)
+        return only_revealed
+
+    def is_input_revealable(self, operation: proto_op.Operation) -> bool:
+        """Returns True if an input or random operation may be revealed."""
+        if not is_secret(operation.type):
+            return True
+        if operation_kind(operation) == "input_ref":
+            return operation.input_ref.refers_to in self.policy.revealable_inputs
+        return False
+
+    def is_function_revealable(self, function_id: int) -> bool:
+        """Returns True if the secret values used by the body of a function, apart
+        from its arguments, may be revealed."""
+        if function_id not in self.function_revealable:
+            revealable = True
+            for entry in self.estimator.functions[function_id].operations:
+                kind = operation_kind(entry.operation)
+                if kind in ("input_ref", "random"):
+                    revealable = revealable and self.is_input_revealable(
+                        entry.operation
+                    )
+                elif kind in ("map", "reduce"):
+                    function = getattr(entry.operation, kind).fn
+                    revealable = revealable and self.is_function_revealable(function)
+            self.function_revealable[function_id] = revealable
+        return self.function_revealable[function_id]
+
+    def is_computable(self, operation: proto_op.Operation) -> bool:
+        """Returns True if the function called by an operation, if any, only uses
+        secret values that may be revealed."""
+        kind = operation_kind(operation)
+        if kind in ("map", "reduce"):
+            return self.is_function_revealable(getattr(operation, kind).fn)
+        return True
+
+    def find_revealable(self) -> Set[int]:
+        """Returns the operations whose values may be revealed under the policy."""
+        revealable: Set[int] = set()
+        for op_id in self.order:
+            operation = self.operations[op_id]
+            if operation_kind(operation) in ("input_ref", "random"):
+                if self.is_input_revealable(operation):
+                    revealable.add(op_id)
+            elif self.is_computable(operation) and all(
+                child in revealable for child in operation_children(operation)
+            ):
+                revealable.add(op_id)
+        return revealable
+
+    def secret_inputs(self, region: Set[int]) -> List[str]:
+        """Returns the names of the secret inputs some operations depend on."""
+        inputs = set()
+        visited = set()
+        stack = list(region)
+        while len(stack) > 0:
+            op_id = stack.pop()
+            if op_id in visited:
+                continue
+            visited.add(op_id)
+            operation = self.operations[op_id]
+            if operation_kind(operation) == "input_ref" and is_secret(operation.type):
+                inputs.add(operation.input_ref.refers_to)
+            stack.extend(operation_children(operation))
+        return sorted(inputs)
+
+    def finding(
+        self, reveals: List[int], region: Set[int], revealable: Set[int]
+    ) -> RevealFinding:
+        """Returns the finding of some reveals and of the secret operations that are
+        only revealed by them, given the operations that may be revealed."""
+        counts: Counter = Counter()
+        saved: Counter = Counter()
+        public: Set[int] = set()
+        points: Set[int] = set()
+        for op_id in self.order:
+            if op_id not in region:
+                continue
+            operation = self.operations[op_id]
+            self.estimator.count_operation(operation, counts, Counter())
+            secret_children = [
+                child
+                for child in operation_children(operation)
+                if is_secret(self.operations[child].type)
+            ]
+            if self.is_computable(operation) and all(
+                child in public or child in revealable for child in secret_children
+            ):
+                public.add(op_id)
+                self.estimator.count_operation(operation, saved, Counter())
+                points.update(child for child in secret_children if child not in public)
+        return RevealFinding(
+            reveals=[self.source(op_id) for op_id in sorted(reveals)],
+            secret_operations=len(region),
+            counts=dict(counts),
+            inputs=self.secret_inputs(region),
+            public_operations=len(public),
+            saved=dict(saved),
+            reveal_points=[self.describe(op_id) for op_id in sorted(points)],
+        )
+
+    def findings(self) -> List[RevealFinding]:
+        """Groups the operations that are only revealed, with the reveals they
+        reach, and returns a finding for every group."""
+        only_revealed = self.find_only_revealed()
+        revealable = self.find_revealable()
+        parents: Dict[int, int] = {}
+
+        def find(op_id: int) -> int:
+            while parents.setdefault(op_id, op_id) != op_id:
+                parents[op_id] = parents[parents[op_id]]
+                op_id = parents[op_id]
+            return op_id
+
+        for op_id in only_revealed:
+            for user in self.users[op_id]:
+                parents[find(user)] = find(op_id)
+        groups: Dict[int, List[int]] = {}
+        for op_id in self.order:
+            if op_id in only_revealed or (
+                is_reveal(self.operations[op_id])
+                and self.operations[op_id].unary.this in only_revealed
+            ):
+                groups.setdefault(find(op_id), []).append(op_id)
+        findings = []
+        for members in groups.values():
+            region = {op_id for op_id in members if op_id in only_revealed}
+            reveals = [op_id for op_id in members if op_id not in region]
+            findings.append(self.finding(reveals, region, revealable))
+        return findings
+
+    def combinations(self) -> List[RevealCombination]:
+        """Returns the largest trees of public additions and subtractions whose
+        leaves are reveals used only by the tree."""
+        leaves: Dict[int, List[int]] = {}
+        for op_id in self.order:
+            operation = self.operations[op_id]
+            if (
+                operation_kind(operation) != "binary"
+                or operation.binary.variant not in LINEAR_VARIANTS
+                or is_secret(operation.type)
+            ):
+                continue
+            reveals = []
+            for child in operation_children(operation):
+                if len(self.users[child]) > 1 or child in self.escaping:
+                    reveals = []
+                    break
+                if is_reveal(self.operations[child]):
+                    reveals.append(child)
+                elif child in leaves:
+                    reveals.extend(leaves.pop(child))
+                else:
+                    reveals = []
+                    break
+            if len(reveals) > 0:
+                leaves[op_id] = reveals
+        return [
+            RevealCombination(
+                self.source(op_id), [self.source(reveal) for reveal in sorted(reveals)]
+            )
+            for op_id, reveals in leaves.items()
+            if len(reveals) > 1
+        ]
+
+    def describe(self, op_id: int) -> str:
+        """Returns the name of an input, or the source code line of any other
+        operation."""
+        operation = self.operations[op_id]
+        if operation_kind(operation) == "input_ref":
+            return f"input {operation.input_ref.refers_to}"
+        return self.source(op_id)
+
+    def source(self, op_id: int) -> str:
+        """Returns the source code line of an operation."""
+        return source_location(
+            self.estimator.mir, self.operations[op_id].source_ref_index
+        )
+
+
+@add_timer(timer_name="nada_dsl.cost.analyze_reveals")
+def analyze_reveals(
+    mir: proto_mir.ProgramMir, policy: Optional[RevealPolicy] = None
+) -> RevealReport:
+    """Finds the secret operations of a compiled program whose results are only
+    revealed, and the reveals that could be combined before revealing.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+    policy: Optional[RevealPolicy]
+        The secret values that may be revealed earlier. By default, none
+
+    Returns
+    -------
+    RevealReport
+        The secret operations that are only revealed, with the values to reveal
+        instead under the policy, and the reveals that could be combined
+    """
+    analysis = RevealAnalysis(mir, policy or RevealPolicy())
+    return RevealReport(analysis.findings(), analysis.combinations())
+
+
+def format_reveal_report(report: RevealReport) -> str:
+    """Formats the findings of a secret flow analysis as text."""
+    lines = []
+    for finding in report.findings:
+        counts = ", ".join(
+            f"{count} {kind}" for kind, count in sorted(finding.counts.items())
+        )
+        lines.append(
+            f"{finding.secret_operations} secret operations only revealed"
+            + (f" ({counts})" if counts else "")
+            + f", depending on secret inputs {', '.join(finding.inputs) or '-'}"
+        )
+        lines.extend(f"  revealed at {reveal}" for reveal in finding.reveals)
+        if finding.public_operations > 0:
+            saved = ", ".join(
+                f"{count} {kind}" for kind, count in sorted(finding.saved.items())
+            )
+            lines.append(
+                f"  {finding.public_operations} operations can be computed on public"
+                + " values"
+                + (f" ({saved})" if saved else "")
+                + " by revealing instead:"
+            )
+            lines.extend(f"    {point}" for point in finding.reveal_points)
+        else:
+            lines.append("  no earlier reveal is allowed by the policy")
+    for combination in report.combinations:
+        lines.append(
+            f"{len(combination.reveals)} reveals combined at {combination.source}"
+            + " could be combined before revealing:"
+        )
+        lines.extend(f"  {reveal}" for reveal in combination.reveals)
+    if len(lines) == 0:
+        return "no secret operation is only revealed"
+    return "\n".join(lines)
@@ -0,0 +1,266 @@
+"""
+Disassembler of compiled programs (MIR).
+
+Prints the MIR in a human-readable format, one operation per line:
+
+    python -m nada_dsl.disassemble program.nada.bin
+    python -m nada_dsl.disassemble program.nada.bin --output result --range 10:50
+
+The operation and type variants are found with `betterproto.which_one_of` and the
+text is written into a stream, so large programs are disassembled quickly. The
+operations can be filtered by output (the operations and functions the output
+depends on), by function, and by range of operation identifiers.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, TextIO
+
+import betterproto
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+from nada_mir_proto.nillion.nada.types import v1 as proto_ty
+
+from nada_dsl.mir_util import operation_children
+from nada_dsl.timer import add_timer
+
+
+class PrintMirException(Exception):
+    """Generic exception for printing MIR"""
+
+
+# Names of the scalar types, by type variant
+SCALAR_TYPE_NAMES: Dict[str, str] = {
+    "integer": "Integer",
+    "unsigned_integer": "UnsignedInteger",
+    "boolean": "Boolean",
+    "secret_integer": "SecretInteger",
+    "secret_unsigned_integer": "SecretUnsignedInteger",
+    "secret_boolean": "SecretBoolean",
+    "ecdsa_private_key": "EcdsaPrivateKey",
+    "ecdsa_public_key": "EcdsaPublicKey",
+    "ecdsa_digest_message": "EcdsaDigestMessage",
+    "ecdsa_signature": "EcdsaSignature",
+    "eddsa_private_key": "EddsaPrivateKey",
+    "eddsa_public_key": "EddsaPublicKey",
+    "eddsa_message": "EddsaMessage",
+    "eddsa_signature": "EddsaSignature",
+}
+
+# Formatters of the compound types, by type variant
+COMPOUND_TYPE_FORMATS: Dict[str, Callable] = {
+    "array": lambda value: f"Array[{type_to_str(value.contained_type)}:{value.size}]",
+    "tuple": lambda value: (
+        f"Tuple[{type_to_str(value.left)}, {type_to_str(value.right)}]"
+    ),
+    "ntuple": lambda value: (
+        f"NTuple[{', '.join(type_to_str(ty) for ty in value.fields)}]"
+    ),
+    "object": lambda value: (
+        "Object["
+        + ", ".join(
+            f"{entry.name}: {type_to_str(entry.type)}" for entry in value.fields
+        )
+        + "]"
+    ),
+}
+
+# Formatters of the operations, by operation variant
+OPERATION_FORMATS: Dict[str, Callable] = {
+    "binary": lambda value: (
+        f"{value.variant.name} oid({value.left}) oid({value.right})"
+    ),
+    "unary": lambda value: f"{value.variant.name} oid({value.this})",
+    "ifelse": lambda value: (
+        f"ifelse cond({value.cond}) true({value.first}) false({value.second})"
+    ),
+    "random": lambda value: "random",
+    "input_ref": lambda value: f"input_ref to({value.refers_to})",
+    "literal_ref": lambda value: f"literal_ref to({value.refers_to})",
+    "arg_ref": lambda value: (
+        f"arg_ref fn_id({value.function_id}) to({value.refers_to})"
+    ),
+    "map": lambda value: f"map fn({value.fn}) oid({value.child})",
+    "reduce": lambda value: (
+        f"reduce fn({value.fn}) init({value.initial}) oid({value.child})"
+    ),
+    "new": lambda value: (
+        "new " + ", ".join(f"oid({element})" for element in value.elements)
+    ),
+    "array_accessor": lambda value: f"array_accessor oid({value.source}) {value.index}",
+    "tuple_accessor": lambda value: f"tuple_accessor oid({value.source}) {value.index}",
+    "ntuple_accessor": lambda value: (
+        f"ntuple_accessor oid({value.source}) {value.index}"
+    ),
+    "object_accessor": lambda value: f"object_accessor oid({value.source}) {value.key}",
+    "cast": lambda value: f"cast oid({value.target}) to({type_to_str(value.cast_to)})",
+}
+
+
+def type_to_str(ty: proto_ty.NadaType) -> str:
+    """Converts a Nada type to a string."""
+    kind, value = betterproto.which_one_of(ty, "nada_type")
+    if kind in SCALAR_TYPE_NAMES:
+        return SCALAR_TYPE_NAMES[kind]
+    if kind in COMPOUND_TYPE_FORMATS:
+        return COMPOUND_TYPE_FORMATS[kind](value)
+    raise PrintMirException(f"Unknown type {ty}")
+
+
+def operation_to_str(op_id: int, operation: proto_op.Operation) -> str:
+    """Converts an operation to a line of text."""
+    kind, value = betterproto.which_one_of(operation, "operation")
+    if kind not in OPERATION_FORMATS:
+        raise PrintMirException(f"Unknown operation {operation}")
+    return f"oid({op_id}) rty({type_to_str(operation.type)}) = " + OPERATION_FORMATS[
+        kind
+    ](value)
+
+
+@dataclass
+class DisassemblyFilter:
+    """Selection of the parts of a program to disassemble.
+
+    Attributes
+    ----------
+    outputs: List[str]
+        The names of the outputs whose operations, and the functions they call, are
+        disassembled. All the outputs if empty
+    functions: List[str]
+        The names or identifiers of the functions that are disassembled, without the
+        operations of the program. All the functions if empty
+    first: Optional[int]
+        The smallest identifier of the disassembled operations
+    last: Optional[int]
+        The largest identifier of the disassembled operations
+    """
+
+    outputs: List[str] = field(default_factory=list)
+    functions: List[str] = field(default_factory=list)
+    first: Optional[int] = None
+    last: Optional[int] = None
+
+    def in_range(self, op_id: int) -> bool:
+        """Returns True if an operation identifier is in the selected range."""
+        return (self.first is None or op_id >= self.first) and (
+            self.last is None or op_id <= self.last
+        )
+
+
+def called_functions(
+    operations: Iterable[proto_op.Operation],
+    functions: Dict[int, proto_mir.NadaFunction],
+) -> Set[int]:
+    """Returns the identifiers of the functions called by some operations, directly
+    or through other functions."""
+    called: Set[int] = set()
+    stack = list(operations)
+    while len(stack) > 0:
+        kind, value = betterproto.which_one_of(stack.pop(), "operation")
+        if kind in ("map", "reduce") and value.fn not in called:
+            called.add(value.fn)
+            stack.extend(entry.operation for entry in functions[value.fn].operations)
+    return called
+
+
+def output_operations(mir: proto_mir.ProgramMir, outputs: List[str]) -> Set[int]:
+    """Returns the identifiers of the operations of the program used by some
+    outputs."""
+    operations = {entry.id: entry.operation for entry in mir.operations}
+    selected: Set[int] = set()
+    stack = [output.operation_id for output in mir.outputs if output.name in outputs]
+    while len(stack) > 0:
+        op_id = stack.pop()
+        if op_id in selected or op_id not in operations:
+            continue
+        selected.add(op_id)
+        stack.extend(operation_children(operations[op_id]))
+    return selected
+
+
+def write_operations(
+    stream: TextIO,
+    entries: Iterable[proto_mir.OperationMapEntry],
+    selection: DisassemblyFilter,
+    selected: Optional[Set[int]] = None,
+):
+    """Writes the selected operations into a stream, one per line."""
+    stream.write("\n")
+    for entry in entries:
+        if selection.in_range(entry.id) and (selected is None or entry.id in selected):
+            stream.write(operation_to_str(entry.id, entry.operation))
+            stream.write("\n")
+
+
+@add_timer(timer_name="nada_dsl.disassemble.disassemble")
+def disassemble(
+    mir: proto_mir.ProgramMir,
+    stream: TextIO,
+    selection: Optional[DisassemblyFilter] = None,
+):
+    """Writes a compiled program into a stream in a human-readable format.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+    stream: TextIO
+        The stream where the text is written
+    selection: Optional[DisassemblyFilter]
+        The parts of the program to disassemble. The whole program by default
+    """
+    selection = selection or DisassemblyFilter()
+    functions = {function.id: function for function in mir.functions}
+    selected_operations = None
+    selected_functions = set(functions)
+    outputs = list(mir.outputs)
+    if len(selection.outputs) > 0:
+        selected_operations = output_operations(mir, selection.outputs)
+        selected_functions = called_functions(
+            (
+                entry.operation
+                for entry in mir.operations
+                if entry.id in selected_operations
+            ),
+            functions,
+        )
+        outputs = [output for output in outputs if output.name in selection.outputs]
+    if len(selection.functions) > 0:
+        selected_operations = set()
+        selected_functions &= {
+            function.id
+            for function in mir.functions
+            if function.name in selection.functions
+            or str(function.id) in selection.functions
+        }
+
+    stream.write("Parties:\n")
+    for party in mir.parties:
+        stream.write(f"  {party.name}\n")
+    stream.write("Inputs:\n")
+    for mir_input in mir.inputs:
+        stream.write(
+            f"  {mir_input.name} ty({type_to_str(mir_input.type)})"
+            f" party({mir_input.party})\n"
+        )
+    stream.write("Literals:\n")
+    for literal in mir.literals:
+        stream.write(
+            f"  {literal.name} ty({type_to_str(literal.type)}) val({literal.value})\n"
+        )
+    stream.write("Outputs:\n")
+    for output in outputs:
+        stream.write(
+            f"  {output.name} ty({type_to_str(output.type)})"
+            f" oid({output.operation_id})\n"
+        )
+    stream.write("Functions:\n")
+    for function in mir.functions:
+        if function.id not in selected_functions:
+            continue
+        args = ", ".join(
+            f"{arg.name}: ty({type_to_str(arg.type)})" for arg in function.args
+        )
+        stream.write(f"  {function.name} fn_id({function.id}), args({args})\n")
+        write_operations(stream, function.operations, selection)
+    stream.write("Operations:\n")
+    write_operations(stream, mir.operations, selection, selected_operations)
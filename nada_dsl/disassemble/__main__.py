@@ -0,0 +1,58 @@
+"""Execute the command line interface entry point."""
+
+import argparse
+import sys
+
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+
+from nada_dsl.disassemble import DisassemblyFilter, disassemble
+
+
+def parse_range(text: str) -> DisassemblyFilter:
+    """Parses a range of operation identifiers, `FIRST:LAST` where both bounds are
+    included and optional."""
+    first, _, last = text.partition(":")
+    return DisassemblyFilter(
+        first=int(first) if first else None, last=int(last) if last else None
+    )
+
+
+def _main():
+    parser = argparse.ArgumentParser(
+        prog="python -m nada_dsl.disassemble",
+        description="Prints a compiled Nada program (MIR) in a human-readable format.",
+    )
+    parser.add_argument("path", help="compiled program (MIR) path")
+    parser.add_argument(
+        "--output",
+        action="append",
+        default=[],
+        help="only print the operations and functions used by this output",
+    )
+    parser.add_argument(
+        "--function",
+        action="append",
+        default=[],
+        help="only print this function (name or identifier)",
+    )
+    parser.add_argument(
+        "--range",
+        type=parse_range,
+        default=DisassemblyFilter(),
+        help="only print the operations with identifiers in FIRST:LAST",
+    )
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as mir_file:
+        mir = proto_mir.ProgramMir().parse(mir_file.read())
+    selection = DisassemblyFilter(
+        args.output, args.function, args.range.first, args.range.last
+    )
+    # A large buffer avoids flushing the standard output on every line.
+    with open(
+        sys.stdout.fileno(), "w", encoding="UTF-8", buffering=1 << 20, closefd=False
+    ) as stream:
+        disassemble(mir, stream, selection)
+
+
+_main()
@@ -21,3 +21,37 @@ class MissingEntryPointError(Exception):
 
 class IncompatibleTypesError(Exception):
     """The types in an operation are not compatible."""
+
+
+class InvalidOptimizationLevelError(Exception):
+    """The optimization level is not one of the supported levels."""
+
+
+class InvalidBudgetError(Exception):
+    """The cost budget of a program is not valid."""
+
+
+class InvalidMirError(Exception):
+    """A serialized MIR is not valid."""
+
+
+class BudgetExceededError(Exception):
+    """The cost of a program exceeds its budget."""
+
+    def __init__(self, violations):
+        self.violations = violations
+        super().__init__(
+            "the program exceeds its cost budget\n"
+            + "\n".join(str(violation) for violation in violations)
+        )
+
+
+class MirValidationError(InvalidMirError):
+    """A compiled program does not have a valid structure."""
+
+    def __init__(self, violations):
+        self.violations = violations
+        super().__init__(
+            "the compiled program is not valid\n"
+            + "\n".join(str(violation) for violation in violations)
+        )
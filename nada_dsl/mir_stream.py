@@ -0,0 +1,272 @@
+"""
+MIR streaming utilities.
+
+A `ProgramMir` is a protobuf message made of repeated fields only (operations,
+functions, parties, inputs, literals, outputs, source files and source references).
+Protobuf allows the elements of a repeated field to arrive interleaved with the
+elements of other fields, so a program can be serialized one element at a time
+while it is being generated instead of building the complete message first.
+Likewise, a serialized program can be read one element at a time.
+"""
+
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional
+
+import betterproto
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+
+from nada_dsl.errors import InvalidMirError
+
+
+def _field_tag(field_name: str) -> bytes:
+    """Returns the encoded tag of a length-delimited `ProgramMir` field."""
+    # pylint: disable=protected-access,no-member
+    number = proto_mir.ProgramMir._betterproto.meta_by_field_name[field_name].number
+    return betterproto.encode_varint((number << 3) | betterproto.WIRE_LEN_DELIM)
+
+
+def _field_names() -> Dict[int, str]:
+    """Returns the names of the `ProgramMir` fields, by field number."""
+    # pylint: disable=protected-access,no-member
+    metas = proto_mir.ProgramMir._betterproto.meta_by_field_name
+    return {meta.number: name for name, meta in metas.items()}
+
+
+FIELD_NAMES = _field_names()
+
+FUNCTIONS_TAG = _field_tag("functions")
+PARTIES_TAG = _field_tag("parties")
+INPUTS_TAG = _field_tag("inputs")
+LITERALS_TAG = _field_tag("literals")
+OUTPUTS_TAG = _field_tag("outputs")
+OPERATIONS_TAG = _field_tag("operations")
+SOURCE_FILES_TAG = _field_tag("source_files")
+SOURCE_REFS_TAG = _field_tag("source_refs")
+
+# Tags of the key and value fields of a protobuf map entry
+MAP_KEY_TAG = betterproto.encode_varint((1 << 3) | betterproto.WIRE_LEN_DELIM)
+MAP_VALUE_TAG = betterproto.encode_varint((2 << 3) | betterproto.WIRE_LEN_DELIM)
+
+
+class MirSink(ABC):
+    """Destination of the elements of a program MIR.
+
+    The compiler frontend emits every element of the program through a sink,
+    which decides whether the element is kept in memory or serialized straight away.
+    """
+
+    @abstractmethod
+    def write_operation(self, entry: proto_mir.OperationMapEntry):
+        """Writes an operation of the program."""
+
+    @abstractmethod
+    def write_function(self, function: proto_mir.NadaFunction):
+        """Writes a function of the program."""
+
+    @abstractmethod
+    def write_party(self, party: proto_mir.Party):
+        """Writes a party of the program."""
+
+    @abstractmethod
+    def write_input(self, mir_input: proto_mir.Input):
+        """Writes an input of the program."""
+
+    @abstractmethod
+    def write_literal(self, literal: proto_mir.Literal):
+        """Writes a literal of the program."""
+
+    @abstractmethod
+    def write_output(self, output: proto_mir.Output):
+        """Writes an output of the program."""
+
+    @abstractmethod
+    def write_source_file(self, name: str, source: str):
+        """Writes the content of a source file used by the program."""
+
+    @abstractmethod
+    def write_source_ref(self, source_ref: proto_mir.SourceRef):
+        """Writes a source reference. Source references are indexed in writing order."""
+
+
+class MirBuilder(MirSink):
+    """Sink that builds the program MIR in memory."""
+
+    mir: proto_mir.ProgramMir
+
+    def __init__(self):
+        self.mir = proto_mir.ProgramMir()
+
+    def write_operation(self, entry: proto_mir.OperationMapEntry):
+        self.mir.operations.append(entry)
+
+    def write_function(self, function: proto_mir.NadaFunction):
+        self.mir.functions.append(function)
+
+    def write_party(self, party: proto_mir.Party):
+        self.mir.parties.append(party)
+
+    def write_input(self, mir_input: proto_mir.Input):
+        self.mir.inputs.append(mir_input)
+
+    def write_literal(self, literal: proto_mir.Literal):
+        self.mir.literals.append(literal)
+
+    def write_output(self, output: proto_mir.Output):
+        self.mir.outputs.append(output)
+
+    def write_source_file(self, name: str, source: str):
+        self.mir.source_files[name] = source
+
+    def write_source_ref(self, source_ref: proto_mir.SourceRef):
+        self.mir.source_refs.append(source_ref)
+
+
+class MirWriter(MirSink):
+    """Sink that serializes every element into a binary stream as soon as it is written.
+
+    Only the element being written is kept in memory. The resulting bytes
+    can be parsed as a regular `ProgramMir`.
+    """
+
+    stream: BinaryIO
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+
+    def _write_field(self, tag: bytes, payload: bytes):
+        self.stream.write(tag)
+        self.stream.write(betterproto.encode_varint(len(payload)))
+        self.stream.write(payload)
+
+    def write_operation(self, entry: proto_mir.OperationMapEntry):
+        self._write_field(OPERATIONS_TAG, bytes(entry))
+
+    def write_function(self, function: proto_mir.NadaFunction):
+        self._write_field(FUNCTIONS_TAG, bytes(function))
+
+    def write_party(self, party: proto_mir.Party):
+        self._write_field(PARTIES_TAG, bytes(party))
+
+    def write_input(self, mir_input: proto_mir.Input):
+        self._write_field(INPUTS_TAG, bytes(mir_input))
+
+    def write_literal(self, literal: proto_mir.Literal):
+        self._write_field(LITERALS_TAG, bytes(literal))
+
+    def write_output(self, output: proto_mir.Output):
+        self._write_field(OUTPUTS_TAG, bytes(output))
+
+    def write_source_file(self, name: str, source: str):
+        key = name.encode("UTF-8")
+        value = source.encode("UTF-8")
+        entry = b"".join(
+            [
+                MAP_KEY_TAG,
+                betterproto.encode_varint(len(key)),
+                key,
+                MAP_VALUE_TAG,
+                betterproto.encode_varint(len(value)),
+                value,
+            ]
+        )
+        self._write_field(SOURCE_FILES_TAG, entry)
+
+    def write_source_ref(self, source_ref: proto_mir.SourceRef):
+        self._write_field(SOURCE_REFS_TAG, bytes(source_ref))
+
+
+class MirElement(NamedTuple):
+    """An element of a serialized program MIR.
+
+    Attributes
+    ----------
+    field: str
+        The name of the `ProgramMir` field of the element, e.g. `operations`
+    payload: bytes
+        The serialized element
+    size: int
+        The number of bytes of the element in the MIR, including its tag and length
+    """
+
+    field: str
+    payload: bytes
+    size: int
+
+
+def read_varint(stream: BinaryIO) -> Optional[int]:
+    """Reads a varint from a binary stream, None at the end of the stream."""
+    result = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if len(byte) == 0:
+            if shift == 0:
+                return None
+            raise InvalidMirError("truncated varint")
+        result |= (byte[0] & 0x7F) << shift
+        if byte[0] & 0x80 == 0:
+            return result
+        shift += 7
+
+
+def read_elements(stream: BinaryIO) -> Iterator[MirElement]:
+    """Reads the elements of a serialized program MIR from a binary stream, one at a
+    time, without parsing them.
+
+    Only the element being read is kept in memory, so even very large programs can be
+    inspected.
+    """
+    while True:
+        key = read_varint(stream)
+        if key is None:
+            return
+        number, wire_type = key >> 3, key & 0x7
+        if number not in FIELD_NAMES or wire_type != betterproto.WIRE_LEN_DELIM:
+            raise InvalidMirError(f"unexpected field {number} in the MIR")
+        length = read_varint(stream)
+        if length is None:
+            raise InvalidMirError("truncated MIR")
+        payload = stream.read(length)
+        if len(payload) != length:
+            raise InvalidMirError("truncated MIR")
+        size = (
+            len(betterproto.encode_varint(key))
+            + len(betterproto.encode_varint(length))
+            + length
+        )
+        yield MirElement(FIELD_NAMES[number], payload, size)
+
+
+def replay_elements(stream: BinaryIO, sink: MirSink) -> int:
+    """Reads the elements of a serialized program MIR from a binary stream, one at a
+    time, and writes them into a sink.
+
+    Replaying into a `MirBuilder` parses a MIR without holding its serialized form
+    in memory as a whole.
+
+    Returns the size of the MIR in bytes.
+    """
+    size = 0
+    for element in read_elements(stream):
+        size += element.size
+        if element.field == "operations":
+            sink.write_operation(proto_mir.OperationMapEntry().parse(element.payload))
+        elif element.field == "functions":
+            sink.write_function(proto_mir.NadaFunction().parse(element.payload))
+        elif element.field == "parties":
+            sink.write_party(proto_mir.Party().parse(element.payload))
+        elif element.field == "inputs":
+            sink.write_input(proto_mir.Input().parse(element.payload))
+        elif element.field == "literals":
+            sink.write_literal(proto_mir.Literal().parse(element.payload))
+        elif element.field == "outputs":
+            sink.write_output(proto_mir.Output().parse(element.payload))
+        elif element.field == "source_files":
+            entry = {
+                parsed.number: parsed.value.decode("UTF-8")
+                for parsed in betterproto.parse_fields(element.payload)
+            }
+            sink.write_source_file(entry.get(1, ""), entry.get(2, ""))
+        elif element.field == "source_refs":
+            sink.write_source_ref(proto_mir.SourceRef().parse(element.payload))
+    return size
@@ -0,0 +1,100 @@
+"""MIR utilities.
+
+Helpers to inspect a compiled program (`ProgramMir`) without going back to the AST.
+"""
+
+from typing import Dict, List
+
+import betterproto
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+from nada_mir_proto.nillion.nada.types import v1 as proto_ty
+
+# Scalar types whose values are secret shared
+SECRET_TYPES = ("secret_integer", "secret_unsigned_integer", "secret_boolean")
+
+
+def operation_kind(operation: proto_op.Operation) -> str:
+    """Returns the name of the variant of an operation, e.g. `binary` or `map`."""
+    return betterproto.which_one_of(operation, "operation")[0]
+
+
+def type_kind(ty: proto_ty.NadaType) -> str:
+    """Returns the name of the variant of a type, e.g. `secret_integer` or `array`."""
+    return betterproto.which_one_of(ty, "nada_type")[0]
+
+
+def is_secret(ty: proto_ty.NadaType) -> bool:
+    """Returns True if the type is a secret scalar or an array of secret scalars."""
+    kind = type_kind(ty)
+    if kind == "array":
+        return is_secret(ty.array.contained_type)
+    return kind in SECRET_TYPES
+
+
+def array_size(ty: proto_ty.NadaType) -> int:
+    """Returns the size of an array type, 0 for any other type."""
+    if type_kind(ty) == "array":
+        return ty.array.size
+    return 0
+
+
+# pylint: disable=too-many-return-statements
+def operation_children(operation: proto_op.Operation) -> List[int]:
+    """Returns the identifiers of the operands of an operation."""
+    kind, value = betterproto.which_one_of(operation, "operation")
+    if kind == "binary":
+        return [value.left, value.right]
+    if kind == "unary":
+        return [value.this]
+    if kind == "ifelse":
+        return [value.cond, value.first, value.second]
+    if kind == "map":
+        return [value.child]
+    if kind == "reduce":
+        return [value.child, value.initial]
+    if kind == "new":
+        return list(value.elements)
+    if kind == "cast":
+        return [value.target]
+    if kind in (
+        "array_accessor",
+        "tuple_accessor",
+        "ntuple_accessor",
+        "object_accessor",
+    ):
+        return [value.source]
+    return []
+
+
+def operations_by_id(mir: proto_mir.ProgramMir) -> Dict[int, proto_op.Operation]:
+    """Returns all the operations of a program, including the operations in the body
+    of its functions, by identifier."""
+    operations = {entry.id: entry.operation for entry in mir.operations}
+    for function in mir.functions:
+        for entry in function.operations:
+            operations[entry.id] = entry.operation
+    return operations
+
+
+def operation_name(operation: proto_op.Operation) -> str:
+    """Returns a short description of an operation, with its variant for binary and
+    unary operations, e.g. `binary MULTIPLICATION`."""
+    kind, value = betterproto.which_one_of(operation, "operation")
+    if kind in ("binary", "unary"):
+        return f"{kind} {value.variant.name}"
+    return kind
+
+
+def source_location(mir: proto_mir.ProgramMir, source_ref_index: int) -> str:
+    """Returns the location of a source reference, followed by the source code it
+    refers to when the source file is part of the MIR, e.g. `program.py:4: a * b`."""
+    if source_ref_index >= len(mir.source_refs):
+        return "<unknown>"
+    source_ref = mir.source_refs[source_ref_index]
+    location = f"{source_ref.file}:{source_ref.lineno}"
+    source = mir.source_files.get(source_ref.file)
+    if source is None or source_ref.length == 0:
+        return location
+    code = source[source_ref.offset : source_ref.offset + source_ref.length].strip()
+    return f"{location}: {code}"
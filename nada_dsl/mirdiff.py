@@ -0,0 +1,498 @@
+"""
+Semantic difference between two compiled programs (MIR).
+
+Operation identifiers change on any edit of a program, so the operations of the two
+programs are aligned structurally instead: every operation gets a hash of its
+variant, its type and the hashes of its operands, inputs are identified by name,
+literals by value, and functions by the hash of their body. Identical subgraphs have
+the same hash in both programs, whatever their identifiers. Every operation is
+hashed once, so the comparison is linear in the size of the programs. The hashes
+do not depend on the hash seed of Python, so the printed digests are reproducible.
+
+Outputs and inputs are matched by name. Functions are matched by name and source
+location, then by position among the remaining functions with the same name, since
+several functions can have the same name, e.g. `<lambda>`. For every output, the secret
+operations that are added or removed, and the changes of round depth, number of
+operations and cost are reported:
+
+    python -m nada_dsl.mirdiff old.nada.bin new.nada.bin
+    python -m nada_dsl.mirdiff old.nada.bin new.nada.bin --check
+
+With `--check`, the exit status is 1 when the cost or the round depth of an output
+increases, to catch performance regressions in continuous integration.
+"""
+
+import argparse
+import hashlib
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import betterproto
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.cost.depth import analyze_depth
+from nada_dsl.cost.estimate import DEFAULT_WEIGHTS, CostEstimator, weighted_cost
+from nada_dsl.disassemble import type_to_str
+from nada_dsl.mir_util import is_secret, operation_children, operation_name
+from nada_dsl.timer import add_timer
+
+# Operations that refer to values instead of computing them
+REFERENCE_KINDS = ("input_ref", "literal_ref", "arg_ref")
+
+
+def structural_hash(key: Tuple) -> bytes:
+    """Returns the hash of the structure of an operation or a function."""
+    return hashlib.blake2b(repr(key).encode("UTF-8"), digest_size=16).digest()
+
+
+class StructuralHasher:
+    """Computes the structural hashes of the operations of a program."""
+
+    def __init__(self, mir: proto_mir.ProgramMir):
+        self.literals = {literal.name: literal for literal in mir.literals}
+        self.functions: Dict[int, proto_mir.NadaFunction] = {
+            function.id: function for function in mir.functions
+        }
+        self.function_hashes: Dict[int, bytes] = {}
+
+    def function_hash(self, function_id: int) -> bytes:
+        """Returns the structural hash of a function."""
+        if function_id not in self.function_hashes:
+            function = self.functions[function_id]
+            operations = {entry.id: entry.operation for entry in function.operations}
+            hashes = self.operation_hashes(operations, [function.return_operation_id])
+            self.function_hashes[function_id] = structural_hash(
+                (
+                    tuple(type_to_str(arg.type) for arg in function.args),
+                    hashes[function.return_operation_id],
+                )
+            )
+        return self.function_hashes[function_id]
+
+    def operation_key(
+        self, operation: proto_op.Operation, hashes: Dict[int, bytes]
+    ) -> Tuple:
+        """Returns the structure of an operation, given the hashes of its operands."""
+        kind, value = betterproto.which_one_of(operation, "operation")
+        children = tuple(hashes[child] for child in operation_children(operation))
+        if kind in ("binary", "unary"):
+            detail = value.variant
+        elif kind == "input_ref":
+            detail = value.refers_to
+        elif kind == "literal_ref":
+            literal = self.literals[value.refers_to]
+            detail = literal.value
+        elif kind == "arg_ref":
+            detail = value.refers_to
+        elif kind in ("map", "reduce"):
+            detail = self.function_hash(value.fn)
+        elif kind in ("array_accessor", "tuple_accessor", "ntuple_accessor"):
+            detail = value.index
+        elif kind == "object_accessor":
+            detail = value.key
+        else:
+            detail = None
+        return (kind, detail, type_to_str(operation.type), children)
+
+    def operation_hashes(
+        self, operations: Dict[int, proto_op.Operation], roots: Iterable[int]
+    ) -> Dict[int, bytes]:
+        """Returns the structural hashes of the operations used by some roots."""
+        hashes: Dict[int, bytes] = {}
+        stack = [(root, False) for root in roots]
+        while len(stack) > 0:
+            op_id, children_done = stack.pop()
+            if op_id in hashes:
+                continue
+            operation = operations[op_id]
+            if children_done:
+                hashes[op_id] = structural_hash(self.operation_key(operation, hashes))
+                continue
+            stack.append((op_id, True))
+            stack.extend(
+                (child, False)
+                for child in operation_children(operation)
+                if child not in hashes
+            )
+        return hashes
+
+
+@dataclass
+class OutputDiff:
+    """Difference of an output between two programs.
+
+    Attributes
+    ----------
+    name: str
+        The name of the output
+    status: str
+        `added`, `removed`, `changed` or `unchanged`
+    depth: Tuple[int, int]
+        The round depth of the output in the old and in the new program
+    operations: Tuple[int, int]
+        The number of operations used by the output in the old and in the new program
+    cost: Tuple[int, int]
+        The weighted cost of the output in the old and in the new program
+    added: Dict[str, int]
+        The number of secret operations of the new program that are not in the old
+        one, by kind of operation
+    removed: Dict[str, int]
+        The number of secret operations of the old program that are not in the new
+        one, by kind of operation
+    """
+
+    name: str
+    status: str
+    depth: Tuple[int, int] = (0, 0)
+    operations: Tuple[int, int] = (0, 0)
+    cost: Tuple[int, int] = (0, 0)
+    added: Dict[str, int] = field(default_factory=dict)
+    removed: Dict[str, int] = field(default_factory=dict)
+
+    def is_regression(self) -> bool:
+        """Returns True if the cost or the round depth of the output increases."""
+        return self.status == "changed" and (
+            self.cost[1] > self.cost[0] or self.depth[1] > self.depth[0]
+        )
+
+
+@dataclass
+class NamedDiff:
+    """Difference of an input or a function between two programs.
+
+    Attributes
+    ----------
+    name: str
+        The name of the input or function
+    status: str
+        `added`, `removed`, `changed` or `unchanged`
+    detail: str
+        What changed, e.g. the type of an input
+    """
+
+    name: str
+    status: str
+    detail: str = ""
+
+
+@dataclass
+class MirDiff:
+    """Semantic difference between two compiled programs."""
+
+    operations: Tuple[int, int]
+    outputs: List[OutputDiff] = field(default_factory=list)
+    inputs: List[NamedDiff] = field(default_factory=list)
+    functions: List[NamedDiff] = field(default_factory=list)
+
+    def regressions(self) -> List[OutputDiff]:
+        """Returns the outputs whose cost or round depth increases."""
+        return [output for output in self.outputs if output.is_regression()]
+
+
+class ProgramSummary:
+    """Structural hashes, round depths and costs of the outputs of a program."""
+
+    def __init__(self, mir: proto_mir.ProgramMir):
+        self.mir = mir
+        self.hasher = StructuralHasher(mir)
+        self.estimator = CostEstimator(mir, DEFAULT_WEIGHTS)
+        self.operations = {entry.id: entry.operation for entry in mir.operations}
+        self.outputs = {output.name: output for output in mir.outputs}
+        self.hashes = self.hasher.operation_hashes(
+            self.operations, [output.operation_id for output in mir.outputs]
+        )
+        self.depths = {
+            output.name: output.depth for output in analyze_depth(mir).outputs
+        }
+
+    def cone(self, name: str) -> List[int]:
+        """Returns the operations of the program used by an output."""
+        visited = set()
+        stack = [self.outputs[name].operation_id]
+        while len(stack) > 0:
+            op_id = stack.pop()
+            if op_id in visited:
+                continue
+            visited.add(op_id)
+            stack.extend(operation_children(self.operations[op_id]))
+        return list(visited)
+
+    def secret_operations(self, cone: List[int]) -> Counter:
+        """Returns the secret operations of a cone, by structural hash and kind."""
+        return Counter(
+            (self.hashes[op_id], operation_name(self.operations[op_id]))
+            for op_id in cone
+            if is_secret(self.operations[op_id].type)
+            and betterproto.which_one_of(self.operations[op_id], "operation")[0]
+            not in REFERENCE_KINDS
+        )
+
+    def counts(self, name: str) -> Counter:
+        """Returns the number of operations of every kind of cost of an output,
+        including the operations it shares with other outputs."""
+        counts: Counter = Counter()
+        for source_counts in self.estimator.count_sources(
+            [self.outputs[name].operation_id]
+        ).values():
+            counts.update(source_counts)
+        return counts
+
+
+def by_kind(operations: Counter) -> Dict[str, int]:
+    """Sums counts of operations by structural hash and kind into counts by kind."""
+    kinds: Counter = Counter()
+    for (_, kind), count in operations.items():
+        kinds[kind] += count
+    return dict(kinds)
+
+
+def diff_output(old: ProgramSummary, new: ProgramSummary, name: str) -> OutputDiff:
+    """Returns the difference of an output between two programs."""
+    if name not in new.outputs:
+        return OutputDiff(name, "removed")
+    if name not in old.outputs:
+        return OutputDiff(name, "added")
+    old_cone, new_cone = old.cone(name), new.cone(name)
+    old_counts, new_counts = old.counts(name), new.counts(name)
+    old_secret = old.secret_operations(old_cone)
+    new_secret = new.secret_operations(new_cone)
+    unchanged = (
+        old.hashes[old.outputs[name].operation_id]
+        == new.hashes[new.outputs[name].operation_id]
+    )
+    return OutputDiff(
+        name,
+        "unchanged" if unchanged else "changed",
+        depth=(old.depths[name], new.depths[name]),
+        operations=(len(old_cone), len(new_cone)),
+        cost=(
+            weighted_cost(old_counts, DEFAULT_WEIGHTS),
+            weighted_cost(new_counts, DEFAULT_WEIGHTS),
+        ),
+        added=by_kind(new_secret - old_secret),
+        removed=by_kind(old_secret - new_secret),
+    )
+
+
+def diff_named(old: Dict[str, str], new: Dict[str, str]) -> List[NamedDiff]:
+    """Returns the differences between the signatures of named elements."""
+    diffs = []
+    for name in list(old) + [name for name in new if name not in old]:
+        if name not in new:
+            diffs.append(NamedDiff(name, "removed"))
+        elif name not in old:
+            diffs.append(NamedDiff(name, "added", new[name]))
+        elif old[name] != new[name]:
+            diffs.append(NamedDiff(name, "changed", f"{old[name]} -> {new[name]}"))
+        else:
+            diffs.append(NamedDiff(name, "unchanged"))
+    return diffs
+
+
+class FunctionEntry(NamedTuple):
+    """A function of a program, as compared by the diff.
+
+    Attributes
+    ----------
+    name: str
+        The name of the function
+    location: str
+        The source location of the function, e.g. `program.py:12`
+    signature: str
+        The size and the structural hash of the function
+    """
+
+    name: str
+    location: str
+    signature: str
+
+
+def function_entries(summary: ProgramSummary) -> List[FunctionEntry]:
+    """Returns the functions of a program, in identifier order."""
+    entries = []
+    source_refs = summary.mir.source_refs
+    for function in summary.mir.functions:
+        location = "<unknown>"
+        if function.source_ref_index < len(source_refs):
+            source_ref = source_refs[function.source_ref_index]
+            location = f"{source_ref.file}:{source_ref.lineno}"
+        digest = summary.hasher.function_hash(function.id).hex()[:8]
+        entries.append(
+            FunctionEntry(
+                function.name,
+                location,
+                f"{len(function.operations)} operations #{digest}",
+            )
+        )
+    return entries
+
+
+def match_functions(
+    old: List[FunctionEntry], new: List[FunctionEntry]
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Matches the functions of two programs, and returns their signatures by label
+    (see `diff_named`).
+
+    Functions are matched by name and source location first, then by position among
+    the remaining functions with the same name. The label of a function is its name,
+    followed by its source location when several functions have that name.
+    """
+    by_location: Dict[Tuple[str, str], List[int]] = {}
+    for index, entry in enumerate(old):
+        by_location.setdefault((entry.name, entry.location), []).append(index)
+    partners: Dict[int, int] = {}
+    unmatched = []
+    for index, entry in enumerate(new):
+        candidates = by_location.get((entry.name, entry.location), [])
+        if len(candidates) > 0:
+            partners[candidates.pop(0)] = index
+        else:
+            unmatched.append(index)
+    by_name: Dict[str, List[int]] = {}
+    for index, entry in enumerate(old):
+        if index not in partners:
+            by_name.setdefault(entry.name, []).append(index)
+    for index in unmatched:
+        candidates = by_name.get(new[index].name, [])
+        if len(candidates) > 0:
+            partners[candidates.pop(0)] = index
+
+    name_counts = Counter(entry.name for entry in old)
+    name_counts |= Counter(entry.name for entry in new)
+    labels: Counter = Counter()
+
+    def label(entry: FunctionEntry) -> str:
+        text = entry.name
+        if name_counts[entry.name] > 1:
+            text = f"{entry.name} ({entry.location})"
+        labels[text] += 1
+        return text if labels[text] == 1 else f"{text} #{labels[text]}"
+
+    old_signatures: Dict[str, str] = {}
+    new_signatures: Dict[str, str] = {}
+    new_labels: Dict[int, str] = {}
+    for index, entry in enumerate(old):
+        if index in partners:
+            text = label(new[partners[index]])
+            new_labels[partners[index]] = text
+        else:
+            text = label(entry)
+        old_signatures[text] = entry.signature
+    for index, entry in enumerate(new):
+        text = new_labels[index] if index in new_labels else label(entry)
+        new_signatures[text] = entry.signature
+    return old_signatures, new_signatures
+
+
+@add_timer(timer_name="nada_dsl.mirdiff.diff_mir")
+def diff_mir(old: proto_mir.ProgramMir, new: proto_mir.ProgramMir) -> MirDiff:
+    """Computes the semantic difference between two compiled programs.
+
+    Arguments
+    ---------
+    old: proto_mir.ProgramMir
+        The old program
+    new: proto_mir.ProgramMir
+        The new program
+
+    Returns
+    -------
+    MirDiff
+        The differences of the outputs, inputs and functions of the programs
+    """
+    old_summary, new_summary = ProgramSummary(old), ProgramSummary(new)
+    names = list(old_summary.outputs) + [
+        name for name in new_summary.outputs if name not in old_summary.outputs
+    ]
+    return MirDiff(
+        operations=(
+            len(old.operations) + sum(len(f.operations) for f in old.functions),
+            len(new.operations) + sum(len(f.operations) for f in new.functions),
+        ),
+        outputs=[diff_output(old_summary, new_summary, name) for name in names],
+        inputs=diff_named(
+            {mir_input.name: type_to_str(mir_input.type) for mir_input in old.inputs},
+            {mir_input.name: type_to_str(mir_input.type) for mir_input in new.inputs},
+        ),
+        functions=diff_named(
+            *match_functions(
+                function_entries(old_summary), function_entries(new_summary)
+            )
+        ),
+    )
+
+
+def change(values: Tuple[int, int]) -> str:
+    """Formats an old and a new value."""
+    old, new = values
+    if old == new:
+        return str(old)
+    return f"{old} -> {new} ({new - old:+d})"
+
+
+def format_kinds(counts: Dict[str, int]) -> str:
+    """Formats counts by kind on a single line."""
+    return ", ".join(f"{count} {kind}" for kind, count in sorted(counts.items()))
+
+
+def format_diff(diff: MirDiff, unchanged: bool = False) -> str:
+    """Formats the semantic difference between two programs as text. Unchanged
+    outputs, inputs and functions are only listed if requested."""
+    lines = [f"operations: {change(diff.operations)}", "outputs:"]
+    for output in diff.outputs:
+        if output.status == "unchanged" and not unchanged:
+            continue
+        lines.append(f"  {output.name}: {output.status}")
+        if output.status != "changed":
+            continue
+        lines.append(f"    depth: {change(output.depth)}")
+        lines.append(f"    operations: {change(output.operations)}")
+        lines.append(f"    cost: {change(output.cost)}")
+        if output.added:
+            lines.append(f"    added secret operations: {format_kinds(output.added)}")
+        if output.removed:
+            lines.append(
+                f"    removed secret operations: {format_kinds(output.removed)}"
+            )
+    for title, named_diffs in (("inputs", diff.inputs), ("functions", diff.functions)):
+        lines.append(f"{title}:")
+        for named in named_diffs:
+            if named.status != "unchanged" or unchanged:
+                detail = f" ({named.detail})" if named.detail else ""
+                lines.append(f"  {named.name}: {named.status}{detail}")
+    return "\n".join(lines)
+
+
+def _main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m nada_dsl.mirdiff",
+        description="Compares two compiled Nada programs (MIR).",
+    )
+    parser.add_argument("old", help="old compiled program (MIR) path")
+    parser.add_argument("new", help="new compiled program (MIR) path")
+    parser.add_argument(
+        "--all", action="store_true", help="also list what is unchanged"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit with status 1 if the cost or depth of an output increases",
+    )
+    parsed = parser.parse_args(args)
+
+    with open(parsed.old, "rb") as old_file, open(parsed.new, "rb") as new_file:
+        diff = diff_mir(
+            proto_mir.ProgramMir().parse(old_file.read()),
+            proto_mir.ProgramMir().parse(new_file.read()),
+        )
+    print(format_diff(diff, parsed.all))
+    if parsed.check and len(diff.regressions()) > 0:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,220 @@
+"""
+Statistics of a compiled program (MIR).
+
+The MIR file is read one element at a time (see `nada_dsl.mir_stream`), so the
+statistics of very large programs can be computed without loading them:
+
+    python -m nada_dsl.mirstat program.nada.bin
+
+The statistics are the size of every section of the MIR, the number of operations by
+variant and by type, the size of every function, the sizes of the arrays and the
+number of literals.
+"""
+
+import argparse
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Tuple
+
+import betterproto
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.disassemble import type_to_str
+from nada_dsl.mir_stream import read_elements
+from nada_dsl.mir_util import array_size, operation_name
+from nada_dsl.timer import add_timer
+
+
+def _field_number(message: type, field_name: str) -> int:
+    """Returns the number of a field of a protobuf message class."""
+    # pylint: disable=protected-access,no-member
+    return message._betterproto.meta_by_field_name[field_name].number
+
+
+# Field numbers of the operation of an operation map entry, of the type of an
+# operation and of the operations of a function
+ENTRY_OPERATION_FIELD = _field_number(proto_mir.OperationMapEntry, "operation")
+OPERATION_TYPE_FIELD = _field_number(proto_op.Operation, "type")
+FUNCTION_OPERATIONS_FIELD = _field_number(proto_mir.NadaFunction, "operations")
+
+
+@dataclass
+class FunctionStatistics:
+    """Size of a function."""
+
+    id: int
+    name: str
+    operations: int
+    size: int
+
+
+@dataclass
+class MirStatistics:  # pylint: disable=too-many-instance-attributes
+    """Statistics of a compiled program.
+
+    Attributes
+    ----------
+    size: int
+        The size of the MIR in bytes
+    sections: Dict[str, int]
+        The size in bytes of every section (field) of the MIR
+    elements: Dict[str, int]
+        The number of elements of every section of the MIR
+    type_size: int
+        The size in bytes of the types of the operations, in the operations and
+        functions sections
+    variants: Dict[str, int]
+        The number of operations by variant, including the operations of functions
+    types: Dict[str, int]
+        The number of operations by type, including the operations of functions
+    functions: List[FunctionStatistics]
+        The size of every function
+    array_sizes: Dict[int, int]
+        The number of operations returning an array, by array size
+    literals: Dict[str, int]
+        The number of literals by type
+    """
+
+    size: int = 0
+    sections: Dict[str, int] = field(default_factory=Counter)
+    elements: Dict[str, int] = field(default_factory=Counter)
+    type_size: int = 0
+    variants: Dict[str, int] = field(default_factory=Counter)
+    types: Dict[str, int] = field(default_factory=Counter)
+    functions: List[FunctionStatistics] = field(default_factory=list)
+    array_sizes: Dict[int, int] = field(default_factory=Counter)
+    literals: Dict[str, int] = field(default_factory=Counter)
+
+
+def field_size(payload: bytes, number: int) -> int:
+    """Returns the number of bytes of a field of a serialized message, including its
+    tag and length."""
+    return sum(
+        len(parsed.raw)
+        for parsed in betterproto.parse_fields(payload)
+        if parsed.number == number
+    )
+
+
+class MirStatisticsCollector:
+    """Adds the elements of a MIR to its statistics, one element at a time."""
+
+    def __init__(self):
+        self.statistics = MirStatistics()
+
+    def add_operation(self, payload: bytes):
+        """Adds a serialized operation map entry to the statistics."""
+        entry = proto_mir.OperationMapEntry().parse(payload)
+        operation = entry.operation
+        self.statistics.variants[operation_name(operation)] += 1
+        self.statistics.types[type_to_str(operation.type)] += 1
+        size = array_size(operation.type)
+        if size > 0:
+            self.statistics.array_sizes[size] += 1
+        for parsed in betterproto.parse_fields(payload):
+            if parsed.number == ENTRY_OPERATION_FIELD:
+                self.statistics.type_size += field_size(
+                    parsed.value, OPERATION_TYPE_FIELD
+                )
+
+    def add_function(self, payload: bytes, size: int):
+        """Adds a serialized function, with its operations, to the statistics."""
+        operations = 0
+        for parsed in betterproto.parse_fields(payload):
+            if parsed.number == FUNCTION_OPERATIONS_FIELD:
+                self.add_operation(parsed.value)
+                operations += 1
+        function = proto_mir.NadaFunction().parse(payload)
+        self.statistics.functions.append(
+            FunctionStatistics(function.id, function.name, operations, size)
+        )
+
+    def add(self, section: str, payload: bytes, size: int):
+        """Adds an element of a section of the MIR to the statistics."""
+        self.statistics.size += size
+        self.statistics.sections[section] += size
+        self.statistics.elements[section] += 1
+        if section == "operations":
+            self.add_operation(payload)
+        elif section == "functions":
+            self.add_function(payload, size)
+        elif section == "literals":
+            literal = proto_mir.Literal().parse(payload)
+            self.statistics.literals[type_to_str(literal.type)] += 1
+
+
+@add_timer(timer_name="nada_dsl.mirstat.mir_statistics")
+def mir_statistics(stream: BinaryIO) -> MirStatistics:
+    """Computes the statistics of a compiled program.
+
+    Arguments
+    ---------
+    stream: BinaryIO
+        The serialized MIR of the program, read one element at a time
+
+    Returns
+    -------
+    MirStatistics
+        The statistics of the program
+    """
+    collector = MirStatisticsCollector()
+    for element in read_elements(stream):
+        collector.add(element.field, element.payload, element.size)
+    return collector.statistics
+
+
+def format_counts(counts: Dict, total: int) -> List[str]:
+    """Formats counts as lines, from the largest count, with their percentage of a
+    total."""
+    pairs: List[Tuple] = sorted(counts.items(), key=lambda pair: (-pair[1], pair[0]))
+    return [
+        f"  {name}: {count} ({100 * count / max(total, 1):.1f}%)"
+        for name, count in pairs
+    ]
+
+
+def format_statistics(statistics: MirStatistics) -> str:
+    """Formats the statistics of a compiled program as text."""
+    operations = sum(statistics.variants.values())
+    lines = [f"MIR size: {statistics.size} bytes", "Sections (bytes):"]
+    lines.extend(format_counts(statistics.sections, statistics.size))
+    lines.append(f"  of which operation types: {statistics.type_size}")
+    lines.append("Elements:")
+    lines.extend(
+        f"  {section}: {count}" for section, count in statistics.elements.items()
+    )
+    lines.append(f"Operations by variant ({operations}):")
+    lines.extend(format_counts(statistics.variants, operations))
+    lines.append("Operations by type:")
+    lines.extend(format_counts(statistics.types, operations))
+    lines.append("Functions:")
+    lines.extend(
+        f"  {function.name} (fn_id {function.id}): {function.operations} operations,"
+        f" {function.size} bytes"
+        for function in sorted(
+            statistics.functions, key=lambda function: -function.size
+        )
+    )
+    lines.append("Array sizes (operations):")
+    lines.extend(
+        f"  {size}: {count}" for size, count in sorted(statistics.array_sizes.items())
+    )
+    lines.append(f"Literals ({sum(statistics.literals.values())}):")
+    lines.extend(format_counts(statistics.literals, sum(statistics.literals.values())))
+    return "\n".join(lines)
+
+
+def _main():
+    parser = argparse.ArgumentParser(
+        prog="python -m nada_dsl.mirstat",
+        description="Prints the statistics of a compiled Nada program (MIR).",
+    )
+    parser.add_argument("path", help="compiled program (MIR) path")
+    args = parser.parse_args()
+    with open(args.path, "rb") as mir_file:
+        print(format_statistics(mir_statistics(mir_file)))
+
+
+if __name__ == "__main__":
+    _main()
@@ -1,13 +1,14 @@
 """Nada Collection type definitions."""
 
 from dataclasses import dataclass
-from typing import Any, Dict, Generic, List
+from typing import Any, Dict, Generic, List, Union
 import typing
 
 from sortedcontainers import SortedDict
 
 from nada_dsl.ast_util import (
     AST_OPERATIONS,
+    ArrayAccessorASTOperation,
     BinaryASTOperation,
     MapASTOperation,
     TupleAccessorASTOperation,
@@ -527,6 +528,39 @@ class Array(Generic[T], DslType):
             "Cannot loop over a Nada Array, use functional style Array operations (map, reduce, zip)."
         )
 
+    def __getitem__(self, index: Union[int, slice]) -> DslType:
+        """Accesses the element of the array at a constant index, or builds a new
+        array with the elements of a slice. Negative indices count from the end of
+        the array, like for Python lists.
+
+        The indices are checked at compile time and every element is read with an
+        array accessor, which costs no secret operation.
+        """
+        source_ref = SourceRef.back_frame()
+        if isinstance(index, slice):
+            indices = range(*index.indices(self.size))
+            if len(indices) == 0:
+                raise IndexError(f"Empty slice {index} of Array of size {self.size}.")
+            return Array(
+                contained_type=self.contained_type,
+                size=len(indices),
+                child=ArrayNew(
+                    child=[self._access(i, source_ref) for i in indices],
+                    source_ref=source_ref,
+                ),
+            )
+        if isinstance(index, bool) or not isinstance(index, int):
+            raise TypeError(
+                f"Array indices must be integers or slices, not {type(index).__name__}"
+            )
+        if not -self.size <= index < self.size:
+            raise IndexError(f"Invalid index {index} for Array of size {self.size}.")
+        return self._access(index % self.size, source_ref)
+
+    def _access(self, index: int, source_ref: SourceRef) -> DslType:
+        accessor = ArrayAccessor(index=index, child=self, source_ref=source_ref)
+        return _generate_accessor(self.contained_type, accessor)
+
     def check_not_constant(self, ty):
         """Checks that a type is not a constant"""
         if ty.is_constant:
@@ -615,6 +649,36 @@ class Array(Generic[T], DslType):
         return ArrayType(self.contained_type, self.size)
 
 
+@dataclass
+class ArrayAccessor:
+    """Accessor for Array"""
+
+    child: Array
+    index: int
+    source_ref: SourceRef
+
+    def __init__(
+        self,
+        child: Array,
+        index: int,
+        source_ref: SourceRef,
+    ):
+        self.id = OperationId.next()
+        self.child = child
+        self.index = index
+        self.source_ref = source_ref
+
+    def store_in_ast(self, ty: proto_ty.NadaType):
+        """Store this accessor in the AST."""
+        AST_OPERATIONS[self.id] = ArrayAccessorASTOperation(
+            id=self.id,
+            source=self.child.child.id,
+            index=self.index,
+            source_ref=self.source_ref,
+            ty=ty,
+        )
+
+
 @dataclass
 class TupleNew(Generic[T, U]):
     """MIR Tuple new operation.
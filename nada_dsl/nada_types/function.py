@@ -4,13 +4,15 @@ Nada function definitions and utilities.
 """
 
 import inspect
-from typing import Generic, List, Callable
+from types import CodeType
+from typing import Generic, List, Callable, Tuple
 
 from nada_mir_proto.nillion.nada.types import v1 as proto_ty
 
 from nada_dsl import SourceRef
 from nada_dsl.ast_util import (
     AST_OPERATIONS,
+    FUNCTIONS,
     NadaFunctionASTOperation,
     NadaFunctionArgASTOperation,
     OperationId,
@@ -89,6 +91,85 @@ class NadaFunction(Generic[T, R]):
         )
 
 
+# pylint: disable=too-many-return-statements
+def captured_value_key(value, depth: int = 0) -> Tuple | None:
+    """Returns a hashable key that identifies a value captured by a function,
+    or None if the value can not be identified safely.
+
+    Nada values are identified by the identifier of their operation, Python constants
+    by their value, tuples, lists and dictionaries by their content, nested functions
+    by their own code and captured values, and classes and modules by their identity.
+    Any other value can not be identified, so the functions that capture it are not
+    cached.
+    """
+    if isinstance(value, DslType):
+        operation_id = getattr(value.child, "id", None)
+        return None if operation_id is None else ("op", operation_id)
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return ("value", type(value), value)
+    if depth >= 8:
+        return None
+    if isinstance(value, (tuple, list)):
+        keys = tuple(captured_value_key(element, depth + 1) for element in value)
+        return None if None in keys else ("sequence", type(value), keys)
+    if isinstance(value, dict):
+        keys = tuple(
+            (captured_value_key(key, depth + 1), captured_value_key(item, depth + 1))
+            for key, item in value.items()
+        )
+        if any(None in pair for pair in keys):
+            return None
+        return ("mapping", type(value), keys)
+    if inspect.isfunction(value):
+        return function_cache_key(value, (), depth + 1)
+    if inspect.isclass(value) or inspect.ismodule(value) or inspect.isbuiltin(value):
+        return ("object", id(value))
+    return None
+
+
+def global_names(code: CodeType) -> List[str]:
+    """Returns the names a code object and the functions nested in it may read from
+    the global scope, in order of first use."""
+    names = dict.fromkeys(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names.update(dict.fromkeys(global_names(const)))
+    return list(names)
+
+
+def function_cache_key(fn, args_ty, depth: int = 0) -> Tuple | None:
+    """Returns the key of a function in the `FUNCTIONS` cache, or None if the
+    function can not be cached.
+
+    The key is made of the code of the function, the values it captures (closure
+    variables, default arguments and the values it, or a function nested in it,
+    reads from the global scope) and the types of its arguments. A function that captures a value that can not
+    be identified (see `captured_value_key`) is not cached.
+    """
+    code = getattr(fn, "__code__", None)
+    if code is None:
+        return None
+    captured = []
+    for cell in fn.__closure__ or ():
+        try:
+            captured.append(captured_value_key(cell.cell_contents, depth))
+        except ValueError:
+            # Empty cell
+            return None
+    for default in fn.__defaults__ or ():
+        captured.append(captured_value_key(default, depth))
+    fn_globals = getattr(fn, "__globals__", {})
+    for name in global_names(code):
+        if name in fn_globals:
+            key = captured_value_key(fn_globals[name], depth)
+            if key is None:
+                return None
+            captured.append((name, key))
+    if None in captured:
+        return None
+    return (code, tuple(captured), tuple(bytes(ty.to_mir()) for ty in args_ty))
+
+
 def create_nada_fn(fn, args_ty) -> NadaFunction[T, R]:
     """
     Can be used also for lambdas
@@ -98,7 +179,15 @@ def create_nada_fn(fn, args_ty) -> NadaFunction[T, R]:
             lambda x: x.cast(SecretInteger),
             args_ty={'x': SecretInteger}, return_ty=SecretInteger))
     ```
+
+    Creating a function with the same code, captured values and argument types
+    more than once returns the same Nada function.
     """
+    key = function_cache_key(fn, args_ty)
+    if key is not None and key in FUNCTIONS:
+        nada_function, ast_operation = FUNCTIONS[key]
+        if AST_OPERATIONS.get(nada_function.id) is ast_operation:
+            return nada_function
 
     args = inspect.getfullargspec(fn)
     nada_args = []
@@ -118,7 +207,7 @@ def create_nada_fn(fn, args_ty) -> NadaFunction[T, R]:
     child = fn(*nada_args_type_wrapped)
 
     return_type = child.type()
-    return NadaFunction(
+    nada_function = NadaFunction(
         function_id,
         function=fn,
         args=nada_args,
@@ -126,3 +215,6 @@ def create_nada_fn(fn, args_ty) -> NadaFunction[T, R]:
         return_type=return_type,
         source_ref=SourceRef.back_frame(),
     )
+    if key is not None:
+        FUNCTIONS[key] = (nada_function, AST_OPERATIONS[function_id])
+    return nada_function
@@ -175,6 +175,8 @@ class NumericDslType(ScalarDslType):
         if mode == Mode.PUBLIC:
             child = Power(left=self, right=other, source_ref=SourceRef.back_frame())
             return new_scalar_type(mode, base_type)(child)
+        if other.mode == Mode.CONSTANT and other.value > 0:
+            return power_by_squaring(self, other.value)
         raise TypeError(f"Invalid operation: {self} ** {other}")
 
     def __lshift__(self, other):
@@ -217,6 +219,35 @@ class NumericDslType(ScalarDslType):
         return self.__add__(other)
 
 
+def power_by_squaring(base: "NumericDslType", exponent: int) -> "NumericDslType":
+    """Computes the power of a secret value to a positive constant exponent with
+    multiplications only.
+
+    The powers `base ** (2 ** i)` are computed by repeated squaring and the ones
+    selected by the binary representation of the exponent are multiplied in a
+    balanced tree. This takes `floor(log2(k)) + popcount(k) - 1` multiplications with a
+    depth of `floor(log2(k)) + ceil(log2(popcount(k)))` rounds, instead of the `k - 1`
+    rounds of a chain of multiplications.
+    """
+    powers = []
+    square = base
+    while True:
+        if exponent & 1:
+            powers.append(square)
+        exponent >>= 1
+        if exponent == 0:
+            break
+        square = square * square
+    while len(powers) > 1:
+        powers = [
+            powers[index] * powers[index + 1]
+            if index + 1 < len(powers)
+            else powers[index]
+            for index in range(0, len(powers), 2)
+        ]
+    return powers[0]
+
+
 def binary_arithmetic_operation(
     operation, operator, left: ScalarDslType, right: ScalarDslType, f
 ) -> ScalarDslType:
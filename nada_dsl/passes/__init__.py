@@ -0,0 +1,69 @@
+"""Export classes and functions for Nada DSL optimization passes.
+
+The optimization passes are grouped in optimization levels:
+
+- `0`: no optimization, the MIR contains exactly the operations built by the program.
+- `1`: passes that only remove operations.
+- `2`: all the passes.
+"""
+
+from typing import Dict, List
+
+from nada_dsl.errors import InvalidOptimizationLevelError
+from nada_dsl.passes.comparisons import SharedComparisonElimination
+from nada_dsl.passes.inner_product import InnerProductFusion
+from nada_dsl.passes.map_fusion import MapFusion
+from nada_dsl.passes.manager import Pass, PassManager, PassStatistics
+from nada_dsl.passes.rebalance import ChainRebalancing
+from nada_dsl.passes.select import SelectSimplification
+from nada_dsl.passes.simplify import AlgebraicSimplification
+from nada_dsl.passes.strength import StrengthReduction
+from nada_dsl.passes.unroll import ReduceUnrolling
+
+# Constructors of the passes of every optimization level, in running order
+OPTIMIZATION_LEVELS: Dict[int, List[type]] = {
+    0: [],
+    1: [
+        AlgebraicSimplification,
+        SelectSimplification,
+        SharedComparisonElimination,
+        MapFusion,
+        InnerProductFusion,
+    ],
+    2: [
+        AlgebraicSimplification,
+        SelectSimplification,
+        SharedComparisonElimination,
+        MapFusion,
+        InnerProductFusion,
+        StrengthReduction,
+        ReduceUnrolling,
+        ChainRebalancing,
+    ],
+}
+
+
+def pass_manager(
+    optimization_level: int,
+    verbose: bool = False,
+    probabilistic_truncation: bool = False,
+) -> PassManager:
+    """Returns a pass manager running the passes of the given optimization level.
+
+    In verbose mode, the notes of the passes are printed to the standard error.
+    `probabilistic_truncation` allows the strength reduction to rewrite divisions of
+    secret integers into probabilistic truncations (see `nada_dsl.passes.strength`),
+    it has no effect below level 2.
+    """
+    if optimization_level not in OPTIMIZATION_LEVELS:
+        raise InvalidOptimizationLevelError(
+            f"unknown optimization level {optimization_level}, "
+            f"expected one of {sorted(OPTIMIZATION_LEVELS)}"
+        )
+    passes: List[Pass] = []
+    for pass_class in OPTIMIZATION_LEVELS[optimization_level]:
+        if pass_class is StrengthReduction:
+            passes.append(StrengthReduction(probabilistic_truncation))
+        else:
+            passes.append(pass_class())
+    return PassManager(passes, verbose=verbose)
@@ -0,0 +1,112 @@
+"""
+Shared comparison elimination.
+
+Comparisons are the most expensive operations on secret values. Every relational
+operation can be written as a less than or an equality, possibly negated:
+
+- `a < b` is `a < b`
+- `a > b` is `b < a`
+- `a <= b` is `not (b < a)`
+- `a >= b` is `not (a < b)`
+- `a == b` is `a == b`
+- `a != b` is `not (a == b)`
+
+Comparisons that have the same canonical form are computed only once, and a
+negation is used when one of them is the negation of the other.
+"""
+
+from typing import Dict, List, Tuple
+
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.ast_util import BinaryASTOperation
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.passes.manager import Pass, PassStatistics
+from nada_dsl.passes.rewrite import is_public, new_unary
+
+Variant = proto_op.BinaryOperationVariant
+
+
+# Canonical variant of every comparison, whether the operands are swapped and
+# whether the comparison is the negation of the canonical form
+CANONICAL_FORMS = {
+    Variant.LESS_THAN: (Variant.LESS_THAN, False, False),
+    Variant.GREATER_THAN: (Variant.LESS_THAN, True, False),
+    Variant.LESS_EQ: (Variant.LESS_THAN, True, True),
+    Variant.GREATER_EQ: (Variant.LESS_THAN, False, True),
+    Variant.EQUALS: (Variant.EQUALS, False, False),
+    Variant.NOT_EQUALS: (Variant.EQUALS, False, True),
+}
+
+
+def canonical_comparison(operation: BinaryASTOperation) -> Tuple[Tuple, bool] | None:
+    """Returns the canonical form of a comparison and whether it is negated,
+    or None if the operation is not a comparison.
+
+    The canonical form of equalities does not depend on the order of the operands.
+    """
+    if operation.variant not in CANONICAL_FORMS:
+        return None
+    variant, swapped, negated = CANONICAL_FORMS[operation.variant]
+    left, right = operation.left, operation.right
+    if swapped or (variant == Variant.EQUALS and right < left):
+        left, right = right, left
+    return (variant, left, right), negated
+
+
+class SharedComparisonElimination(Pass):
+    """Computes only once the comparisons that are mirrored or negated forms of
+    each other.
+
+    Among the comparisons with the same canonical form, the first one that is not
+    negated is kept, or the first one if all of them are negated. The others are
+    replaced by the kept one, or by its negation. The number of comparisons of
+    secret values that are removed is reported in the metrics.
+    """
+
+    name = "shared_comparison_elimination"
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        groups: Dict[Tuple, List[Tuple[int, bool]]] = {}
+        for operation_id in graph.all_operation_ids():
+            operation = graph.operations[operation_id]
+            if not isinstance(operation, BinaryASTOperation):
+                continue
+            comparison = canonical_comparison(operation)
+            if comparison is not None:
+                key, negated = comparison
+                groups.setdefault(key, []).append((operation_id, negated))
+
+        replacements: Dict[int, int] = {}
+        removed = 0
+        for comparisons in groups.values():
+            if len(comparisons) < 2:
+                continue
+            kept_id, kept_negated = next(
+                (comparison for comparison in comparisons if not comparison[1]),
+                comparisons[0],
+            )
+            negation = None
+            for operation_id, negated in comparisons:
+                if operation_id == kept_id:
+                    continue
+                operation = graph.operations[operation_id]
+                if negated == kept_negated:
+                    replacements[operation_id] = kept_id
+                else:
+                    if negation is None:
+                        negation = new_unary(
+                            graph.operations,
+                            proto_op.UnaryOperationVariant.NOT,
+                            kept_id,
+                            operation.ty,
+                            operation.source_ref,
+                        )
+                    replacements[operation_id] = negation
+                if not is_public(operation.ty):
+                    removed += 1
+        statistics.metrics["secret_comparisons_removed"] = (
+            statistics.metrics.get("secret_comparisons_removed", 0) + removed
+        )
+        graph.replace_operations(replacements)
+        return len(replacements) > 0
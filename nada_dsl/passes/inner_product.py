@@ -0,0 +1,183 @@
+"""
+Inner product fusion.
+
+Programs written in functional style compute inner products as
+
+    a.zip(b).map(lambda t: t.left * t.right).reduce(add, initial)
+
+which needs a zip, a map, a function call per element and a sequential reduce.
+The runtime has a native inner product operation that is much faster.
+"""
+
+from typing import Dict, Optional
+
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.ast_util import (
+    BinaryASTOperation,
+    MapASTOperation,
+    NadaFunctionASTOperation,
+    ReduceASTOperation,
+    TupleAccessorASTOperation,
+    type_key,
+)
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.passes.manager import Pass, PassStatistics
+from nada_dsl.passes.rewrite import Operations, new_binary
+
+# Types of the elements of the arrays supported by the inner product operation
+INTEGER_TYPES = (
+    "integer",
+    "unsigned_integer",
+    "secret_integer",
+    "secret_unsigned_integer",
+)
+
+
+def binary_operands(
+    operations: Operations, operation_id: int, variant: proto_op.BinaryOperationVariant
+) -> Optional[tuple]:
+    """Returns the operands of a binary operation of the given variant, or None
+    if the operation is not one."""
+    operation = operations[operation_id]
+    if isinstance(operation, BinaryASTOperation) and operation.variant == variant:
+        return operation.left, operation.right
+    return None
+
+
+def is_tuple_element(
+    operations: Operations, operation_id: int, tuple_id: int, index: int
+) -> bool:
+    """Returns True if the operation accesses the given element of a tuple."""
+    operation = operations[operation_id]
+    return (
+        isinstance(operation, TupleAccessorASTOperation)
+        and operation.source == tuple_id
+        and operation.index == index
+    )
+
+
+def is_pair_product(operations: Operations, operation_id: int, tuple_id: int) -> bool:
+    """Returns True if the operation multiplies both elements of a tuple (`t.left * t.right`)."""
+    operands = binary_operands(
+        operations, operation_id, proto_op.BinaryOperationVariant.MULTIPLICATION
+    )
+    if operands is None:
+        return False
+    left, right = operands
+    return (
+        is_tuple_element(operations, left, tuple_id, 0)
+        and is_tuple_element(operations, right, tuple_id, 1)
+    ) or (
+        is_tuple_element(operations, left, tuple_id, 1)
+        and is_tuple_element(operations, right, tuple_id, 0)
+    )
+
+
+def accumulated_term(
+    operations: Operations, function: NadaFunctionASTOperation
+) -> Optional[int]:
+    """Returns the operation added to the accumulator by a reduce function
+    `(acc, x) -> acc + term`, or None if the function does not have this shape."""
+    operands = binary_operands(
+        operations, function.child, proto_op.BinaryOperationVariant.ADDITION
+    )
+    if operands is None:
+        return None
+    accumulator = function.args[0]
+    left, right = operands
+    if left == accumulator and right != accumulator:
+        return right
+    if right == accumulator and left != accumulator:
+        return left
+    return None
+
+
+def zipped_arrays(operations: Operations, operation_id: int) -> Optional[tuple]:
+    """Returns the arrays zipped by the operation if they can be multiplied by the
+    inner product operation, or None."""
+    operands = binary_operands(
+        operations, operation_id, proto_op.BinaryOperationVariant.ZIP
+    )
+    if operands is None:
+        return None
+    left, right = operands
+    left_type = operations[left].ty.array.contained_type
+    right_type = operations[right].ty.array.contained_type
+    if type_key(left_type) != type_key(right_type) or type_key(left_type) not in (
+        INTEGER_TYPES
+    ):
+        return None
+    return operands
+
+
+def inner_product_operands(
+    operations: Operations, reduce: ReduceASTOperation
+) -> Optional[tuple]:
+    """Returns the arrays whose inner product is computed by the reduce operation,
+    or None.
+
+    The recognised shapes are a reduce adding the elements of a map that multiplies
+    the elements of zipped arrays, and a reduce over zipped arrays adding the product
+    of their elements.
+    """
+    function = operations[reduce.fn]
+    term = accumulated_term(operations, function)
+    if term is None:
+        return None
+    element = function.args[1]
+    if term == element:
+        source = operations[reduce.child]
+        if not isinstance(source, MapASTOperation):
+            return None
+        map_function = operations[source.fn]
+        if not is_pair_product(operations, map_function.child, map_function.args[0]):
+            return None
+        return zipped_arrays(operations, source.child)
+    if is_pair_product(operations, term, element):
+        return zipped_arrays(operations, reduce.child)
+    return None
+
+
+class InnerProductFusion(Pass):
+    """Rewrites reduce operations that compute the inner product of two arrays
+    into the inner product operation.
+
+    The reduce is replaced by `initial + inner_product(a, b)`. A note is recorded
+    for every rewrite.
+    """
+
+    name = "inner_product_fusion"
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        replacements: Dict[int, int] = {}
+        for operation_id in graph.all_operation_ids():
+            operation = graph.operations[operation_id]
+            if not isinstance(operation, ReduceASTOperation):
+                continue
+            operands = inner_product_operands(graph.operations, operation)
+            if operands is None:
+                continue
+            left, right = operands
+            element_type = graph.operations[left].ty.array.contained_type
+            inner_product = new_binary(
+                graph.operations,
+                proto_op.BinaryOperationVariant.INNER_PRODUCT,
+                left,
+                right,
+                element_type,
+                operation.source_ref,
+            )
+            replacements[operation_id] = new_binary(
+                graph.operations,
+                proto_op.BinaryOperationVariant.ADDITION,
+                operation.initial,
+                inner_product,
+                operation.ty,
+                operation.source_ref,
+            )
+            statistics.note(
+                operation.source_ref, "reduce rewritten as an inner product"
+            )
+        graph.replace_operations(replacements)
+        return len(replacements) > 0
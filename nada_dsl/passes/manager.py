@@ -0,0 +1,127 @@
+"""
+Optimization pass manager.
+
+The pass manager runs a sequence of optimization passes on the program graph
+(see `nada_dsl.compiler_frontend.ProgramGraph`) between the discovery of the
+operations and the emission of the MIR. The passes are run repeatedly until
+none of them changes the program or the maximum number of iterations is reached.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+import sys
+from typing import Dict, List
+
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.source_ref import SourceRef
+from nada_dsl.timer import timer
+
+
+class Pass(ABC):
+    """Optimization pass.
+
+    Base abstract class for all optimization passes.
+
+    Attributes
+    ----------
+    name: str
+        The name of the pass, used in the timer report and the statistics
+    """
+
+    name: str
+
+    @abstractmethod
+    def run(self, graph: ProgramGraph, statistics: "PassStatistics") -> bool:
+        """Runs the pass on the program graph.
+
+        Passes can record their own metrics in `statistics.metrics`.
+
+        Returns True if the program was changed.
+        """
+        raise NotImplementedError("Pass should implement run method")
+
+
+@dataclass
+class PassStatistics:
+    """Statistics of an optimization pass.
+
+    Attributes
+    ----------
+    runs: int
+        Number of times the pass was run
+    changes: int
+        Number of runs that changed the program
+    removed_operations: int
+        Number of operations removed from the program by the pass. It is negative
+        when the pass adds more operations than it removes.
+    metrics: Dict[str, int]
+        Metrics specific to the pass
+    notes: List[str]
+        Notes about the rewrites done by the pass, printed in verbose mode
+    """
+
+    runs: int = 0
+    changes: int = 0
+    removed_operations: int = 0
+    metrics: Dict[str, int] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)
+
+    def note(self, source_ref: SourceRef, message: str):
+        """Records a note about a rewrite of the operation at the given source reference."""
+        self.notes.append(f"{source_ref.file}:{source_ref.lineno}: {message}")
+
+
+@dataclass
+class PassManager:
+    """Runs a sequence of optimization passes on a program graph until a fixed point.
+
+    Attributes
+    ----------
+    passes: List[Pass]
+        The passes, in running order
+    max_iterations: int
+        Maximum number of times the sequence of passes is run
+    statistics: Dict[str, PassStatistics]
+        The statistics of every pass, by pass name
+    verbose: bool
+        Whether the notes of the passes are printed to the standard error
+    """
+
+    passes: List[Pass]
+    max_iterations: int = 8
+    statistics: Dict[str, PassStatistics] = field(default_factory=dict)
+    verbose: bool = False
+
+    def run(self, graph: ProgramGraph):
+        """Runs the passes on the program graph."""
+        for iteration in range(self.max_iterations):
+            changed = False
+            for optimization_pass in self.passes:
+                changed = self.run_pass(optimization_pass, graph, iteration) or changed
+            if not changed:
+                break
+
+    def run_pass(
+        self, optimization_pass: Pass, graph: ProgramGraph, iteration: int
+    ) -> bool:
+        """Runs a single pass on the program graph, updating its timer and statistics.
+
+        Returns True if the program was changed.
+        """
+        statistics = self.statistics.setdefault(
+            optimization_pass.name, PassStatistics()
+        )
+        operation_count = graph.operation_count()
+        note_count = len(statistics.notes)
+        timer_name = f"nada_dsl.passes.{optimization_pass.name}.{iteration}"
+        timer.start(timer_name)
+        changed = optimization_pass.run(graph, statistics)
+        timer.stop(timer_name)
+        statistics.runs += 1
+        if changed:
+            statistics.changes += 1
+            statistics.removed_operations += operation_count - graph.operation_count()
+        if self.verbose:
+            for note in statistics.notes[note_count:]:
+                print(f"{optimization_pass.name}: {note}", file=sys.stderr)
+        return changed
@@ -0,0 +1,133 @@
+"""
+Map fusion.
+
+`array.map(f).map(g)` builds an intermediate array with the results of `f` that
+the runtime has to allocate and iterate again. Fusing both maps into a single map
+of a function that applies `f` and then `g` removes the intermediate array and a
+function call per element. The same applies to a map feeding a reduce.
+"""
+
+from dataclasses import replace
+from typing import Dict
+
+from nada_dsl.ast_util import (
+    MapASTOperation,
+    NadaFunctionASTOperation,
+    ReduceASTOperation,
+)
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.passes.manager import Pass, PassStatistics
+from nada_dsl.passes.rewrite import (
+    Operations,
+    calls_functions,
+    inline_function,
+    new_function,
+)
+
+
+def fusable_map(
+    operations: Operations, operation_id: int, uses: Dict[int, int]
+) -> MapASTOperation | None:
+    """Returns the operation if it is a map that can be fused into its only user."""
+    operation = operations[operation_id]
+    if (
+        not isinstance(operation, MapASTOperation)
+        or uses.get(operation_id, 0) != 1
+        or calls_functions(operations, operations[operation.fn])
+    ):
+        return None
+    return operation
+
+
+def fuse_maps(
+    operations: Operations, inner: MapASTOperation, outer: MapASTOperation
+) -> int:
+    """Returns a function that applies the function of the inner map and then the
+    function of the outer map."""
+    first: NadaFunctionASTOperation = operations[inner.fn]
+    second: NadaFunctionASTOperation = operations[outer.fn]
+    arg = operations[first.args[0]]
+    return new_function(
+        operations,
+        f"{first.name}_{second.name}",
+        [(arg.name, arg.ty, arg.source_ref)],
+        lambda args: inline_function(
+            operations,
+            second,
+            {
+                second.args[0]: inline_function(
+                    operations, first, {first.args[0]: args[0]}
+                )
+            },
+        ),
+        second.ty,
+        second.source_ref,
+    )
+
+
+def fuse_map_into_reduce(
+    operations: Operations, inner: MapASTOperation, reduce: ReduceASTOperation
+) -> int:
+    """Returns a function that applies the function of the map to the element and
+    then the function of the reduce."""
+    first: NadaFunctionASTOperation = operations[inner.fn]
+    second: NadaFunctionASTOperation = operations[reduce.fn]
+    accumulator = operations[second.args[0]]
+    element = operations[second.args[1]]
+    element_type = operations[first.args[0]].ty
+    return new_function(
+        operations,
+        f"{first.name}_{second.name}",
+        [
+            (accumulator.name, accumulator.ty, accumulator.source_ref),
+            (element.name, element_type, element.source_ref),
+        ],
+        lambda args: inline_function(
+            operations,
+            second,
+            {
+                second.args[0]: args[0],
+                second.args[1]: inline_function(
+                    operations, first, {first.args[0]: args[1]}
+                ),
+            },
+        ),
+        second.ty,
+        second.source_ref,
+    )
+
+
+class MapFusion(Pass):
+    """Fuses maps into the map or reduce that uses their result.
+
+    A map is only fused when its result has no other users. Otherwise the function
+    of the map would be evaluated twice, once for the intermediate array and once
+    in the fused function. Functions calling other functions are not fused.
+    """
+
+    name = "map_fusion"
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        uses = graph.use_counts()
+        changed = False
+        for operation_id in graph.postorder():
+            operation = graph.operations[operation_id]
+            if not isinstance(operation, (MapASTOperation, ReduceASTOperation)):
+                continue
+            inner = fusable_map(graph.operations, operation.child, uses)
+            if inner is None or calls_functions(
+                graph.operations, graph.operations[operation.fn]
+            ):
+                continue
+            if isinstance(operation, MapASTOperation):
+                function_id = fuse_maps(graph.operations, inner, operation)
+            else:
+                function_id = fuse_map_into_reduce(graph.operations, inner, operation)
+            graph.operations[operation_id] = replace(
+                operation, child=inner.child, fn=function_id
+            )
+            statistics.note(operation.source_ref, "map fused into its user")
+            changed = True
+        if changed:
+            graph.sweep()
+        return changed
@@ -0,0 +1,186 @@
+"""
+Rebalancing of associative chains.
+
+Python evaluates `a * b * c * d` and `sum(values)` from left to right, which
+builds linear chains of binary operations. A chain of `n` secret multiplications
+needs `n - 1` communication rounds, while a balanced tree of the same operations
+needs `ceil(log2(n))`.
+"""
+
+from dataclasses import replace
+import math
+from typing import Dict, List, Tuple
+
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.ast_util import (
+    BinaryASTOperation,
+    type_key,
+)
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.passes.manager import Pass, PassStatistics
+from nada_dsl.passes.rewrite import Operations, is_public, new_binary
+
+# Associative and commutative operations
+ASSOCIATIVE_VARIANTS = (
+    proto_op.BinaryOperationVariant.ADDITION,
+    proto_op.BinaryOperationVariant.MULTIPLICATION,
+    proto_op.BinaryOperationVariant.BOOL_AND,
+    proto_op.BinaryOperationVariant.BOOL_OR,
+    proto_op.BinaryOperationVariant.BOOL_XOR,
+)
+
+# Operations that need a communication round when both operands are secret
+ROUND_VARIANTS = (
+    proto_op.BinaryOperationVariant.MULTIPLICATION,
+    proto_op.BinaryOperationVariant.BOOL_AND,
+    proto_op.BinaryOperationVariant.BOOL_OR,
+)
+
+
+def is_round(operations: Operations, operation_id: int) -> bool:
+    """Returns True if the operation is a multiplication of two secret values."""
+    operation = operations[operation_id]
+    return (
+        isinstance(operation, BinaryASTOperation)
+        and operation.variant in ROUND_VARIANTS
+        and not is_public(operations[operation.left].ty)
+        and not is_public(operations[operation.right].ty)
+    )
+
+
+def round_depth(graph: ProgramGraph) -> int:
+    """Returns the largest number of multiplications of secret values along
+    a path of the program graph."""
+    depths: Dict[int, int] = {}
+    for operation_id in graph.postorder():
+        children = graph.operations[operation_id].child_operations()
+        depth = max((depths.get(child, 0) for child in children), default=0)
+        depths[operation_id] = depth + (
+            1 if is_round(graph.operations, operation_id) else 0
+        )
+    return max(depths.values(), default=0)
+
+
+def in_chain(
+    operations: Operations,
+    operation_id: int,
+    variant: int,
+    ty: str | bytes,
+    uses: Dict[int, int],
+) -> bool:
+    """Returns True if the operation can be part of a chain of the given variant
+    and type, other than its root."""
+    operation = operations[operation_id]
+    return (
+        isinstance(operation, BinaryASTOperation)
+        and operation.variant == variant
+        and type_key(operation.ty) == ty
+        and uses.get(operation_id, 0) == 1
+    )
+
+
+def chain_leaves(
+    operations: Operations, operation: BinaryASTOperation, uses: Dict[int, int]
+) -> Tuple[List[int], int]:
+    """Returns the operands of the maximal chain rooted at the operation, from left
+    to right, and the depth of the chain.
+
+    Children with the same variant and type that are not used anywhere else are part
+    of the chain, any other child is an operand.
+    """
+    ty = type_key(operation.ty)
+    leaves = []
+    depth = 0
+    stack = [(operation.right, 1), (operation.left, 1)]
+    while len(stack) > 0:
+        operation_id, level = stack.pop()
+        if in_chain(operations, operation_id, operation.variant, ty, uses):
+            child = operations[operation_id]
+            stack.append((child.right, level + 1))
+            stack.append((child.left, level + 1))
+        else:
+            leaves.append(operation_id)
+            depth = max(depth, level)
+    return leaves, depth
+
+
+def balanced_tree(
+    operations: Operations, operation: BinaryASTOperation, leaves: List[int]
+) -> Tuple[int, int]:
+    """Combines the operands in a balanced tree, keeping their order.
+
+    Returns the left and right children of the root of the tree.
+    """
+    level = leaves
+    while len(level) > 2:
+        next_level = [
+            new_binary(
+                operations,
+                operation.variant,
+                level[index],
+                level[index + 1],
+                operation.ty,
+                operation.source_ref,
+            )
+            for index in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2 == 1:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0], level[1]
+
+
+class ChainRebalancing(Pass):
+    """Rebuilds chains of the same associative operation as balanced trees.
+
+    A chain is a tree of binary operations of the same variant and type, where
+    every operation except the root is used once. Intermediate results used by
+    other operations are kept as operands of the chain. Only chains whose operands
+    all have the type of the chain are rebalanced, so the intermediate results keep
+    a valid type.
+
+    The round depth of the program (see `round_depth`) before and after the pass is
+    reported in the metrics.
+    """
+
+    name = "chain_rebalancing"
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        statistics.metrics.setdefault("round_depth_before", round_depth(graph))
+        users = graph.users()
+        uses = graph.use_counts()
+        changed = False
+        for operation_id in graph.postorder():
+            operation = graph.operations[operation_id]
+            if (
+                not isinstance(operation, BinaryASTOperation)
+                or operation.variant not in ASSOCIATIVE_VARIANTS
+            ):
+                continue
+            ty = type_key(operation.ty)
+            user = (
+                graph.operations[users[operation_id][0]]
+                if operation_id in users
+                else None
+            )
+            if (
+                in_chain(graph.operations, operation_id, operation.variant, ty, uses)
+                and isinstance(user, BinaryASTOperation)
+                and user.variant == operation.variant
+                and type_key(user.ty) == ty
+            ):
+                # The operation is part of the chain of its user
+                continue
+            leaves, depth = chain_leaves(graph.operations, operation, uses)
+            if depth <= math.ceil(math.log2(len(leaves))):
+                continue
+            if any(type_key(graph.operations[leaf].ty) != ty for leaf in leaves):
+                continue
+            left, right = balanced_tree(graph.operations, operation, leaves)
+            graph.operations[operation_id] = replace(operation, left=left, right=right)
+            changed = True
+        if changed:
+            graph.sweep()
+        statistics.metrics["round_depth_after"] = round_depth(graph)
+        return changed
@@ -0,0 +1,239 @@
+"""
+Helpers to inspect and build operations in optimization passes.
+
+The helpers read and write the operations of the program graph the passes run on
+(see `nada_dsl.compiler_frontend.ProgramGraph.operations`), never `AST_OPERATIONS`.
+"""
+
+from dataclasses import replace
+from typing import Callable, Dict, List, MutableMapping, Optional, Tuple
+
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+from nada_mir_proto.nillion.nada.types import v1 as proto_ty
+
+from nada_dsl.ast_util import (
+    ASTOperation,
+    BinaryASTOperation,
+    LiteralASTOperation,
+    MapASTOperation,
+    NadaFunctionArgASTOperation,
+    NadaFunctionASTOperation,
+    OperationId,
+    ReduceASTOperation,
+    UnaryASTOperation,
+    replace_children,
+    type_key,
+)
+from nada_dsl.source_ref import SourceRef
+
+# Types of the values that are known by all the parties
+PUBLIC_TYPES = ("integer", "unsigned_integer", "boolean")
+
+# Operations of a program graph, by identifier
+Operations = MutableMapping[int, ASTOperation]
+
+
+def is_literal(operations: Operations, operation_id: int, value: object) -> bool:
+    """Returns True if the operation is a literal with the given value.
+
+    The value has to be of the same Python type, so `True` is not considered equal to `1`.
+    """
+    operation = operations[operation_id]
+    return (
+        isinstance(operation, LiteralASTOperation)
+        and type(operation.value) is type(value)
+        and operation.value == value
+    )
+
+
+def literal_of(
+    operations: Operations, operation_id: int
+) -> Optional[LiteralASTOperation]:
+    """Returns the operation if it is a literal, None otherwise."""
+    operation = operations[operation_id]
+    if isinstance(operation, LiteralASTOperation):
+        return operation
+    return None
+
+
+def is_public(ty: proto_ty.NadaType) -> bool:
+    """Returns True if the values of the type are public."""
+    return type_key(ty) in PUBLIC_TYPES
+
+
+def same_type(operations: Operations, first_id: int, second_id: int) -> bool:
+    """Returns True if both operations have the same type."""
+    return type_key(operations[first_id].ty) == type_key(operations[second_id].ty)
+
+
+def new_literal(
+    operations: Operations, value: object, ty: proto_ty.NadaType, source_ref: SourceRef
+) -> int:
+    """Adds a literal to the operations and returns its identifier."""
+    operation_id = OperationId.next()
+    operations[operation_id] = LiteralASTOperation(
+        id=operation_id, source_ref=source_ref, ty=ty, name="Literal", value=value
+    )
+    return operation_id
+
+
+def new_binary(
+    operations: Operations,
+    variant: proto_op.BinaryOperationVariant,
+    left: int,
+    right: int,
+    ty: proto_ty.NadaType,
+    source_ref: SourceRef,
+) -> int:
+    """Adds a binary operation to the operations and returns its identifier."""
+    operation_id = OperationId.next()
+    operations[operation_id] = BinaryASTOperation(
+        id=operation_id,
+        source_ref=source_ref,
+        ty=ty,
+        variant=variant,
+        left=left,
+        right=right,
+    )
+    return operation_id
+
+
+def new_unary(
+    operations: Operations,
+    variant: proto_op.UnaryOperationVariant,
+    child: int,
+    ty: proto_ty.NadaType,
+    source_ref: SourceRef,
+) -> int:
+    """Adds a unary operation to the operations and returns its identifier."""
+    operation_id = OperationId.next()
+    operations[operation_id] = UnaryASTOperation(
+        id=operation_id, source_ref=source_ref, ty=ty, variant=variant, child=child
+    )
+    return operation_id
+
+
+def postorder(operations: Operations, operation_id: int) -> List[int]:
+    """Returns the identifiers of the operations in the tree rooted at the given
+    operation, every operation after its children."""
+    order = []
+    visited = set()
+    stack = [(operation_id, False)]
+    while len(stack) > 0:
+        current_id, children_done = stack.pop()
+        if children_done:
+            order.append(current_id)
+            continue
+        if current_id in visited:
+            continue
+        visited.add(current_id)
+        stack.append((current_id, True))
+        stack.extend(
+            (child, False)
+            for child in reversed(operations[current_id].child_operations())
+            if child not in visited
+        )
+    return order
+
+
+def calls_functions(operations: Operations, function: NadaFunctionASTOperation) -> bool:
+    """Returns True if the body of the function has map or reduce operations."""
+    return any(
+        isinstance(operations[operation_id], (MapASTOperation, ReduceASTOperation))
+        for operation_id in postorder(operations, function.child)
+    )
+
+
+def inline_function(
+    operations: Operations,
+    function: NadaFunctionASTOperation,
+    arguments: Dict[int, int],
+) -> int:
+    """Copies the body of a function replacing its arguments by the given operations.
+
+    Only the operations that depend on the arguments are copied, the operations
+    captured from outside the function are shared. The copies keep the source
+    references of the original operations.
+
+    Arguments
+    ---------
+    operations: Operations
+        The operations of the program, updated with the copies
+    function: NadaFunctionASTOperation
+        The function
+    arguments: Dict[int, int]
+        The operation replacing every argument, by argument identifier
+
+    Returns
+    -------
+    int
+        The identifier of the operation computing the result of the function
+    """
+    copies = dict(arguments)
+    for operation_id in postorder(operations, function.child):
+        if operation_id in copies:
+            continue
+        operation = operations[operation_id]
+        updated = replace_children(operation, copies)
+        if updated is not operation:
+            copy_id = OperationId.next()
+            operations[copy_id] = replace(updated, id=copy_id)
+            copies[operation_id] = copy_id
+    return copies.get(function.child, function.child)
+
+
+def new_function(
+    operations: Operations,
+    name: str,
+    args: List[Tuple[str, proto_ty.NadaType, SourceRef]],
+    build_body: Callable[[List[int]], int],
+    ty: proto_ty.NadaType,
+    source_ref: SourceRef,
+) -> int:
+    """Adds a function to the operations and returns its identifier.
+
+    Arguments
+    ---------
+    operations: Operations
+        The operations of the program, updated with the function and its arguments
+    name: str
+        The name of the function
+    args: List[Tuple[str, proto_ty.NadaType, SourceRef]]
+        The name, type and source reference of every argument
+    build_body: Callable[[List[int]], int]
+        Builds the body of the function from the identifiers of its arguments and
+        returns the identifier of the operation computing its result
+    ty: proto_ty.NadaType
+        The return type of the function
+    source_ref: SourceRef
+        The source reference of the function
+    """
+    function_id = OperationId.next()
+    arg_ids = []
+    for arg_name, arg_ty, arg_source_ref in args:
+        arg_id = OperationId.next()
+        operations[arg_id] = NadaFunctionArgASTOperation(
+            id=arg_id,
+            source_ref=arg_source_ref,
+            ty=arg_ty,
+            name=arg_name,
+            fn=function_id,
+        )
+        arg_ids.append(arg_id)
+    operations[function_id] = NadaFunctionASTOperation(
+        id=function_id,
+        source_ref=source_ref,
+        ty=ty,
+        name=name,
+        args=arg_ids,
+        child=build_body(arg_ids),
+    )
+    return function_id
+
+
+def copy_operation(operations: Operations, operation: ASTOperation, **changes) -> int:
+    """Adds a copy of the operation with the given changes to the operations and
+    returns the identifier of the copy."""
+    operation_id = OperationId.next()
+    operations[operation_id] = replace(operation, id=operation_id, **changes)
+    return operation_id
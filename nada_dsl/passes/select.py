@@ -0,0 +1,208 @@
+"""
+If-else simplification.
+
+The rules are applied to every if-else operation, after its children have been
+simplified. Every rule either returns the identifier of the operation that replaces
+the if-else, or None when it does not apply. Branches are only replaced when they
+have the type of the if-else.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.ast_util import (
+    BinaryASTOperation,
+    IfElseASTOperation,
+    UnaryASTOperation,
+    replace_children,
+    type_key,
+)
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.passes.manager import Pass, PassStatistics
+from nada_dsl.passes.rewrite import (
+    Operations,
+    copy_operation,
+    is_literal,
+    is_public,
+    new_binary,
+    same_type,
+)
+
+# Binary operations whose operands can be swapped
+COMMUTATIVE_VARIANTS = (
+    proto_op.BinaryOperationVariant.ADDITION,
+    proto_op.BinaryOperationVariant.MULTIPLICATION,
+)
+
+
+def same_branches(
+    operations: Operations, operation: IfElseASTOperation, _uses
+) -> Optional[int]:
+    """`c ? x : x = x`"""
+    if operation.true_branch_child == operation.false_branch_child and same_type(
+        operations, operation.id, operation.true_branch_child
+    ):
+        return operation.true_branch_child
+    return None
+
+
+def literal_condition(
+    operations: Operations, operation: IfElseASTOperation, _uses
+) -> Optional[int]:
+    """`True ? x : y = x` and `False ? x : y = y`"""
+    if is_literal(operations, operation.condition, True):
+        branch = operation.true_branch_child
+    elif is_literal(operations, operation.condition, False):
+        branch = operation.false_branch_child
+    else:
+        return None
+    return branch if same_type(operations, operation.id, branch) else None
+
+
+def negated_condition(
+    operations: Operations, operation: IfElseASTOperation, _uses
+) -> Optional[int]:
+    """`~c ? x : y = c ? y : x`"""
+    condition = operations[operation.condition]
+    if (
+        isinstance(condition, UnaryASTOperation)
+        and condition.variant == proto_op.UnaryOperationVariant.NOT
+    ):
+        return copy_operation(
+            operations,
+            operation,
+            condition=condition.child,
+            true_branch_child=operation.false_branch_child,
+            false_branch_child=operation.true_branch_child,
+        )
+    return None
+
+
+def nested_condition(
+    operations: Operations, operation: IfElseASTOperation, _uses
+) -> Optional[int]:
+    """`c ? (c ? x : y) : z = c ? x : z` and `c ? x : (c ? y : z) = c ? x : z`"""
+    true_branch = operations[operation.true_branch_child]
+    if (
+        isinstance(true_branch, IfElseASTOperation)
+        and true_branch.condition == operation.condition
+        and same_type(operations, true_branch.id, true_branch.true_branch_child)
+    ):
+        return copy_operation(
+            operations, operation, true_branch_child=true_branch.true_branch_child
+        )
+    false_branch = operations[operation.false_branch_child]
+    if (
+        isinstance(false_branch, IfElseASTOperation)
+        and false_branch.condition == operation.condition
+        and same_type(operations, false_branch.id, false_branch.false_branch_child)
+    ):
+        return copy_operation(
+            operations, operation, false_branch_child=false_branch.false_branch_child
+        )
+    return None
+
+
+def common_operand(
+    first: BinaryASTOperation, second: BinaryASTOperation
+) -> Optional[Tuple[int, int, int, bool]]:
+    """Returns the operand shared by two binary operations of the same variant, their
+    other operands and whether the shared operand is on the left side, or None."""
+    if first.variant != second.variant:
+        return None
+    if first.left == second.left:
+        return first.left, first.right, second.right, True
+    if first.right == second.right:
+        return first.right, first.left, second.left, False
+    if first.variant in COMMUTATIVE_VARIANTS:
+        if first.left == second.right:
+            return first.left, first.right, second.left, True
+        if first.right == second.left:
+            return first.right, first.left, second.right, True
+    return None
+
+
+def factor_public_select(
+    operations: Operations, operation: IfElseASTOperation, uses: Dict[int, int]
+) -> Optional[int]:
+    """`c ? (a op x) : (a op y) = a op (c ? x : y)` when `c`, `x` and `y` are public.
+
+    The select is evaluated on public data and the operation on `a` is computed once.
+    Both branches have to be used only by the if-else, otherwise they are still
+    computed.
+    """
+    if not is_public(operations[operation.condition].ty):
+        return None
+    true_branch = operations[operation.true_branch_child]
+    false_branch = operations[operation.false_branch_child]
+    if not isinstance(true_branch, BinaryASTOperation) or not isinstance(
+        false_branch, BinaryASTOperation
+    ):
+        return None
+    if (
+        uses.get(true_branch.id, 0) != 1
+        or uses.get(false_branch.id, 0) != 1
+        or not same_type(operations, operation.id, true_branch.id)
+        or not same_type(operations, operation.id, false_branch.id)
+    ):
+        return None
+    factored = common_operand(true_branch, false_branch)
+    if factored is None:
+        return None
+    shared, true_operand, false_operand, shared_left = factored
+    if not is_public(operations[true_operand].ty) or type_key(
+        operations[true_operand].ty
+    ) != type_key(operations[false_operand].ty):
+        return None
+    select = copy_operation(
+        operations,
+        operation,
+        ty=operations[true_operand].ty,
+        true_branch_child=true_operand,
+        false_branch_child=false_operand,
+    )
+    left, right = (shared, select) if shared_left else (select, shared)
+    return new_binary(
+        operations, true_branch.variant, left, right, operation.ty, operation.source_ref
+    )
+
+
+# Rules, in application order
+RULES = [
+    same_branches,
+    literal_condition,
+    negated_condition,
+    nested_condition,
+    factor_public_select,
+]
+
+
+class SelectSimplification(Pass):
+    """Removes degenerate if-else operations, merges nested if-else operations on
+    the same condition and factors the common operation out of the branches of
+    if-else operations on public conditions.
+
+    See the module documentation for the rules.
+    """
+
+    name = "select_simplification"
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        uses = graph.use_counts()
+        replacements: Dict[int, int] = {}
+        for operation_id in graph.postorder():
+            operation = graph.operations[operation_id]
+            updated = replace_children(operation, replacements)
+            if updated is not operation:
+                graph.operations[operation_id] = updated
+            if not isinstance(updated, IfElseASTOperation):
+                continue
+            for rule in RULES:
+                replacement = rule(graph.operations, updated, uses)
+                if replacement is not None:
+                    replacements[operation_id] = replacement
+                    uses[replacement] = uses.get(operation_id, 0)
+                    break
+        graph.replace_operations(replacements)
+        return len(replacements) > 0
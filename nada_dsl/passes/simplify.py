@@ -0,0 +1,257 @@
+"""
+Algebraic simplification.
+
+The rules are applied to every operation, after its children have been simplified.
+Every rule either returns the identifier of the operation that replaces the
+simplified one, or None when it does not apply. The operations built by the rules
+keep the source reference of the operation they replace.
+
+Rules that replace an operation by a literal only apply when the operation has
+a public type, because a literal cannot take the place of a secret value.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.ast_util import (
+    BinaryASTOperation,
+    UnaryASTOperation,
+    replace_children,
+)
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.passes.manager import Pass, PassStatistics
+from nada_dsl.passes.rewrite import (
+    Operations,
+    is_literal,
+    is_public,
+    literal_of,
+    new_binary,
+    new_literal,
+    same_type,
+)
+
+Rule = Callable[[Operations, BinaryASTOperation], Optional[int]]
+
+
+def neutral_element(
+    operations: Operations, operation: BinaryASTOperation, value: object
+) -> Optional[int]:
+    """`x op e = e op x = x` when `e` is the neutral element of `op`."""
+    if is_literal(operations, operation.right, value) and same_type(
+        operations, operation.id, operation.left
+    ):
+        return operation.left
+    if is_literal(operations, operation.left, value) and same_type(
+        operations, operation.id, operation.right
+    ):
+        return operation.right
+    return None
+
+
+def absorbing_element(
+    operations: Operations, operation: BinaryASTOperation, value: object
+) -> Optional[int]:
+    """`x op a = a op x = a` when `a` is the absorbing element of `op`."""
+    if not is_public(operation.ty):
+        return None
+    if is_literal(operations, operation.left, value) or is_literal(
+        operations, operation.right, value
+    ):
+        return new_literal(operations, value, operation.ty, operation.source_ref)
+    return None
+
+
+def add_zero(operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x + 0 = 0 + x = x`"""
+    return neutral_element(operations, operation, 0)
+
+
+def subtract_zero(
+    operations: Operations, operation: BinaryASTOperation
+) -> Optional[int]:
+    """`x - 0 = x`"""
+    if is_literal(operations, operation.right, 0) and same_type(
+        operations, operation.id, operation.left
+    ):
+        return operation.left
+    return None
+
+
+def subtract_self(
+    operations: Operations, operation: BinaryASTOperation
+) -> Optional[int]:
+    """`x - x = 0`"""
+    if operation.left == operation.right and is_public(operation.ty):
+        return new_literal(operations, 0, operation.ty, operation.source_ref)
+    return None
+
+
+def multiply_one(
+    operations: Operations, operation: BinaryASTOperation
+) -> Optional[int]:
+    """`x * 1 = 1 * x = x`"""
+    return neutral_element(operations, operation, 1)
+
+
+def multiply_zero(
+    operations: Operations, operation: BinaryASTOperation
+) -> Optional[int]:
+    """`x * 0 = 0 * x = 0`"""
+    return absorbing_element(operations, operation, 0)
+
+
+def divide_one(operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x / 1 = x`"""
+    if is_literal(operations, operation.right, 1) and same_type(
+        operations, operation.id, operation.left
+    ):
+        return operation.left
+    return None
+
+
+def reassociate_constants(
+    operations: Operations, operation: BinaryASTOperation
+) -> Optional[int]:
+    """`(x op c1) op c2 = x op (c1 op c2)` for associative and commutative operations
+    where `c1` and `c2` are literals of the same type."""
+    outer_literal = literal_of(operations, operation.right)
+    inner = operations[operation.left]
+    if outer_literal is None:
+        outer_literal = literal_of(operations, operation.left)
+        inner = operations[operation.right]
+    if (
+        outer_literal is None
+        or not isinstance(inner, BinaryASTOperation)
+        or inner.variant != operation.variant
+    ):
+        return None
+    inner_literal = literal_of(operations, inner.right)
+    term = inner.left
+    if inner_literal is None:
+        inner_literal = literal_of(operations, inner.left)
+        term = inner.right
+    if inner_literal is None or not same_type(
+        operations, inner_literal.id, outer_literal.id
+    ):
+        return None
+    if operation.variant == proto_op.BinaryOperationVariant.ADDITION:
+        value = inner_literal.value + outer_literal.value
+    else:
+        value = inner_literal.value * outer_literal.value
+    literal = new_literal(operations, value, outer_literal.ty, operation.source_ref)
+    return new_binary(
+        operations, operation.variant, term, literal, operation.ty, operation.source_ref
+    )
+
+
+def and_true(operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x & True = True & x = x`"""
+    return neutral_element(operations, operation, True)
+
+
+def and_false(operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x & False = False & x = False`"""
+    return absorbing_element(operations, operation, False)
+
+
+def or_false(operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x | False = False | x = x`"""
+    return neutral_element(operations, operation, False)
+
+
+def or_true(operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x | True = True | x = True`"""
+    return absorbing_element(operations, operation, True)
+
+
+def idempotent(_operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x & x = x | x = x`"""
+    if operation.left == operation.right:
+        return operation.left
+    return None
+
+
+def xor_false(operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x ^ False = False ^ x = x`"""
+    return neutral_element(operations, operation, False)
+
+
+def xor_self(operations: Operations, operation: BinaryASTOperation) -> Optional[int]:
+    """`x ^ x = False`"""
+    if operation.left == operation.right and is_public(operation.ty):
+        return new_literal(operations, False, operation.ty, operation.source_ref)
+    return None
+
+
+def double_not(operations: Operations, operation: UnaryASTOperation) -> Optional[int]:
+    """`~~x = x`"""
+    child = operations[operation.child]
+    if (
+        isinstance(child, UnaryASTOperation)
+        and child.variant == proto_op.UnaryOperationVariant.NOT
+    ):
+        return child.child
+    return None
+
+
+# Rules of every binary operation variant, in application order
+BINARY_RULES: Dict[proto_op.BinaryOperationVariant, List[Rule]] = {
+    proto_op.BinaryOperationVariant.ADDITION: [add_zero, reassociate_constants],
+    proto_op.BinaryOperationVariant.SUBTRACTION: [subtract_zero, subtract_self],
+    proto_op.BinaryOperationVariant.MULTIPLICATION: [
+        multiply_one,
+        multiply_zero,
+        reassociate_constants,
+    ],
+    proto_op.BinaryOperationVariant.DIVISION: [divide_one],
+    proto_op.BinaryOperationVariant.BOOL_AND: [and_true, and_false, idempotent],
+    proto_op.BinaryOperationVariant.BOOL_OR: [or_false, or_true, idempotent],
+    proto_op.BinaryOperationVariant.BOOL_XOR: [xor_false, xor_self],
+}
+
+# Rules of every unary operation variant, in application order
+UNARY_RULES: Dict[proto_op.UnaryOperationVariant, List[Callable]] = {
+    proto_op.UnaryOperationVariant.NOT: [double_not],
+}
+
+
+def simplify(operations: Operations, operation_id: int) -> Optional[int]:
+    """Applies the first matching rule to an operation.
+
+    Returns the identifier of the operation replacing it, or None if no rule applies.
+    """
+    operation = operations[operation_id]
+    if isinstance(operation, BinaryASTOperation):
+        rules = BINARY_RULES.get(operation.variant, [])
+    elif isinstance(operation, UnaryASTOperation):
+        rules = UNARY_RULES.get(operation.variant, [])
+    else:
+        return None
+    for rule in rules:
+        replacement = rule(operations, operation)
+        if replacement is not None:
+            return replacement
+    return None
+
+
+class AlgebraicSimplification(Pass):
+    """Simplifies arithmetic and boolean identities, and re-associates constant terms.
+
+    See the module documentation for the rules.
+    """
+
+    name = "algebraic_simplification"
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        replacements: Dict[int, int] = {}
+        for operation_id in graph.postorder():
+            operation = graph.operations[operation_id]
+            updated = replace_children(operation, replacements)
+            if updated is not operation:
+                graph.operations[operation_id] = updated
+            replacement = simplify(graph.operations, operation_id)
+            if replacement is not None:
+                replacements[operation_id] = replacements.get(replacement, replacement)
+        graph.replace_operations(replacements)
+        return len(replacements) > 0
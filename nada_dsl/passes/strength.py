@@ -0,0 +1,143 @@
+"""
+Strength reduction of divisions and modulos by powers of two.
+
+Divisions and modulos of secret values are among the most expensive operations.
+When the divisor is a literal power of two `2^k`, they are rewritten as shifts:
+
+- `x / 2^k` is `x >> k` for secret unsigned integers.
+- `x % 2^k` is `x - ((x >> k) << k)` for secret unsigned integers. The left shift
+  is a multiplication by a public constant, which does not need communication.
+
+Signed integers are left alone: the right shift rounds towards minus infinity, so
+it does not compute the same value as the division for negative numbers. When
+probabilistic truncation is explicitly allowed, `x / 2^k` is rewritten as
+`trunc_pr(x, k)` for secret integers. The result can then be one more than the
+floor of the division, with a probability that depends on the value of `x`, which
+is why the rewrite is never applied by default. Modulos of signed integers are
+never rewritten.
+
+Operations on public values are computed locally, so they are left alone too.
+"""
+
+from typing import Dict, Optional
+
+from betterproto.lib.google.protobuf import Empty
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+from nada_mir_proto.nillion.nada.types import v1 as proto_ty
+
+from nada_dsl.ast_util import BinaryASTOperation, type_key
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.passes.manager import Pass, PassStatistics
+from nada_dsl.passes.rewrite import (
+    Operations,
+    literal_of,
+    new_binary,
+    new_literal,
+    same_type,
+)
+
+Variant = proto_op.BinaryOperationVariant
+
+
+def power_of_two_exponent(operations: Operations, operation_id: int) -> Optional[int]:
+    """Returns `k` if the operation is a literal integer `2^k` with `k > 0`,
+    None otherwise."""
+    literal = literal_of(operations, operation_id)
+    if literal is None or type_key(literal.ty) not in ("integer", "unsigned_integer"):
+        return None
+    value = literal.value
+    if value < 2 or value & (value - 1) != 0:
+        return None
+    return value.bit_length() - 1
+
+
+class StrengthReduction(Pass):
+    """Rewrites divisions and modulos of secret values by literal powers of two
+    into shifts.
+
+    See the module documentation for the rewrites and for the cases that are left
+    alone. A note is recorded for every rewrite.
+
+    Arguments
+    ---------
+    probabilistic_truncation: bool
+        Allows rewriting divisions of secret integers into probabilistic truncations,
+        which may round up instead of down
+    """
+
+    name = "strength_reduction"
+
+    def __init__(self, probabilistic_truncation: bool = False):
+        self.probabilistic_truncation = probabilistic_truncation
+
+    def reduce(
+        self, operations: Operations, operation: BinaryASTOperation
+    ) -> Optional[int]:
+        """Returns the identifier of the operation replacing a division or a modulo,
+        or None if it cannot be rewritten. The operations it builds are added to
+        `operations`."""
+        if operation.variant not in (Variant.DIVISION, Variant.MODULO):
+            return None
+        exponent = power_of_two_exponent(operations, operation.right)
+        if exponent is None or not same_type(operations, operation.id, operation.left):
+            return None
+        operand_type = type_key(operation.ty)
+        if operand_type == "secret_unsigned_integer":
+            variant = Variant.RIGHT_SHIFT
+        elif (
+            operand_type == "secret_integer"
+            and operation.variant == Variant.DIVISION
+            and self.probabilistic_truncation
+        ):
+            variant = Variant.TRUNC_PR
+        else:
+            return None
+        amount = new_literal(
+            operations,
+            exponent,
+            proto_ty.NadaType(unsigned_integer=Empty()),
+            operation.source_ref,
+        )
+        quotient = new_binary(
+            operations,
+            variant,
+            operation.left,
+            amount,
+            operation.ty,
+            operation.source_ref,
+        )
+        if operation.variant == Variant.DIVISION:
+            return quotient
+        multiple = new_binary(
+            operations,
+            Variant.LEFT_SHIFT,
+            quotient,
+            amount,
+            operation.ty,
+            operation.source_ref,
+        )
+        return new_binary(
+            operations,
+            Variant.SUBTRACTION,
+            operation.left,
+            multiple,
+            operation.ty,
+            operation.source_ref,
+        )
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        replacements: Dict[int, int] = {}
+        for operation_id in graph.all_operation_ids():
+            operation = graph.operations[operation_id]
+            if not isinstance(operation, BinaryASTOperation):
+                continue
+            replacement = self.reduce(graph.operations, operation)
+            if replacement is not None:
+                replacements[operation_id] = replacement
+                statistics.note(
+                    operation.source_ref,
+                    f"{operation.variant.name.lower()} by a power of two "
+                    "strength reduced",
+                )
+        graph.replace_operations(replacements)
+        return len(replacements) > 0
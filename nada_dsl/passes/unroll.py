@@ -0,0 +1,160 @@
+"""
+Unrolling of reduce operations over small arrays.
+
+A reduce operation applies its function to the elements of the array one after
+the other, so its depth grows with the size of the array: `reduce(f, [x0, x1, x2],
+init)` is `f(f(f(init, x0), x1), x2)`. When `f` is associative, the same value is
+computed by `f(f(init, x0), f(x1, x2))`, and in general by a balanced tree of `f`
+applied to the initial value and the elements of the array. The body of the
+function is inlined at every node of the tree.
+
+The functions that are known to be associative are the ones whose body is:
+
+- an addition, a multiplication or a boolean and, or, xor of both arguments,
+- a minimum or a maximum: `a < b ? a : b`, or any other comparison of both
+  arguments selecting one of them.
+
+All these functions are also commutative, so the order of the arguments in the body
+does not matter.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+import betterproto
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.ast_util import (
+    ArrayAccessorASTOperation,
+    BinaryASTOperation,
+    IfElseASTOperation,
+    NadaFunctionASTOperation,
+    OperationId,
+    ReduceASTOperation,
+    type_key,
+)
+from nada_dsl.compiler_frontend import ProgramGraph
+from nada_dsl.passes.manager import Pass, PassStatistics
+from nada_dsl.passes.rebalance import ASSOCIATIVE_VARIANTS
+from nada_dsl.passes.rewrite import Operations, inline_function
+
+# Comparisons that select the minimum or the maximum of their operands
+COMPARISON_VARIANTS = (
+    proto_op.BinaryOperationVariant.LESS_THAN,
+    proto_op.BinaryOperationVariant.LESS_EQ,
+    proto_op.BinaryOperationVariant.GREATER_THAN,
+    proto_op.BinaryOperationVariant.GREATER_EQ,
+)
+
+
+def uses_both_arguments(first: int, second: int, args: List[int]) -> bool:
+    """Returns True if the operations are the two arguments of a function, in any
+    order."""
+    return {first, second} == set(args) and first != second
+
+
+def is_associative(operations: Operations, function: NadaFunctionASTOperation) -> bool:
+    """Returns True if the function is an associative operation of its two
+    arguments of the same type as its result."""
+    if len(function.args) != 2 or any(
+        type_key(operations[arg].ty) != type_key(function.ty) for arg in function.args
+    ):
+        return False
+    body = operations[function.child]
+    if isinstance(body, BinaryASTOperation):
+        return body.variant in ASSOCIATIVE_VARIANTS and uses_both_arguments(
+            body.left, body.right, function.args
+        )
+    if isinstance(body, IfElseASTOperation):
+        condition = operations[body.condition]
+        return (
+            isinstance(condition, BinaryASTOperation)
+            and condition.variant in COMPARISON_VARIANTS
+            and uses_both_arguments(condition.left, condition.right, function.args)
+            and uses_both_arguments(
+                body.true_branch_child, body.false_branch_child, function.args
+            )
+        )
+    return False
+
+
+def combine_balanced(operands: List[int], combine: Callable[[int, int], int]) -> int:
+    """Combines the operands in a balanced tree, keeping their order, and returns
+    the root of the tree."""
+    level = operands
+    while len(level) > 1:
+        next_level = [
+            combine(level[index], level[index + 1])
+            for index in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2 == 1:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0]
+
+
+class ReduceUnrolling(Pass):
+    """Unrolls the reduce operations over small arrays whose function is associative
+    into a balanced tree.
+
+    The elements of the array are read with array accessors. See the module
+    documentation for the functions that are unrolled. A note is recorded for every
+    unrolled reduce.
+
+    Arguments
+    ---------
+    max_size: int
+        The size of the largest array whose reduce operations are unrolled
+    """
+
+    name = "reduce_unrolling"
+
+    def __init__(self, max_size: int = 16):
+        self.max_size = max_size
+
+    def unroll(
+        self, operations: Operations, operation: ReduceASTOperation
+    ) -> Optional[int]:
+        """Returns the identifier of the operation replacing the reduce, or None if
+        it cannot be unrolled. The operations it builds are added to `operations`."""
+        array_type = operations[operation.child].ty
+        name, array = betterproto.which_one_of(array_type, "nada_type")
+        if name != "array" or not 0 < array.size <= self.max_size:
+            return None
+        function = operations[operation.fn]
+        if (
+            not is_associative(operations, function)
+            or type_key(array.contained_type) != type_key(function.ty)
+            or type_key(operations[operation.initial].ty) != type_key(function.ty)
+        ):
+            return None
+        operands = [operation.initial]
+        for index in range(array.size):
+            accessor_id = OperationId.next()
+            operations[accessor_id] = ArrayAccessorASTOperation(
+                id=accessor_id,
+                source_ref=operation.source_ref,
+                ty=array.contained_type,
+                index=index,
+                source=operation.child,
+            )
+            operands.append(accessor_id)
+        acc, element = function.args
+        return combine_balanced(
+            operands,
+            lambda left, right: inline_function(
+                operations, function, {acc: left, element: right}
+            ),
+        )
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        replacements: Dict[int, int] = {}
+        for operation_id in graph.all_operation_ids():
+            operation = graph.operations[operation_id]
+            if not isinstance(operation, ReduceASTOperation):
+                continue
+            replacement = self.unroll(graph.operations, operation)
+            if replacement is not None:
+                replacements[operation_id] = replacement
+                statistics.note(operation.source_ref, "reduce unrolled")
+        graph.replace_operations(replacements)
+        return len(replacements) > 0
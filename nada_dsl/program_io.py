@@ -78,7 +78,7 @@ class Literal(DslType):
     def store_in_ast(self, ty: proto_ty.NadaType):
         """Store object in AST"""
         AST_OPERATIONS[self.id] = LiteralASTOperation(
-            operation_id=self.id,
+            id=self.id,
             name=self.__class__.__name__,
             ty=ty,
             value=self.value,
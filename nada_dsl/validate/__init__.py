@@ -0,0 +1,465 @@
+"""
+Structural validation of compiled programs (MIR).
+
+A malformed MIR is otherwise only discovered when it is run by the nodes. The
+validator checks that:
+
+- the operands of every operation, the outputs and the return values of the
+  functions refer to existing operations, without cycles,
+- the operands of binary operations have consistent types,
+- `map` and `reduce` refer to existing functions with the expected number of
+  arguments,
+- `input_ref`, `literal_ref` and `arg_ref` refer to existing inputs, literals and
+  function arguments,
+- the source reference indexes are in range.
+
+Every operation and every operand is visited a constant number of times, so the
+validation is linear in the size of the MIR and runs on every compilation (see
+`nada_dsl.compiler_frontend.nada_compile`). A serialized program can be validated
+while it is read, without building it in memory (see `validate_stream`), e.g. with:
+
+    python -m nada_dsl.validate program.nada.bin
+"""
+
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import betterproto
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+from nada_mir_proto.nillion.nada.types import v1 as proto_ty
+
+from nada_dsl.errors import MirValidationError
+from nada_dsl.mir_stream import read_elements
+from nada_dsl.mir_util import operation_children, type_kind
+from nada_dsl.timer import add_timer
+
+# Families of the scalar types, the operands of most binary operations belong to
+# the same family whatever their secrecy
+TYPE_FAMILIES: Dict[str, str] = {
+    "integer": "integer",
+    "secret_integer": "integer",
+    "unsigned_integer": "unsigned_integer",
+    "secret_unsigned_integer": "unsigned_integer",
+    "boolean": "boolean",
+    "secret_boolean": "boolean",
+}
+
+# Binary operations whose right operand is an unsigned integer, whatever the family
+# of their left operand
+SHIFT_VARIANTS = (
+    proto_op.BinaryOperationVariant.LEFT_SHIFT,
+    proto_op.BinaryOperationVariant.RIGHT_SHIFT,
+    proto_op.BinaryOperationVariant.TRUNC_PR,
+)
+
+# Binary operations whose operands have unrelated types
+UNCHECKED_VARIANTS = (
+    proto_op.BinaryOperationVariant.ZIP,
+    proto_op.BinaryOperationVariant.ECDSA_SIGN,
+    proto_op.BinaryOperationVariant.EDDSA_SIGN,
+)
+
+# Number of arguments of the functions called by `map` and `reduce`
+FUNCTION_ARITIES = {"map": 1, "reduce": 2}
+
+
+@dataclass
+class MirViolation:
+    """A violation of the structure of a compiled program.
+
+    Attributes
+    ----------
+    check: str
+        The name of the check that failed, e.g. `dangling-operand`
+    location: str
+        The element of the program that violates it, e.g. `operation 12 of
+        function inc`
+    message: str
+        The description of the violation
+    """
+
+    check: str
+    location: str
+    message: str
+
+    def __str__(self):
+        return f"{self.location}: {self.message} [{self.check}]"
+
+
+def type_family(ty: proto_ty.NadaType) -> str:
+    """Returns the family of a type: the family of a scalar type, `array of` the
+    family of its elements for an array, and the type variant otherwise."""
+    kind = type_kind(ty)
+    if kind == "array":
+        return "array of " + type_family(ty.array.contained_type)
+    return TYPE_FAMILIES.get(kind, kind)
+
+
+class OperationShape(NamedTuple):
+    """What the checks of a scope need to know of an operation, so that the body of
+    the program does not have to be kept in memory when it is read from a stream.
+
+    Attributes
+    ----------
+    children: List[int]
+        The identifiers of the operands
+    family: str
+        The family of the type of the operation (see `type_family`)
+    binary: Optional[Tuple[proto_op.BinaryOperationVariant, int, int]]
+        The variant and the operands of a binary operation, None otherwise
+    """
+
+    children: List[int]
+    family: str
+    binary: Optional[Tuple[proto_op.BinaryOperationVariant, int, int]]
+
+
+class MirValidator:
+    """Collects the violations of the structure of a compiled program.
+
+    The validator only holds the names of the inputs and literals, the signatures of
+    the functions and the number of source references of the program. The operations
+    are checked one scope at a time.
+    """
+
+    def __init__(
+        self,
+        inputs: Set[str],
+        literals: Set[str],
+        functions: Dict[int, proto_mir.NadaFunction],
+        source_refs: int,
+    ):
+        self.inputs = inputs
+        self.literals = literals
+        self.functions = functions
+        self.source_refs = source_refs
+        self.violations: List[MirViolation] = []
+
+    @classmethod
+    def for_mir(cls, mir: proto_mir.ProgramMir) -> "MirValidator":
+        """Returns a validator of a program held in memory."""
+        return cls(
+            {mir_input.name for mir_input in mir.inputs},
+            {literal.name for literal in mir.literals},
+            {function.id: function for function in mir.functions},
+            len(mir.source_refs),
+        )
+
+    def report(self, check: str, location: str, message: str):
+        """Records a violation."""
+        self.violations.append(MirViolation(check, location, message))
+
+    def check_source_ref(self, index: int, location: str):
+        """Checks that a source reference index is in range."""
+        if index >= self.source_refs:
+            self.report(
+                "source-ref",
+                location,
+                f"source reference {index} is out of range"
+                f" ({self.source_refs} source references)",
+            )
+
+    def check_program(self, mir: proto_mir.ProgramMir):
+        """Checks the operations, outputs, inputs and functions of the program."""
+        operations = self.check_scope(mir.operations, "")
+        for output in mir.outputs:
+            self.check_output(output, operations)
+        for mir_input in mir.inputs:
+            self.check_source_ref(mir_input.source_ref_index, f"input {mir_input.name}")
+        for function in mir.functions:
+            self.check_function(function)
+
+    def check_output(
+        self, output: proto_mir.Output, operations: Dict[int, OperationShape]
+    ):
+        """Checks that an output refers to an operation of the program."""
+        location = f"output {output.name}"
+        self.check_source_ref(output.source_ref_index, location)
+        if output.operation_id not in operations:
+            self.report(
+                "dangling-output",
+                location,
+                f"operation {output.operation_id} does not exist",
+            )
+
+    def check_function(self, function: proto_mir.NadaFunction):
+        """Checks the arguments, the body and the return value of a function."""
+        location = f"function {function.name}"
+        self.check_source_ref(function.source_ref_index, location)
+        for arg in function.args:
+            self.check_source_ref(arg.source_ref_index, location)
+        operations = self.check_scope(
+            function.operations, f" of function {function.name}"
+        )
+        if function.return_operation_id not in operations:
+            self.report(
+                "dangling-return",
+                location,
+                f"operation {function.return_operation_id} does not exist",
+            )
+
+    def check_scope(
+        self, entries: List[proto_mir.OperationMapEntry], scope: str
+    ) -> Dict[int, OperationShape]:
+        """Checks the operations of the program or of the body of a function, and
+        returns their shapes by identifier."""
+        operations: Dict[int, OperationShape] = {}
+        for entry in entries:
+            self.add_operation(operations, entry, scope)
+        self.check_shapes(operations, scope)
+        return operations
+
+    def add_operation(
+        self,
+        operations: Dict[int, OperationShape],
+        entry: proto_mir.OperationMapEntry,
+        scope: str,
+    ):
+        """Checks what can be checked of an operation on its own, and adds its shape
+        to the operations of its scope."""
+        location = f"operation {entry.id}{scope}"
+        if entry.id in operations:
+            self.report(
+                "duplicate-id",
+                location,
+                "the identifier is used by several operations",
+            )
+        operation = entry.operation
+        self.check_source_ref(operation.source_ref_index, location)
+        kind, value = betterproto.which_one_of(operation, "operation")
+        self.check_references(kind, value, location)
+        binary = (value.variant, value.left, value.right) if kind == "binary" else None
+        operations[entry.id] = OperationShape(
+            operation_children(operation), type_family(operation.type), binary
+        )
+
+    def check_shapes(self, operations: Dict[int, OperationShape], scope: str):
+        """Checks the operands of the operations of a scope."""
+        for op_id, shape in operations.items():
+            location = f"operation {op_id}{scope}"
+            for child in shape.children:
+                if child not in operations:
+                    self.report(
+                        "dangling-operand",
+                        location,
+                        f"operand {child} does not exist",
+                    )
+            if shape.binary is not None:
+                variant, left, right = shape.binary
+                if left in operations and right in operations:
+                    self.check_operand_types(
+                        variant,
+                        operations[left].family,
+                        operations[right].family,
+                        location,
+                    )
+        self.check_cycles(operations, scope)
+
+    def check_references(self, kind: str, value, location: str):
+        """Checks the references of an operation to inputs, literals, functions and
+        function arguments."""
+        if kind == "input_ref" and value.refers_to not in self.inputs:
+            self.report("unknown-input", location, f"no input {value.refers_to}")
+        elif kind == "literal_ref" and value.refers_to not in self.literals:
+            self.report("unknown-literal", location, f"no literal {value.refers_to}")
+        elif kind == "arg_ref":
+            self.check_arg_ref(value, location)
+        elif kind in FUNCTION_ARITIES:
+            function = self.functions.get(value.fn)
+            if function is None:
+                self.report("unknown-function", location, f"no function {value.fn}")
+            elif len(function.args) != FUNCTION_ARITIES[kind]:
+                self.report(
+                    "function-arity",
+                    location,
+                    f"{kind} calls {function.name} with {FUNCTION_ARITIES[kind]}"
+                    f" arguments, it has {len(function.args)}",
+                )
+
+    def check_arg_ref(self, arg_ref: proto_op.NadaFunctionArgRef, location: str):
+        """Checks that an argument reference refers to an argument of an existing
+        function. The function is not necessarily the one whose body contains the
+        reference: a nested function can use the arguments of the functions it is
+        defined in."""
+        function = self.functions.get(arg_ref.function_id)
+        if function is None:
+            self.report(
+                "unknown-function", location, f"no function {arg_ref.function_id}"
+            )
+        elif all(arg.name != arg_ref.refers_to for arg in function.args):
+            self.report(
+                "unknown-argument",
+                location,
+                f"function {function.name} has no argument {arg_ref.refers_to}",
+            )
+
+    def check_operand_types(
+        self,
+        variant: proto_op.BinaryOperationVariant,
+        left_family: str,
+        right_family: str,
+        location: str,
+    ):
+        """Checks that the operands of a binary operation have consistent types."""
+        if variant in UNCHECKED_VARIANTS:
+            return
+        if variant in SHIFT_VARIANTS:
+            consistent = (
+                left_family in ("integer", "unsigned_integer")
+                and right_family == "unsigned_integer"
+            )
+        else:
+            consistent = left_family == right_family
+        if not consistent:
+            self.report(
+                "operand-types",
+                location,
+                f"{variant.name} of {left_family} and {right_family}",
+            )
+
+    def check_cycles(self, operations: Dict[int, OperationShape], scope: str):
+        """Checks that the operations do not depend on themselves, with an iterative
+        depth-first search."""
+        done: Set[int] = set()
+        in_progress: Set[int] = set()
+        for start in operations:
+            if start in done:
+                continue
+            in_progress.add(start)
+            stack: List[Tuple[int, Iterator[int]]] = [
+                (start, iter(operations[start].children))
+            ]
+            while len(stack) > 0:
+                op_id, children = stack[-1]
+                child: Optional[int] = next(children, None)
+                if child is None:
+                    stack.pop()
+                    in_progress.discard(op_id)
+                    done.add(op_id)
+                elif child in in_progress:
+                    self.report(
+                        "cycle",
+                        f"operation {op_id}{scope}",
+                        f"operand {child} depends on the operation",
+                    )
+                elif child in operations and child not in done:
+                    in_progress.add(child)
+                    stack.append((child, iter(operations[child].children)))
+
+
+@add_timer(timer_name="nada_dsl.validate.validate_mir")
+def validate_mir(mir: proto_mir.ProgramMir) -> List[MirViolation]:
+    """Checks the structure of a compiled program.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+
+    Returns
+    -------
+    List[MirViolation]
+        The violations of the structure of the program, empty if it is valid
+    """
+    validator = MirValidator.for_mir(mir)
+    validator.check_program(mir)
+    return validator.violations
+
+
+def check_mir(mir: proto_mir.ProgramMir):
+    """Checks the structure of a compiled program.
+
+    Arguments
+    ---------
+    mir: proto_mir.ProgramMir
+        The compiled program
+
+    Raises
+    ------
+    MirValidationError
+        If the program is not valid, with all its violations
+    """
+    violations = validate_mir(mir)
+    if len(violations) > 0:
+        raise MirValidationError(violations)
+
+
+@add_timer(timer_name="nada_dsl.validate.validate_stream")
+def validate_stream(stream: BinaryIO) -> List[MirViolation]:
+    """Checks the structure of a serialized program read from a seekable binary
+    stream, without building the program in memory.
+
+    The stream is read twice: first for the inputs, literals, function signatures
+    and source references the operations refer to, then for the operations. Only the
+    shapes of the operations of the program and the body of one function at a time
+    are kept in memory. The violations are the same as the ones of `validate_mir`,
+    in a possibly different order.
+
+    Arguments
+    ---------
+    stream: BinaryIO
+        The serialized program
+
+    Returns
+    -------
+    List[MirViolation]
+        The violations of the structure of the program, empty if it is valid
+    """
+    start = stream.tell()
+    inputs: Set[str] = set()
+    literals: Set[str] = set()
+    functions: Dict[int, proto_mir.NadaFunction] = {}
+    source_refs = 0
+    for element in read_elements(stream):
+        if element.field == "inputs":
+            inputs.add(proto_mir.Input().parse(element.payload).name)
+        elif element.field == "literals":
+            literals.add(proto_mir.Literal().parse(element.payload).name)
+        elif element.field == "functions":
+            function = proto_mir.NadaFunction().parse(element.payload)
+            function.operations = []
+            functions[function.id] = function
+        elif element.field == "source_refs":
+            source_refs += 1
+
+    validator = MirValidator(inputs, literals, functions, source_refs)
+    operations: Dict[int, OperationShape] = {}
+    outputs: List[proto_mir.Output] = []
+    stream.seek(start)
+    for element in read_elements(stream):
+        if element.field == "operations":
+            entry = proto_mir.OperationMapEntry().parse(element.payload)
+            validator.add_operation(operations, entry, "")
+        elif element.field == "outputs":
+            outputs.append(proto_mir.Output().parse(element.payload))
+        elif element.field == "inputs":
+            mir_input = proto_mir.Input().parse(element.payload)
+            validator.check_source_ref(
+                mir_input.source_ref_index, f"input {mir_input.name}"
+            )
+        elif element.field == "functions":
+            validator.check_function(proto_mir.NadaFunction().parse(element.payload))
+    validator.check_shapes(operations, "")
+    for output in outputs:
+        validator.check_output(output, operations)
+    return validator.violations
+
+
+def check_mir_stream(stream: BinaryIO):
+    """Checks the structure of a serialized program read from a seekable binary
+    stream, without building the program in memory (see `validate_stream`).
+
+    Arguments
+    ---------
+    stream: BinaryIO
+        The serialized program
+
+    Raises
+    ------
+    MirValidationError
+        If the program is not valid, with all its violations
+    """
+    violations = validate_stream(stream)
+    if len(violations) > 0:
+        raise MirValidationError(violations)
@@ -0,0 +1,24 @@
+"""Execute the command line interface entry point."""
+
+import argparse
+import sys
+
+from nada_dsl.validate import validate_stream
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m nada_dsl.validate",
+        description="Checks the structure of a compiled Nada program (MIR).",
+    )
+    parser.add_argument("path", help="compiled program (MIR) path")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as mir_file:
+        violations = validate_stream(mir_file)
+    for violation in violations:
+        print(violation)
+    return 1 if len(violations) > 0 else 0
+
+
+sys.exit(_main())
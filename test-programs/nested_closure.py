@@ -0,0 +1,12 @@
+from nada_dsl import *
+
+
+def nada_main():
+    party = Party(name="party")
+    a = Array(SecretInteger(Input(name="a", party=party)), size=3)
+    b = Array(SecretInteger(Input(name="b", party=party)), size=3)
+
+    def outer(x: SecretInteger) -> SecretInteger:
+        return b.map(lambda y: x * y).reduce(lambda acc, z: acc + z + x, x)
+
+    return [Output(a.map(outer), "out", party)]
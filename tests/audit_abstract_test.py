@@ -0,0 +1,43 @@
+"""
+Nada DSL abstract execution tests.
+"""
+
+from nada_dsl.audit.abstract import cost_summary
+
+
+def test_cost_summary_counts_subtractions_and_negations():
+    source = """
+from nada_dsl import *
+
+def nada_main():
+    party1 = Party(name="Party1")
+    a = SecretInteger(Input(name="a", party=party1))
+    b = PublicInteger(Input(name="b", party=party1))
+
+    c = a - b
+    for _ in range(2):
+        c = c - a * a
+    d = -b
+    e = -(a - a)
+
+    return [Output(c, "c", party1), Output(d, "d", party1), Output(e, "e", party1)]
+"""
+    summary = cost_summary(source)
+
+    assert summary["total"]["secret"]["sub"] == 4
+    assert summary["total"]["secret"]["neg"] == 1
+    assert summary["total"]["secret"]["mul"] == 2
+    assert summary["total"]["public"]["neg"] == 1
+    assert summary["outputs"]["c"]["secret"] == {
+        "add": 0,
+        "sub": 3,
+        "neg": 0,
+        "mul": 2,
+        "cmp": 0,
+        "eq": 0,
+        "ne": 0,
+        "ife": 0,
+    }
+    assert summary["outputs"]["d"]["public"]["neg"] == 1
+    assert summary["outputs"]["e"]["secret"]["sub"] == 1
+    assert summary["outputs"]["e"]["secret"]["neg"] == 1
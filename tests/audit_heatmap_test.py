@@ -0,0 +1,72 @@
+"""
+Nada DSL audit cost heat map tests.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import richreports
+import pytest
+
+from nada_dsl.ast_util import reset_ast
+from nada_dsl.audit.heatmap import heatmap, line_costs
+from nada_dsl.audit.report import html
+from nada_dsl.compile import compile_script
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+
+PROGRAM = """from nada_dsl import *
+
+
+def nada_main():
+    party = Party(name="party")
+    a = SecretInteger(Input(name="a", party=party))
+    b = SecretInteger(Input(name="b", party=party))
+    p = PublicInteger(Input(name="p", party=party))
+    product = a * b * a
+    total = a + p
+    flag = (product < total).if_else(a, b)
+    return [Output(flag, "flag", party), Output(total, "total", party)]
+"""
+
+
+@pytest.fixture(autouse=True)
+def clean_inputs():
+    reset_ast()
+    yield
+
+
+@pytest.fixture(name="program")
+def program_fixture(tmp_path):
+    path = tmp_path / "heatmap_program.py"
+    path.write_text(PROGRAM, encoding="utf-8")
+    return str(path)
+
+
+def test_line_costs(program):
+    mir = proto_mir.ProgramMir().parse(compile_script(program).mir)
+
+    costs = line_costs(mir, "heatmap_program.py")
+
+    assert sorted(costs) == [9, 11]
+    assert costs[9].counts["multiplication"] == 2
+    assert costs[9].cost == 2
+    assert costs[9].rounds == {"flag": 2}
+    assert costs[11].counts["comparison"] == 1
+    assert costs[11].cost == 9
+    assert costs[11].detail() == (
+        "cost 9: 1 comparison, 1 multiplication; 2 rounds of the critical path of flag"
+    )
+    assert line_costs(mir, "other.py") == {}
+
+
+def test_heatmap(program):
+    report = heatmap(program)
+
+    assert isinstance(report, richreports.report)
+    lines = html(report).splitlines()
+    (product,) = [line for line in lines if "product = a * b * a" in line]
+    assert '<span class="cost-1">' in product
+    (flag,) = [line for line in lines if "flag = (product" in line]
+    assert '<span class="cost-4">' in flag
+    assert "data-detail=" not in "".join(
+        line for line in lines if "total = a + p" in line
+    )
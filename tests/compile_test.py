@@ -12,15 +12,24 @@ from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
 from nada_mir_proto.nillion.nada.types import v1 as proto_ty
 from nada_mir_proto.nillion.nada.operations import v1 as proto_op
 
-from nada_dsl.ast_util import AST_OPERATIONS, OperationId
-from nada_dsl.compile import compile_script, compile_string, print_output
-from nada_dsl.errors import NotAllowedException
+from nada_dsl.ast_util import reset_ast
+from nada_dsl.compile import (
+    compile_script,
+    compile_script_to_file,
+    compile_string,
+    print_output,
+)
+from nada_dsl.cost.budget import Budget
+from nada_dsl.errors import (
+    BudgetExceededError,
+    InvalidOptimizationLevelError,
+    NotAllowedException,
+)
 
 
 @pytest.fixture(autouse=True)
 def clean_inputs():
-    AST_OPERATIONS.clear()
-    OperationId.reset()
+    reset_ast()
     yield
 
 
@@ -77,6 +86,115 @@ def test_compile_sum_integers():
     assert first_addition_found and second_addition_found
 
 
+def test_compile_with_optimization_level():
+    output = compile_script(f"{get_test_programs_folder()}/sum_integers.py", 1)
+    mir = proto_mir.ProgramMir().parse(output.mir)
+    assert len(mir.operations) == 5
+    assert output.pass_statistics["algebraic_simplification"].runs == 1
+
+
+def test_compile_with_invalid_optimization_level():
+    with pytest.raises(InvalidOptimizationLevelError):
+        compile_script(f"{get_test_programs_folder()}/sum_integers.py", 3)
+
+
+BUDGET_PROGRAM = """
+from nada_dsl import *
+
+def nada_main():
+    party1 = Party(name="Party1")
+    a = SecretInteger(Input(name="a", party=party1))
+    b = SecretInteger(Input(name="b", party=party1))
+    product = a * b * a
+    return [Output(product, "product", party1), Output(a < b, "less", party1)]
+"""
+
+
+def encoded_budget_program() -> str:
+    return base64.b64encode(bytes(BUDGET_PROGRAM, "utf-8")).decode("utf_8")
+
+
+def test_compile_within_budget():
+    budget = Budget(multiplications=2, comparisons=1, depth=2)
+    mir_bytes = compile_string(encoded_budget_program(), budget=budget).mir
+    assert len(mir_bytes) > 0
+
+
+def test_compile_exceeding_budget():
+    budget = Budget(multiplications=1, outputs={"less": Budget(comparisons=0, depth=1)})
+    with pytest.raises(BudgetExceededError) as error:
+        compile_string(encoded_budget_program(), budget=budget)
+
+    violations = error.value.violations
+    assert [(v.scope, v.limit, v.maximum, v.value) for v in violations] == [
+        ("program", "multiplications", 1, 2),
+        ("less", "comparisons", 0, 1),
+    ]
+    # Programs compiled from a string have no source file
+    assert violations[0].offenders == [("<string>:8", 2)]
+    assert "program: multiplications 2 exceeds 1" in str(error.value)
+
+
+def test_compile_to_file_exceeding_mir_size(tmp_path):
+    mir_path = tmp_path / "map_simple.nada.bin"
+    with pytest.raises(BudgetExceededError) as error:
+        compile_script_to_file(
+            f"{get_test_programs_folder()}/map_simple.py",
+            mir_path,
+            budget=Budget(mir_size=10),
+        )
+    assert error.value.violations[0].limit == "mir_size"
+    # The MIR exceeding the budget is not left behind
+    assert not mir_path.exists()
+
+    reset_ast()
+    mir_bytes = compile_script(f"{get_test_programs_folder()}/map_simple.py").mir
+    assert error.value.violations[0].value == len(mir_bytes)
+
+
+def test_compile_to_file_without_budget_does_not_load_the_mir(tmp_path, monkeypatch):
+    def replay_elements(*_):
+        raise AssertionError("the MIR is loaded in memory")
+
+    monkeypatch.setattr("nada_dsl.compile.replay_elements", replay_elements)
+    mir_path = tmp_path / "map_simple.nada.bin"
+    compile_script_to_file(f"{get_test_programs_folder()}/map_simple.py", mir_path)
+    assert mir_path.exists()
+
+
+def test_compile_to_file_with_probabilistic_truncation(tmp_path):
+    script_path = tmp_path / "secret_halving.py"
+    script_path.write_text(
+        """
+from nada_dsl import *
+
+def nada_main():
+    party = Party(name="party")
+    x = SecretInteger(Input(name="x", party=party))
+    return [Output(x / Integer(2), "half", party)]
+"""
+    )
+    variants = []
+    for allowed in (False, True):
+        reset_ast()
+        mir_path = tmp_path / "secret_halving.nada.bin"
+        compile_script_to_file(
+            str(script_path), mir_path, 2, probabilistic_truncation=allowed
+        )
+        mir = proto_mir.ProgramMir().parse(mir_path.read_bytes())
+        variants.append(
+            [
+                entry.operation.binary.variant
+                for entry in mir.operations
+                if hasattr(entry.operation, "binary")
+            ]
+        )
+    assert variants == [
+        [proto_op.BinaryOperationVariant.DIVISION],
+        [proto_op.BinaryOperationVariant.TRUNC_PR],
+    ]
+
+
 def test_compile_nada_fn_compound():
     program_str = """
 from nada_dsl import *
@@ -139,6 +257,17 @@ def test_compile_map_simple():
     assert 0 < function_op_id == output_id
 
 
+def test_compile_map_simple_to_file(tmp_path):
+    mir_path = tmp_path / "map_simple.nada.bin"
+    compile_script_to_file(f"{get_test_programs_folder()}/map_simple.py", mir_path)
+    mir = proto_mir.ProgramMir().parse(mir_path.read_bytes())
+
+    assert len(mir.operations) == 2
+    assert len(mir.functions) == 1
+    assert mir.outputs[0].name == "my_output"
+    assert "map_simple.py" in mir.source_files
+
+
 def test_compile_ecdsa_program():
     program_str = """
 from nada_dsl import *
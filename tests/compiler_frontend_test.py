@@ -4,34 +4,40 @@ Compiler frontend tests.
 
 # pylint: disable=missing-function-docstring
 
+import io
 import operator
 from typing import Any
 import pytest
 from betterproto.lib.google.protobuf import Empty
 
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
 from nada_mir_proto.nillion.nada.operations import v1 as proto_op
 from nada_mir_proto.nillion.nada.types import v1 as proto_ty
 
 from nada_dsl.ast_util import (
     AST_OPERATIONS,
     BinaryASTOperation,
+    FUNCTIONS,
     InputASTOperation,
     LiteralASTOperation,
     NadaFunctionASTOperation,
     ReduceASTOperation,
     UnaryASTOperation,
-    OperationId,
+    reset_ast,
 )
 
 # pylint: disable=wildcard-import,unused-wildcard-import
 from nada_dsl.nada_types.scalar_types import *
 from nada_dsl.program_io import Input, Output
 from nada_dsl.compiler_frontend import (
+    nada_compile_to_stream,
     nada_dsl_to_nada_mir,
     to_input_list,
     process_operation,
+    sweep_functions,
     CompilationContext,
 )
+from nada_dsl.timer import DefaultClock, timer
 from nada_dsl.nada_types import AllTypes, Party
 from nada_dsl.nada_types.collections import Array, Tuple, NTuple, Object, unzip
 from nada_dsl.nada_types.function import NadaFunctionArg
@@ -40,8 +46,7 @@ from tests.scalar_type_test import secret_integers
 
 @pytest.fixture(autouse=True)
 def clean_inputs():
-    AST_OPERATIONS.clear()
-    OperationId.reset()
+    reset_ast()
     yield
 
 
@@ -101,6 +106,54 @@ def test_root_conversion():
     ].operation.input_ref
 
 
+def test_compile_to_stream():
+    party = Party("party")
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+    my_int = SecretInteger(Input(name="my_int", party=party))
+    new_array = array.map(lambda a: a + my_int * Integer(2))
+    outputs = [
+        create_output(new_array, "array_output", "output_party"),
+        create_output(my_int + Integer(3), "int_output", "output_party"),
+    ]
+
+    stream = io.BytesIO()
+    nada_compile_to_stream(outputs, stream)
+    streamed = proto_mir.ProgramMir().parse(stream.getvalue())
+
+    assert streamed == nada_dsl_to_nada_mir(outputs)
+    assert len(streamed.functions) == 1
+    assert len(streamed.literals) == 2
+
+
+def test_literal_pool():
+    party = Party("party")
+    my_int = SecretInteger(Input(name="my_int", party=party))
+    my_uint = SecretUnsignedInteger(Input(name="my_uint", party=party))
+    outputs = [
+        create_output(my_int * Integer(7) + Integer(7), "int_output", "party"),
+        create_output(my_uint + UnsignedInteger(7), "uint_output", "party"),
+    ]
+    mir = nada_dsl_to_nada_mir(outputs)
+
+    # Literals with the same value and type share an entry
+    assert [(literal.name, literal.value) for literal in mir.literals] == [
+        ("0", "7"),
+        ("1", "7"),
+    ]
+    assert mir.literals[0].type == proto_ty.NadaType(integer=Empty())
+    assert mir.literals[1].type == proto_ty.NadaType(unsigned_integer=Empty())
+    literal_refs = [
+        entry.operation.literal_ref.refers_to
+        for entry in mir.operations
+        if hasattr(entry.operation, "literal_ref")
+    ]
+    assert literal_refs == ["0", "0", "1"]
+
+    # Literal names start from zero on every compilation
+    mir = nada_dsl_to_nada_mir([create_output(my_int + Integer(-1), "out", "party")])
+    assert [(literal.name, literal.value) for literal in mir.literals] == [("0", "-1")]
+
+
 def test_input_conversion():
     input = Input(name="input", party=Party("party"))
     input.store_in_ast(proto_ty.NadaType(secret_integer=Empty()))
@@ -257,6 +310,192 @@ def test_reduce(input_type: type[Array]):
     assert inner_inner.name == "input"
 
 
+def test_map_reuses_functions():
+    party = Party("party")
+    my_int = SecretInteger(Input(name="my_int", party=party))
+
+    def inc(a: SecretInteger) -> SecretInteger:
+        return a + my_int
+
+    outputs = []
+    for i in range(10):
+        array = Array(SecretInteger(Input(name=f"array_{i}", party=party)), size=3)
+        outputs.append(create_output(array.map(inc), f"output_{i}", "party"))
+
+    mir = nada_dsl_to_nada_mir(outputs)
+    assert len(mir.functions) == 1
+    map_fns = [
+        entry.operation.map.fn
+        for entry in mir.operations
+        if hasattr(entry.operation, "map")
+    ]
+    assert map_fns == [mir.functions[0].id] * 10
+
+
+def test_map_with_different_captured_values():
+    party = Party("party")
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+
+    def add(value):
+        return lambda a: a + value
+
+    first = array.map(add(SecretInteger(Input(name="first", party=party))))
+    second = array.map(add(SecretInteger(Input(name="second", party=party))))
+    assert AST_OPERATIONS[first.child.id].fn != AST_OPERATIONS[second.child.id].fn
+
+    mir = nada_dsl_to_nada_mir(
+        [
+            create_output(first, "first", "party"),
+            create_output(second, "second", "party"),
+        ]
+    )
+    assert len(mir.functions) == 2
+
+
+def test_map_with_different_captured_lists():
+    party = Party("party")
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+
+    # The same function reading a different list from its global scope
+    source = "def scale(a):\n    return a * Integer(FACTORS[0])\n"
+    first_globals = {"Integer": Integer, "FACTORS": [2]}
+    second_globals = {"Integer": Integer, "FACTORS": [3]}
+    exec(source, first_globals)  # pylint: disable=exec-used
+    exec(source, second_globals)  # pylint: disable=exec-used
+
+    first = array.map(first_globals["scale"])
+    second = array.map(second_globals["scale"])
+    assert AST_OPERATIONS[first.child.id].fn != AST_OPERATIONS[second.child.id].fn
+
+    mir = nada_dsl_to_nada_mir(
+        [
+            create_output(first, "first", "party"),
+            create_output(second, "second", "party"),
+        ]
+    )
+    assert len(mir.functions) == 2
+    assert sorted(literal.value for literal in mir.literals) == ["2", "3"]
+
+
+def test_map_with_global_read_by_a_nested_function():
+    party = Party("party")
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+
+    # The global is only read by the lambda nested in the mapped function
+    source = "def shift(x):\n    g = lambda y: y + Integer(K)\n    return g(x)\n"
+    shift_globals = {"Integer": Integer, "K": 1}
+    exec(source, shift_globals)  # pylint: disable=exec-used
+
+    first = array.map(shift_globals["shift"])
+    shift_globals["K"] = 2
+    second = array.map(shift_globals["shift"])
+    assert AST_OPERATIONS[first.child.id].fn != AST_OPERATIONS[second.child.id].fn
+
+    mir = nada_dsl_to_nada_mir(
+        [
+            create_output(first, "first", "party"),
+            create_output(second, "second", "party"),
+        ]
+    )
+    assert len(mir.functions) == 2
+    assert sorted(literal.value for literal in mir.literals) == ["1", "2"]
+
+
+def test_function_cache_is_cleared_with_the_ast():
+    party = Party("party")
+
+    def inc(a: SecretInteger) -> SecretInteger:
+        return a + Integer(1)
+
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+    array.map(inc)
+    assert len(FUNCTIONS) == 1
+
+    reset_ast()
+    assert len(FUNCTIONS) == 0
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+    mapped = array.map(inc)
+    mir = nada_dsl_to_nada_mir([create_output(mapped, "output", "party")])
+    assert len(mir.functions) == 1
+
+
+def test_structurally_identical_functions_are_merged():
+    party = Party("party")
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+    initial = SecretInteger(Input(name="initial", party=party))
+
+    def double(a: SecretInteger) -> SecretInteger:
+        return a + a
+
+    def twice(b: SecretInteger) -> SecretInteger:
+        return b + b
+
+    def square(a: SecretInteger) -> SecretInteger:
+        return a * a
+
+    def add(acc: SecretInteger, a: SecretInteger) -> SecretInteger:
+        return acc + a
+
+    outputs = [
+        create_output(array.map(double), "double", "party"),
+        create_output(array.map(twice), "twice", "party"),
+        create_output(array.map(square), "square", "party"),
+        create_output(array.map(twice).reduce(add, initial), "sum", "party"),
+    ]
+    mir = nada_dsl_to_nada_mir(outputs)
+
+    assert sorted(function.name for function in mir.functions) == [
+        "add",
+        "double",
+        "square",
+    ]
+    function_ids = {function.name: function.id for function in mir.functions}
+    operations = {entry.id: entry.operation for entry in mir.operations}
+    output_fns = {
+        output.name: operations[output.operation_id].map.fn
+        for output in mir.outputs
+        if output.name != "sum"
+    }
+    assert output_fns == {
+        "double": function_ids["double"],
+        "twice": function_ids["double"],
+        "square": function_ids["square"],
+    }
+
+
+def test_functions_are_processed_once_in_id_order(monkeypatch):
+    monkeypatch.setattr(timer, "clock", DefaultClock())
+    party = Party("party")
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+
+    def double(a: SecretInteger) -> SecretInteger:
+        return a + a
+
+    def square(a: SecretInteger) -> SecretInteger:
+        return a * a
+
+    squares = array.map(square)
+    doubles = array.map(double)
+    outputs = [
+        create_output(doubles, "double", "party"),
+        create_output(squares, "square", "party"),
+    ]
+    function_ids = [
+        AST_OPERATIONS[squares.child.id].fn,
+        AST_OPERATIONS[doubles.child.id].fn,
+    ]
+    assert list(sweep_functions(reversed(function_ids), AST_OPERATIONS)) == function_ids
+
+    mir = nada_dsl_to_nada_mir(outputs)
+    assert [function.id for function in mir.functions] == function_ids
+    report = timer.report()
+    for function in mir.functions:
+        assert (
+            f"nada_dsl.compiler_frontend.iter_functions.{function.name}.{function.id}"
+            in report
+        )
+
+
 def check_arg(arg: NadaFunctionArg, arg_name, arg_type):
     assert arg["name"] == arg_name
     assert arg["type"] == arg_type
@@ -302,6 +541,39 @@ def test_array_new_same_type():
     assert str(e.value) == "All arguments must be of the same type"
 
 
+def test_array_accessor():
+    array = Array(SecretInteger(Input(name="array", party=Party("party"))), size=4)
+
+    for index, expected in ((1, 1), (-1, 3), (-4, 0)):
+        element = array[index]
+        assert isinstance(element, SecretInteger)
+        op = process_operation(AST_OPERATIONS[element.child.id], CompilationContext())
+        assert op.array_accessor.source == array.child.id
+        assert op.array_accessor.index == expected
+        assert op.type == proto_ty.NadaType(secret_integer=Empty())
+
+    for index in (4, -5):
+        with pytest.raises(IndexError) as e:
+            array[index]  # pylint: disable=pointless-statement
+        assert str(e.value) == f"Invalid index {index} for Array of size 4."
+    with pytest.raises(TypeError):
+        array[Integer(1)]  # pylint: disable=pointless-statement
+
+
+def test_array_slice():
+    array = Array(SecretInteger(Input(name="array", party=Party("party"))), size=4)
+
+    for key, indices in ((slice(1, 3), [1, 2]), (slice(None, None, -2), [3, 1])):
+        sliced = array[key]
+        assert sliced.size == len(indices)
+        op = process_operation(AST_OPERATIONS[sliced.child.id], CompilationContext())
+        assert op.type.array.size == len(indices)
+        assert [AST_OPERATIONS[element].index for element in op.new.elements] == indices
+
+    with pytest.raises(IndexError):
+        array[2:2]  # pylint: disable=pointless-statement
+
+
 def test_tuple_new():
     first_input = create_input(SecretInteger, "first", "party", **{})
     second_input = create_input(PublicInteger, "second", "party", **{})
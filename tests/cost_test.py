@@ -0,0 +1,350 @@
+"""
+Cost estimation tests.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import pytest
+
+from nada_dsl.ast_util import reset_ast
+from nada_dsl.compiler_frontend import nada_dsl_to_nada_mir
+from nada_dsl.cost import (
+    DEFAULT_WEIGHTS,
+    RevealPolicy,
+    analyze_depth,
+    analyze_reveals,
+    estimate_cost,
+    format_critical_paths,
+    format_reveal_report,
+)
+from nada_dsl.cost.budget import Budget, check_budget
+from nada_dsl.cost.depth import DEFAULT_ROUNDS, DepthAnalysis
+from nada_dsl.errors import InvalidBudgetError
+from nada_dsl.nada_types import Party
+from nada_dsl.nada_types.collections import Array
+from nada_dsl.nada_types.scalar_types import (
+    Integer,
+    PublicInteger,
+    SecretInteger,
+    UnsignedInteger,
+    SecretUnsignedInteger,
+)
+from nada_dsl.program_io import Input, Output
+
+
+@pytest.fixture(autouse=True)
+def clean_inputs():
+    reset_ast()
+    yield
+
+
+@pytest.fixture(name="party")
+def party_fixture():
+    return Party("party")
+
+
+def secret_input(name: str, party: Party) -> SecretInteger:
+    return SecretInteger(Input(name=name, party=party))
+
+
+def nonzero(counts):
+    return {kind: count for kind, count in counts.items() if count > 0}
+
+
+def test_cost_of_scalar_operations(party):
+    a, b, c = [secret_input(name, party) for name in "abc"]
+    p = PublicInteger(Input(name="p", party=party))
+    u = SecretUnsignedInteger(Input(name="u", party=party))
+    outputs = [
+        Output(a * b + c * p + Integer(2) * a, "products", party),
+        Output((a < b).if_else(a, c), "select", party),
+        Output((c / p).to_public(), "reveal", party),
+        Output(u >> UnsignedInteger(2), "shift", party),
+        Output(SecretInteger.random() * p, "random", party),
+    ]
+
+    report = estimate_cost(nada_dsl_to_nada_mir(outputs))
+
+    assert nonzero(report.counts) == {
+        "multiplication": 2,
+        "comparison": 1,
+        "division": 1,
+        "right_shift": 1,
+        "random": 1,
+        "reveal": 1,
+    }
+    assert report.cost == 2 + 8 + 32 + 8 + 1 + 1
+    assert [output.name for output in report.outputs] == [
+        "products",
+        "select",
+        "reveal",
+        "shift",
+        "random",
+    ]
+    assert [nonzero(output.counts) for output in report.outputs] == [
+        {"multiplication": 1},
+        {"comparison": 1, "multiplication": 1},
+        {"division": 1, "reveal": 1},
+        {"right_shift": 1},
+        {"random": 1},
+    ]
+
+
+def test_cost_of_shared_operations(party):
+    a, b = secret_input("a", party), secret_input("b", party)
+    product = a * b
+    outputs = [
+        Output(product, "first", party),
+        Output(product * a, "second", party),
+    ]
+
+    report = estimate_cost(nada_dsl_to_nada_mir(outputs))
+
+    assert report.counts["multiplication"] == 2
+    assert [output.counts["multiplication"] for output in report.outputs] == [1, 1]
+
+
+def test_cost_of_map_and_reduce(party):
+    array = Array(secret_input("array", party), size=5)
+
+    def square(x: SecretInteger) -> SecretInteger:
+        return x * x
+
+    def maximum(acc: SecretInteger, x: SecretInteger) -> SecretInteger:
+        return (acc < x).if_else(x, acc)
+
+    result = array.map(square).reduce(maximum, secret_input("initial", party))
+
+    report = estimate_cost(nada_dsl_to_nada_mir([Output(result, "output", party)]))
+
+    assert nonzero(report.counts) == {"multiplication": 10, "comparison": 5}
+    functions = {function.name: function for function in report.functions}
+    assert functions["square"].calls == 5
+    assert nonzero(functions["square"].counts) == {"multiplication": 1}
+    assert functions["maximum"].calls == 5
+    assert functions["maximum"].cost == 9
+
+
+def test_cost_with_custom_weights(party):
+    a, b = secret_input("a", party), secret_input("b", party)
+    mir = nada_dsl_to_nada_mir([Output(a * b < a, "output", party)])
+
+    report = estimate_cost(mir, {"comparison": 100, "shuffle": 3})
+
+    assert report.cost == 101
+    assert report.weights == {**DEFAULT_WEIGHTS, "comparison": 100, "shuffle": 3}
+    assert report.counts["shuffle"] == 0
+
+
+def test_cost_of_operations_used_by_functions(party):
+    array = Array(secret_input("array", party), size=3)
+    scale = secret_input("a", party) * secret_input("b", party)
+    outputs = [
+        Output(array.map(lambda x: x * scale), "scaled", party),
+        Output(scale, "scale", party),
+    ]
+
+    report = estimate_cost(nada_dsl_to_nada_mir(outputs))
+
+    # The product is computed once by the program and once per call of the function
+    assert [output.counts["multiplication"] for output in report.outputs] == [6, 1]
+    assert report.counts["multiplication"] == 7
+
+
+def test_cost_report_depth_of_secret_powers(party):
+    a, b = [secret_input(name, party) for name in "ab"]
+    outputs = [
+        Output(a ** Integer(15), "power", party),
+        Output(a * b, "product", party),
+    ]
+
+    report = estimate_cost(nada_dsl_to_nada_mir(outputs))
+
+    assert [output.counts["multiplication"] for output in report.outputs] == [6, 1]
+    assert [(output.name, output.depth) for output in report.outputs] == [
+        ("power", 5),
+        ("product", 1),
+    ]
+    assert report.depth == 5
+
+
+def test_depth_of_chains(party):
+    a, b, c, d = [secret_input(name, party) for name in "abcd"]
+    p = PublicInteger(Input(name="p", party=party))
+    outputs = [
+        Output(a * b * c * d, "chain", party),
+        Output((a * b) * (c * d), "tree", party),
+        Output(a + b * p + c, "local", party),
+    ]
+
+    report = analyze_depth(nada_dsl_to_nada_mir(outputs))
+
+    assert report.depth == 3
+    assert [(output.name, output.depth) for output in report.outputs] == [
+        ("chain", 3),
+        ("tree", 2),
+        ("local", 0),
+    ]
+    assert report.outputs[2].critical_path == []
+
+
+def test_depth_of_map_and_reduce(party):
+    array = Array(secret_input("array", party), size=4)
+
+    def square(x: SecretInteger) -> SecretInteger:
+        return x * x
+
+    def multiply(acc: SecretInteger, x: SecretInteger) -> SecretInteger:
+        return acc * x
+
+    initial = secret_input("a", party) * secret_input("b", party)
+    mapped = array.map(square)
+    reduced = mapped.reduce(multiply, initial)
+    outputs = [Output(mapped, "mapped", party), Output(reduced, "reduced", party)]
+
+    report = analyze_depth(nada_dsl_to_nada_mir(outputs))
+
+    assert [output.depth for output in report.outputs] == [1, 5]
+    path = report.outputs[1].critical_path
+    assert [(step.function, step.repeat) for step in path] == [
+        ("square", 1),
+        ("multiply", 4),
+    ]
+    assert path[1].operation == "binary MULTIPLICATION"
+    assert path[1].source.startswith("cost_test.py:")
+    assert path[1].source.endswith(": return acc * x")
+
+
+def test_call_repeat_of_map_and_reduce(party):
+    array = Array(secret_input("array", party), size=3)
+    mapped = array.map(lambda x: x * x)
+    reduced = mapped.reduce(lambda acc, x: acc + x, secret_input("a", party))
+    mir = nada_dsl_to_nada_mir([Output(reduced, "reduced", party)])
+    analysis = DepthAnalysis(mir, dict(DEFAULT_ROUNDS))
+    operations = {entry.id: entry.operation for entry in mir.operations}
+
+    assert analysis.call_repeat(operations[mapped.child.id]) == 1
+    assert analysis.call_repeat(operations[reduced.child.id]) == 3
+
+
+def test_critical_path_follows_the_deepest_operand(party):
+    a, b, c = [secret_input(name, party) for name in "abc"]
+    product = a * b
+    result = (product * c < a).if_else(a, b)
+
+    report = analyze_depth(nada_dsl_to_nada_mir([Output(result, "output", party)]))
+
+    assert report.depth == 4
+    assert [step.operation for step in report.outputs[0].critical_path] == [
+        "binary MULTIPLICATION",
+        "binary MULTIPLICATION",
+        "binary LESS_THAN",
+        "ifelse",
+    ]
+    assert (
+        report.outputs[0]
+        .critical_path[0]
+        .source.startswith(f"cost_test.py:{product.child.source_ref.lineno}: ")
+    )
+    assert format_critical_paths(report).splitlines()[0] == "output: 4 rounds"
+
+
+def test_budget_from_dict():
+    budget = Budget.from_dict(
+        {"multiplications": 10, "outputs": {"result": {"depth": 3}}}
+    )
+    assert budget == Budget(multiplications=10, outputs={"result": Budget(depth=3)})
+
+    with pytest.raises(InvalidBudgetError):
+        Budget.from_dict({"multiplication": 10})
+    assert Budget.from_dict({"depth": None}) == Budget()
+
+
+@pytest.mark.parametrize(
+    "output_budget", [{"mir_size": 100}, {"outputs": {"inner": {"depth": 1}}}]
+)
+def test_budget_from_dict_rejects_program_limits_of_outputs(output_budget):
+    with pytest.raises(InvalidBudgetError) as error:
+        Budget.from_dict({"outputs": {"result": output_budget}})
+    assert "output 'result'" in str(error.value)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"multiplications": -1},
+        {"comparisons": 2.5},
+        {"depth": "3"},
+        {"mir_size": True},
+        {"outputs": {"result": {"depth": -2}}},
+        {"outputs": []},
+        {"outputs": {"result": 3}},
+    ],
+)
+def test_budget_from_dict_rejects_invalid_values(data):
+    with pytest.raises(InvalidBudgetError):
+        Budget.from_dict(data)
+
+
+def test_check_budget_reports_offending_lines(party):
+    a, b = secret_input("a", party), secret_input("b", party)
+    array = Array(secret_input("array", party), size=4)
+    squares = array.map(lambda x: x * x)
+    product = a * b
+    outputs = [Output(squares, "squares", party), Output(product, "product", party)]
+    mir = nada_dsl_to_nada_mir(outputs)
+
+    violations = check_budget(
+        mir, len(bytes(mir)), Budget(outputs={"squares": Budget(multiplications=3)})
+    )
+
+    assert len(violations) == 1
+    assert violations[0].value == 4
+    ((source, count),) = violations[0].offenders
+    assert source.startswith(f"cost_test.py:{squares.child.source_ref.lineno}: ")
+    assert count == 4
+    assert check_budget(mir, len(bytes(mir)), Budget(multiplications=5)) == []
+    with pytest.raises(InvalidBudgetError):
+        check_budget(mir, 0, Budget(outputs={"unknown": Budget()}))
+
+
+def test_secret_operations_only_revealed(party):
+    a, b, c = [secret_input(name, party) for name in "abc"]
+    revealed = (a * b + c).to_public()
+    kept = a * c
+    outputs = [Output(revealed, "revealed", party), Output(kept, "kept", party)]
+    mir = nada_dsl_to_nada_mir(outputs)
+
+    (finding,) = analyze_reveals(mir).findings
+    assert finding.secret_operations == 2
+    assert finding.counts == {"multiplication": 1}
+    assert finding.inputs == ["a", "b", "c"]
+    assert finding.public_operations == 0
+    assert finding.reveals[0].endswith(": revealed = (a * b + c).to_public()")
+
+    (finding,) = analyze_reveals(mir, RevealPolicy({"a", "b"})).findings
+    assert finding.public_operations == 1
+    assert finding.saved == {"multiplication": 1}
+    assert finding.reveal_points == ["input a", "input b"]
+
+    (finding,) = analyze_reveals(mir, RevealPolicy({"a", "b", "c"})).findings
+    assert finding.public_operations == 2
+    assert finding.reveal_points == ["input a", "input b", "input c"]
+
+
+def test_reveals_combined_by_public_additions(party):
+    a, b, c = [secret_input(name, party) for name in "abc"]
+    total = a.to_public() + b.to_public() - c.to_public()
+    shared = a.to_public()
+    outputs = [
+        Output(total, "total", party),
+        Output(shared + shared, "shared", party),
+        Output(a * b, "product", party),
+    ]
+
+    report = analyze_reveals(nada_dsl_to_nada_mir(outputs))
+
+    assert report.findings == []
+    (combination,) = report.combinations
+    assert len(combination.reveals) == 3
+    assert "3 reveals combined" in format_reveal_report(report)
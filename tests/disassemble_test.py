@@ -0,0 +1,107 @@
+"""
+Disassembler tests.
+"""
+
+# pylint: disable=missing-function-docstring,protected-access,no-member
+
+import io
+import os
+
+import pytest
+from betterproto.lib.google.protobuf import Empty
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+from nada_mir_proto.nillion.nada.types import v1 as proto_ty
+
+from nada_dsl.ast_util import reset_ast
+from nada_dsl.compile import compile_script
+from nada_dsl.disassemble import (
+    DisassemblyFilter,
+    PrintMirException,
+    disassemble,
+    operation_to_str,
+    type_to_str,
+)
+
+SECRET_INTEGER = proto_ty.NadaType(secret_integer=Empty())
+
+COMPOUND_TYPES = {
+    "array": proto_ty.Array(contained_type=SECRET_INTEGER, size=3),
+    "tuple": proto_ty.Tuple(left=SECRET_INTEGER, right=SECRET_INTEGER),
+    "ntuple": proto_ty.Ntuple(fields=[SECRET_INTEGER]),
+    "object": proto_ty.Object(
+        fields=[proto_ty.ObjectEntry(name="a", type=SECRET_INTEGER)]
+    ),
+}
+
+
+@pytest.fixture(autouse=True)
+def clean_inputs():
+    reset_ast()
+    yield
+
+
+@pytest.fixture(name="mir")
+def mir_fixture():
+    this_directory = os.path.dirname(os.path.realpath(__file__))
+    mir_bytes = compile_script(f"{this_directory}/../test-programs/map_simple.py").mir
+    return proto_mir.ProgramMir().parse(mir_bytes)
+
+
+def test_every_type_variant():
+    for name, cls in proto_ty.NadaType._betterproto.cls_by_field.items():
+        value = COMPOUND_TYPES.get(name, cls())
+        assert type_to_str(proto_ty.NadaType(**{name: value}))
+
+    assert type_to_str(proto_ty.NadaType(array=COMPOUND_TYPES["array"])) == (
+        "Array[SecretInteger:3]"
+    )
+    assert type_to_str(proto_ty.NadaType(object=COMPOUND_TYPES["object"])) == (
+        "Object[a: SecretInteger]"
+    )
+    with pytest.raises(PrintMirException):
+        type_to_str(proto_ty.NadaType())
+
+
+def test_every_operation_variant():
+    meta = proto_op.Operation._betterproto
+    for oneof_field in meta.oneof_field_by_group["operation"]:
+        name = oneof_field.name
+        value = meta.cls_by_field[name]()
+        if name == "cast":
+            value.cast_to = SECRET_INTEGER
+        operation = proto_op.Operation(type=SECRET_INTEGER, **{name: value})
+        assert operation_to_str(7, operation).startswith("oid(7) rty(SecretInteger) = ")
+
+    with pytest.raises(PrintMirException):
+        operation_to_str(7, proto_op.Operation(type=SECRET_INTEGER))
+
+
+def test_disassemble(mir):
+    stream = io.StringIO()
+    disassemble(mir, stream)
+
+    lines = stream.getvalue().splitlines()
+    assert "  inc fn_id(2), args(a: ty(SecretInteger))" in lines
+    assert "oid(4) rty(SecretInteger) = ADDITION oid(3) oid(1)" in lines
+    assert lines[-1] == "oid(5) rty(Array[SecretInteger:3]) = map fn(2) oid(0)"
+
+
+def test_disassemble_filters(mir):
+    def selected(selection):
+        stream = io.StringIO()
+        disassemble(mir, stream, selection)
+        return [
+            line
+            for line in stream.getvalue().splitlines()
+            if "fn_id(" in line or line.startswith("oid(")
+        ]
+
+    assert len(selected(DisassemblyFilter(outputs=["my_output"]))) == 6
+    assert selected(DisassemblyFilter(outputs=["unknown"])) == []
+    assert selected(DisassemblyFilter(functions=["inc"]))[0].startswith("  inc")
+    assert len(selected(DisassemblyFilter(functions=["2"]))) == 4
+    assert selected(DisassemblyFilter(first=4, last=4)) == [
+        "  inc fn_id(2), args(a: ty(SecretInteger))",
+        "oid(4) rty(SecretInteger) = ADDITION oid(3) oid(1)",
+    ]
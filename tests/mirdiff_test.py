@@ -0,0 +1,156 @@
+"""
+MIR difference tests.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from nada_dsl.ast_util import reset_ast
+from nada_dsl.compiler_frontend import nada_dsl_to_nada_mir
+from nada_dsl.mirdiff import _main, diff_mir, format_diff
+from nada_dsl.nada_types import Party
+from nada_dsl.nada_types.collections import Array
+from nada_dsl.nada_types.scalar_types import Integer, PublicInteger, SecretInteger
+from nada_dsl.program_io import Input, Output
+
+
+@pytest.fixture(autouse=True)
+def clean_inputs():
+    reset_ast()
+    yield
+
+
+def program(new: bool):
+    party = Party("party")
+    a, b, c = [SecretInteger(Input(name=name, party=party)) for name in "abc"]
+    if new:
+        # Unrelated operations shift the identifiers of the new program
+        Integer(1) + Integer(2)
+        p = PublicInteger(Input(name="p", party=party))
+        return nada_dsl_to_nada_mir(
+            [
+                Output(a * b + Integer(3), "sum", party),
+                Output((a * b * c < c).if_else(a, b), "select", party),
+                Output(c * p, "scaled", party),
+            ]
+        )
+    return nada_dsl_to_nada_mir(
+        [
+            Output(a * b + Integer(3), "sum", party),
+            Output((a < c).if_else(a, b), "select", party),
+            Output(a + c, "total", party),
+        ]
+    )
+
+
+def test_diff_mir():
+    old, new = program(new=False), program(new=True)
+    diff = diff_mir(old, new)
+    outputs = {output.name: output for output in diff.outputs}
+
+    assert [output.name for output in diff.outputs] == [
+        "sum",
+        "select",
+        "total",
+        "scaled",
+    ]
+    assert outputs["sum"].status == "unchanged"
+    assert outputs["total"].status == "removed"
+    assert outputs["scaled"].status == "added"
+
+    select = outputs["select"]
+    assert select.status == "changed"
+    assert select.added == {
+        "binary MULTIPLICATION": 2,
+        "binary LESS_THAN": 1,
+        "ifelse": 1,
+    }
+    assert select.removed == {"binary LESS_THAN": 1, "ifelse": 1}
+    assert select.depth[1] > select.depth[0]
+    assert select.cost[1] > select.cost[0]
+    assert select.operations == (5, 7)
+    assert diff.regressions() == [select]
+
+    assert [(named.name, named.status) for named in diff.inputs] == [
+        ("a", "unchanged"),
+        ("b", "unchanged"),
+        ("c", "unchanged"),
+        ("p", "added"),
+    ]
+
+    text = format_diff(diff)
+    assert "  select: changed" in text
+    assert "sum" not in text
+    assert "    removed secret operations: 1 binary LESS_THAN, 1 ifelse" in text
+    assert "  sum: unchanged" in format_diff(diff, unchanged=True)
+
+
+def test_identical_programs_differ_only_by_identifiers():
+    old = program(new=False)
+    Integer(1) + Integer(2)
+    diff = diff_mir(old, program(new=False))
+
+    assert all(output.status == "unchanged" for output in diff.outputs)
+    assert diff.regressions() == []
+
+
+def test_main_check(tmp_path):
+    paths = []
+    for new in (False, True):
+        path = tmp_path / f"{'new' if new else 'old'}.nada.bin"
+        path.write_bytes(bytes(program(new)))
+        paths.append(str(path))
+
+    assert _main(paths) == 0
+    assert _main(paths + ["--check"]) == 1
+    assert _main([paths[0], paths[0], "--check"]) == 0
+
+
+def lambda_program(new: bool):
+    party = Party("party")
+    a = SecretInteger(Input(name="a", party=party))
+    array = Array(SecretInteger(Input(name="array", party=party)), size=3)
+    if new:
+        # The functions move to other lines, and only the second one changes
+        first = array.map(lambda x: x + a)
+        second = array.map(lambda x: x * x)
+    else:
+        first = array.map(lambda x: x + a)
+        second = array.map(lambda x: x * a)
+    return nada_dsl_to_nada_mir(
+        [Output(first, "first", party), Output(second, "second", party)]
+    )
+
+
+def test_diff_functions_with_the_same_name():
+    diff = diff_mir(lambda_program(new=False), lambda_program(new=True))
+
+    assert [named.status for named in diff.functions] == ["unchanged", "changed"]
+    assert all(named.name.startswith("<lambda> (") for named in diff.functions)
+    assert diff.functions[0].name != diff.functions[1].name
+
+
+def test_main_output_is_reproducible(tmp_path):
+    paths = []
+    for new in (False, True):
+        path = tmp_path / f"{'new' if new else 'old'}.nada.bin"
+        path.write_bytes(bytes(lambda_program(new)))
+        paths.append(str(path))
+
+    texts = []
+    for seed in ("1", "2"):
+        result = subprocess.run(
+            [sys.executable, "-m", "nada_dsl.mirdiff", *paths, "--all"],
+            capture_output=True,
+            check=True,
+            env=dict(os.environ, PYTHONHASHSEED=seed),
+            text=True,
+        )
+        texts.append(result.stdout)
+    assert "#" in texts[0]
+    assert texts[0] == texts[1]
@@ -0,0 +1,67 @@
+"""
+MIR statistics tests.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import io
+import os
+
+import pytest
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+
+from nada_dsl.ast_util import reset_ast
+from nada_dsl.compile import compile_script
+from nada_dsl.errors import InvalidMirError
+from nada_dsl.mir_stream import MirBuilder, read_elements, replay_elements
+from nada_dsl.mirstat import format_statistics, mir_statistics
+
+
+@pytest.fixture(autouse=True)
+def clean_inputs():
+    reset_ast()
+    yield
+
+
+@pytest.fixture(name="mir_bytes")
+def mir_bytes_fixture():
+    this_directory = os.path.dirname(os.path.realpath(__file__))
+    return compile_script(f"{this_directory}/../test-programs/map_simple.py").mir
+
+
+def test_read_elements(mir_bytes):
+    elements = list(read_elements(io.BytesIO(mir_bytes)))
+
+    assert sum(element.size for element in elements) == len(mir_bytes)
+    assert [element.field for element in elements].count("operations") == 2
+
+    with pytest.raises(InvalidMirError):
+        list(read_elements(io.BytesIO(mir_bytes[:-1])))
+
+
+def test_replay_elements(mir_bytes):
+    builder = MirBuilder()
+
+    assert replay_elements(io.BytesIO(mir_bytes), builder) == len(mir_bytes)
+    assert builder.mir == proto_mir.ProgramMir().parse(mir_bytes)
+
+
+def test_mir_statistics(mir_bytes):
+    statistics = mir_statistics(io.BytesIO(mir_bytes))
+
+    assert statistics.size == len(mir_bytes)
+    assert sum(statistics.sections.values()) == len(mir_bytes)
+    assert statistics.elements["inputs"] == 2
+    assert statistics.variants == {
+        "input_ref": 2,
+        "map": 1,
+        "arg_ref": 1,
+        "binary ADDITION": 1,
+    }
+    assert statistics.types == {"SecretInteger": 3, "Array[SecretInteger:3]": 2}
+    (function,) = statistics.functions
+    assert (function.name, function.operations) == ("inc", 3)
+    assert function.size == statistics.sections["functions"]
+    assert statistics.array_sizes == {3: 2}
+    assert 0 < statistics.type_size < statistics.size
+    assert format_statistics(statistics).startswith(f"MIR size: {len(mir_bytes)}")
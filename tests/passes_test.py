@@ -0,0 +1,851 @@
+"""
+Optimization passes tests.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import pytest
+
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
+from nada_dsl.ast_util import (
+    AST_OPERATIONS,
+    BinaryASTOperation,
+    IfElseASTOperation,
+    LiteralASTOperation,
+    reset_ast,
+    type_key,
+)
+from nada_dsl.compiler_frontend import ProgramGraph, nada_dsl_to_nada_mir
+from nada_dsl.errors import InvalidOptimizationLevelError
+from nada_dsl.nada_types import Party
+from nada_dsl.nada_types.collections import Array
+from nada_dsl.nada_types.scalar_types import (
+    Boolean,
+    Integer,
+    PublicBoolean,
+    PublicInteger,
+    SecretBoolean,
+    SecretInteger,
+    SecretUnsignedInteger,
+    UnsignedInteger,
+)
+from nada_dsl.passes import (
+    AlgebraicSimplification,
+    ChainRebalancing,
+    InnerProductFusion,
+    MapFusion,
+    Pass,
+    PassStatistics,
+    ReduceUnrolling,
+    SelectSimplification,
+    SharedComparisonElimination,
+    StrengthReduction,
+    pass_manager,
+)
+from nada_dsl.program_io import Input, Output
+from nada_dsl.timer import DefaultClock, timer
+
+
+@pytest.fixture(autouse=True)
+def clean_inputs():
+    reset_ast()
+    yield
+
+
+@pytest.fixture(name="party")
+def party_fixture():
+    return Party("party")
+
+
+def secret_input(name: str, party: Party) -> SecretInteger:
+    return SecretInteger(Input(name=name, party=party))
+
+
+def optimize(outputs, *passes):
+    graph = ProgramGraph.from_outputs(outputs)
+    manager = pass_manager(0)
+    manager.passes = list(passes)
+    manager.run(graph)
+    return graph, manager.statistics
+
+
+def binary_variants(mir):
+    return sorted(
+        entry.operation.binary.variant
+        for entry in mir.operations
+        if hasattr(entry.operation, "binary")
+    )
+
+
+class CountingPass(Pass):
+    """Pass that changes the program a fixed number of times."""
+
+    name = "counting"
+
+    def __init__(self, changes: int):
+        self.changes = changes
+
+    def run(self, graph: ProgramGraph, statistics: PassStatistics) -> bool:
+        if self.changes == 0:
+            return False
+        self.changes -= 1
+        return True
+
+
+def test_pass_manager_runs_until_fixed_point(party, monkeypatch):
+    monkeypatch.setattr(timer, "clock", DefaultClock())
+    output = Output(secret_input("a", party) + Integer(1), "output", party)
+
+    _, statistics = optimize([output], CountingPass(2))
+
+    assert statistics["counting"].runs == 3
+    assert statistics["counting"].changes == 2
+    assert statistics["counting"].removed_operations == 0
+    assert [name for name in timer.report() if name.startswith("nada_dsl.passes")] == [
+        "nada_dsl.passes.counting.0",
+        "nada_dsl.passes.counting.1",
+        "nada_dsl.passes.counting.2",
+    ]
+
+
+def test_pass_manager_stops_at_max_iterations(party):
+    output = Output(secret_input("a", party) + Integer(1), "output", party)
+    manager = pass_manager(0)
+    manager.passes = [CountingPass(100)]
+    manager.max_iterations = 4
+
+    manager.run(ProgramGraph.from_outputs([output]))
+
+    assert manager.statistics["counting"].runs == 4
+
+
+def test_optimization_level_zero_keeps_the_program(party):
+    a = secret_input("a", party)
+    output = Output((a + Integer(0)) * (a + a), "output", party)
+
+    unoptimized = nada_dsl_to_nada_mir([output])
+    level_zero = nada_dsl_to_nada_mir([output], pass_manager(0).run)
+    level_one = nada_dsl_to_nada_mir([output], pass_manager(1).run)
+
+    assert bytes(unoptimized) == bytes(level_zero)
+    assert binary_variants(level_zero) == [
+        proto_op.BinaryOperationVariant.ADDITION,
+        proto_op.BinaryOperationVariant.ADDITION,
+        proto_op.BinaryOperationVariant.MULTIPLICATION,
+    ]
+    assert binary_variants(level_one) == [
+        proto_op.BinaryOperationVariant.ADDITION,
+        proto_op.BinaryOperationVariant.MULTIPLICATION,
+    ]
+
+
+def test_optimizations_do_not_change_the_ast(party):
+    values = [secret_input(f"x{index}", party) for index in range(5)]
+    array = Array(secret_input("array", party), size=3)
+    outputs = [
+        Output(
+            values[0] * values[1] * values[2] * values[3] * values[4], "product", party
+        ),
+        Output(array.map(scale).map(offset), "mapped", party),
+    ]
+    ast = dict(AST_OPERATIONS)
+
+    level_zero = bytes(nada_dsl_to_nada_mir(outputs))
+    level_two = bytes(nada_dsl_to_nada_mir(outputs, pass_manager(2).run))
+
+    assert level_two != level_zero
+    assert dict(AST_OPERATIONS) == ast
+    assert bytes(nada_dsl_to_nada_mir(outputs)) == level_zero
+
+
+def test_invalid_optimization_level():
+    with pytest.raises(InvalidOptimizationLevelError):
+        pass_manager(7)
+
+
+def simplified_root(value, party):
+    graph, _ = optimize([Output(value, "output", party)], AlgebraicSimplification())
+    return graph.operations[graph.roots[0]]
+
+
+def literal_value(operation):
+    assert isinstance(operation, LiteralASTOperation)
+    return operation.value
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        lambda x: x + Integer(0),
+        lambda x: Integer(0) + x,
+        lambda x: x - Integer(0),
+        lambda x: x * Integer(1),
+        lambda x: Integer(1) * x,
+        lambda x: x / Integer(1),
+        lambda x: (x + Integer(0)) * Integer(1),
+    ],
+)
+def test_simplify_neutral_elements(party, expression):
+    x = secret_input("x", party)
+    root = simplified_root(expression(x), party)
+    assert root.id == x.child.id
+
+
+def test_simplify_multiply_zero(party):
+    x = PublicInteger(Input(name="x", party=party))
+    assert literal_value(simplified_root(x * Integer(0), party)) == 0
+    assert literal_value(simplified_root(Integer(0) * x, party)) == 0
+
+
+def test_simplify_multiply_zero_keeps_secret_type(party):
+    x = secret_input("x", party)
+    root = simplified_root(x * Integer(0), party)
+    assert isinstance(root, BinaryASTOperation)
+
+
+def test_simplify_subtract_self(party):
+    x = PublicInteger(Input(name="x", party=party))
+    difference = x - x
+    root = simplified_root(difference, party)
+    assert literal_value(root) == 0
+    assert root.source_ref == AST_OPERATIONS[difference.child.id].source_ref
+
+
+def test_simplify_subtract_self_keeps_secret_type(party):
+    x = secret_input("x", party)
+    assert isinstance(simplified_root(x - x, party), BinaryASTOperation)
+
+
+@pytest.mark.parametrize(
+    ("variant", "expression", "value"),
+    [
+        (
+            proto_op.BinaryOperationVariant.ADDITION,
+            lambda x: (x + Integer(3)) + Integer(4),
+            7,
+        ),
+        (
+            proto_op.BinaryOperationVariant.ADDITION,
+            lambda x: Integer(4) + (Integer(3) + x),
+            7,
+        ),
+        (
+            proto_op.BinaryOperationVariant.MULTIPLICATION,
+            lambda x: (x * Integer(3)) * Integer(4),
+            12,
+        ),
+        (
+            proto_op.BinaryOperationVariant.ADDITION,
+            lambda x: ((x + Integer(1)) + Integer(2)) + Integer(3),
+            6,
+        ),
+    ],
+)
+def test_simplify_reassociate_constants(party, variant, expression, value):
+    x = secret_input("x", party)
+    expression_value = expression(x)
+    graph, _ = optimize(
+        [Output(expression_value, "output", party)], AlgebraicSimplification()
+    )
+    root = graph.operations[graph.roots[0]]
+    assert root.variant == variant
+    assert root.left == x.child.id
+    assert literal_value(graph.operations[root.right]) == value
+    assert root.source_ref == AST_OPERATIONS[expression_value.child.id].source_ref
+    assert graph.operation_count() == 3
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        lambda x: x & Boolean(True),
+        lambda x: Boolean(True) & x,
+        lambda x: x | Boolean(False),
+        lambda x: x ^ Boolean(False),
+        lambda x: Boolean(False) ^ x,
+        lambda x: x & x,
+        lambda x: x | x,
+        lambda x: ~~x,
+    ],
+)
+def test_simplify_boolean_identities(party, expression):
+    x = SecretBoolean(Input(name="x", party=party))
+    assert simplified_root(expression(x), party).id == x.child.id
+
+
+@pytest.mark.parametrize(
+    ("expression", "value"),
+    [
+        (lambda x: x & Boolean(False), False),
+        (lambda x: x | Boolean(True), True),
+        (lambda x: x ^ x, False),
+    ],
+)
+def test_simplify_boolean_absorbing_elements(party, expression, value):
+    x = PublicBoolean(Input(name="x", party=party))
+    assert literal_value(simplified_root(expression(x), party)) is value
+
+
+def test_simplify_in_optimization_level(party):
+    x = secret_input("x", party)
+    y = secret_input("y", party)
+    output = Output((x * Integer(1)) * (y + Integer(0)), "output", party)
+
+    mir = nada_dsl_to_nada_mir([output], pass_manager(1).run)
+
+    assert binary_variants(mir) == [proto_op.BinaryOperationVariant.MULTIPLICATION]
+    assert len(mir.literals) == 0
+
+
+def chain_depth(operations, operation_id, variant):
+    operation = operations[operation_id]
+    if not isinstance(operation, BinaryASTOperation) or operation.variant != variant:
+        return 0
+    return 1 + max(
+        chain_depth(operations, operation.left, variant),
+        chain_depth(operations, operation.right, variant),
+    )
+
+
+def chain_operands(operations, operation_id, variant, shared=()):
+    operation = operations[operation_id]
+    if (
+        not isinstance(operation, BinaryASTOperation)
+        or operation.variant != variant
+        or operation_id in shared
+    ):
+        return [operation_id]
+    return chain_operands(operations, operation.left, variant, shared) + chain_operands(
+        operations, operation.right, variant, shared
+    )
+
+
+def test_rebalance_multiplication_chain(party):
+    values = [secret_input(f"x{index}", party) for index in range(8)]
+    product = values[0]
+    for value in values[1:]:
+        product = product * value
+
+    graph, statistics = optimize([Output(product, "output", party)], ChainRebalancing())
+
+    multiplication = proto_op.BinaryOperationVariant.MULTIPLICATION
+    assert graph.roots == [product.child.id]
+    assert chain_depth(graph.operations, graph.roots[0], multiplication) == 3
+    assert chain_operands(graph.operations, graph.roots[0], multiplication) == [
+        value.child.id for value in values
+    ]
+    assert graph.operation_count() == 15
+    metrics = statistics["chain_rebalancing"].metrics
+    assert metrics == {"round_depth_before": 7, "round_depth_after": 3}
+
+
+def test_rebalance_keeps_shared_intermediates(party):
+    a, b, c, d, e, f = [
+        SecretBoolean(Input(name=name, party=party)) for name in "abcdef"
+    ]
+    shared = a & b
+    outputs = [
+        Output(shared & c & d & e & f, "chain", party),
+        Output(shared, "shared", party),
+    ]
+
+    graph, statistics = optimize(outputs, ChainRebalancing())
+
+    bool_and = proto_op.BinaryOperationVariant.BOOL_AND
+    assert graph.roots[1] == shared.child.id
+    assert graph.operations[shared.child.id].left == a.child.id
+    assert chain_operands(
+        graph.operations, graph.roots[0], bool_and, [shared.child.id]
+    ) == [
+        shared.child.id,
+        c.child.id,
+        d.child.id,
+        e.child.id,
+        f.child.id,
+    ]
+    assert chain_depth(graph.operations, graph.roots[0], bool_and) == 4
+    metrics = statistics["chain_rebalancing"].metrics
+    assert metrics == {"round_depth_before": 5, "round_depth_after": 4}
+
+
+def test_rebalance_sum(party):
+    values = [secret_input(f"x{index}", party) for index in range(5)]
+    manager = pass_manager(2)
+
+    graph = ProgramGraph.from_outputs([Output(sum(values), "output", party)])
+    manager.run(graph)
+
+    addition = proto_op.BinaryOperationVariant.ADDITION
+    assert chain_depth(graph.operations, graph.roots[0], addition) == 3
+    assert chain_operands(graph.operations, graph.roots[0], addition) == [
+        value.child.id for value in values
+    ]
+
+
+def test_rebalance_skips_mixed_types(party):
+    a, b, c = [secret_input(name, party) for name in "abc"]
+    product = a * b * c * PublicInteger(Input(name="p", party=party))
+
+    _, statistics = optimize([Output(product, "output", party)], ChainRebalancing())
+
+    assert statistics["chain_rebalancing"].changes == 0
+
+
+def add(acc: SecretInteger, x: SecretInteger) -> SecretInteger:
+    return acc + x
+
+
+def test_inner_product_fusion_of_map_zip_reduce(party):
+    a = Array(secret_input("a", party), size=3)
+    b = Array(secret_input("b", party), size=3)
+    initial = secret_input("initial", party)
+    result = a.zip(b).map(lambda t: t.left * t.right).reduce(add, initial)
+
+    mir = nada_dsl_to_nada_mir([Output(result, "output", party)], pass_manager(1).run)
+
+    assert len(mir.functions) == 0
+    operations = {entry.id: entry.operation for entry in mir.operations}
+    root = operations[mir.outputs[0].operation_id]
+    assert root.binary.variant == proto_op.BinaryOperationVariant.ADDITION
+    assert operations[root.binary.left].input_ref.refers_to == "initial"
+    inner_product = operations[root.binary.right].binary
+    assert inner_product.variant == proto_op.BinaryOperationVariant.INNER_PRODUCT
+    assert operations[inner_product.left].input_ref.refers_to == "a"
+    assert operations[inner_product.right].input_ref.refers_to == "b"
+
+
+def test_inner_product_fusion_of_zip_reduce(party):
+    a = Array(secret_input("a", party), size=3)
+    b = Array(secret_input("b", party), size=3)
+    initial = secret_input("initial", party)
+
+    def add_product(acc: SecretInteger, t) -> SecretInteger:
+        return t.right * t.left + acc
+
+    result = a.zip(b).reduce(add_product, initial)
+    graph, statistics = optimize(
+        [Output(result, "output", party)], InnerProductFusion()
+    )
+
+    root = graph.operations[graph.roots[0]]
+    assert graph.operations[root.right].variant == (
+        proto_op.BinaryOperationVariant.INNER_PRODUCT
+    )
+    assert statistics["inner_product_fusion"].notes == [
+        f"passes_test.py:{result.child.source_ref.lineno}: "
+        "reduce rewritten as an inner product"
+    ]
+
+
+def test_inner_product_fusion_skips_other_functions(party):
+    a = Array(secret_input("a", party), size=3)
+    b = Array(secret_input("b", party), size=3)
+    initial = secret_input("initial", party)
+    result = a.zip(b).map(lambda t: t.left + t.right).reduce(add, initial)
+
+    _, statistics = optimize([Output(result, "output", party)], InnerProductFusion())
+
+    assert statistics["inner_product_fusion"].changes == 0
+
+
+def test_inner_product_fusion_verbose(party, capsys):
+    a = Array(secret_input("a", party), size=3)
+    b = Array(secret_input("b", party), size=3)
+    result = (
+        a.zip(b).map(lambda t: t.left * t.right).reduce(add, secret_input("i", party))
+    )
+
+    nada_dsl_to_nada_mir(
+        [Output(result, "output", party)], pass_manager(1, verbose=True).run
+    )
+
+    assert "inner_product_fusion: passes_test.py:" in capsys.readouterr().err
+
+
+def scale(x: SecretInteger) -> SecretInteger:
+    return x * Integer(3)
+
+
+def offset(x: SecretInteger) -> SecretInteger:
+    return x + Integer(5)
+
+
+def function_operations(mir):
+    assert len(mir.functions) == 1
+    function = mir.functions[0]
+    operations = {entry.id: entry.operation for entry in function.operations}
+    return function, operations
+
+
+def test_map_fusion(party):
+    array = Array(secret_input("array", party), size=3)
+    bias = secret_input("bias", party)
+
+    def add_bias(x: SecretInteger) -> SecretInteger:
+        return x + bias
+
+    result = array.map(scale).map(offset).map(add_bias)
+
+    mir = nada_dsl_to_nada_mir([Output(result, "output", party)], pass_manager(1).run)
+
+    maps = [entry for entry in mir.operations if hasattr(entry.operation, "map")]
+    assert len(maps) == 1
+    assert maps[0].id == mir.outputs[0].operation_id
+    function, operations = function_operations(mir)
+    assert function.name == "scale_offset_add_bias"
+    assert maps[0].operation.map.fn == function.id
+    add_bias_op = operations[function.return_operation_id].binary
+    assert operations[add_bias_op.right].input_ref.refers_to == "bias"
+    offset_op = operations[add_bias_op.left].binary
+    assert offset_op.variant == proto_op.BinaryOperationVariant.ADDITION
+    scale_op = operations[offset_op.left].binary
+    assert scale_op.variant == proto_op.BinaryOperationVariant.MULTIPLICATION
+    assert operations[scale_op.left].arg_ref.function_id == function.id
+
+
+def test_map_fusion_keeps_shared_intermediate(party):
+    array = Array(secret_input("array", party), size=3)
+    scaled = array.map(scale)
+    outputs = [
+        Output(scaled.map(offset), "offset", party),
+        Output(scaled, "scaled", party),
+    ]
+
+    _, statistics = optimize(outputs, MapFusion())
+
+    assert statistics["map_fusion"].changes == 0
+
+
+def test_map_fusion_into_reduce(party):
+    array = Array(secret_input("array", party), size=3)
+    initial = secret_input("initial", party)
+    result = array.map(scale).reduce(add, initial)
+
+    mir = nada_dsl_to_nada_mir([Output(result, "output", party)], pass_manager(1).run)
+
+    operations = {entry.id: entry.operation for entry in mir.operations}
+    reduce = operations[mir.outputs[0].operation_id].reduce
+    assert operations[reduce.child].input_ref.refers_to == "array"
+    function, function_ops = function_operations(mir)
+    assert [arg.name for arg in function.args] == ["acc", "x"]
+    addition = function_ops[function.return_operation_id].binary
+    assert function_ops[addition.left].arg_ref.refers_to == "acc"
+    scale_op = function_ops[addition.right].binary
+    assert scale_op.variant == proto_op.BinaryOperationVariant.MULTIPLICATION
+    assert function_ops[scale_op.left].arg_ref.refers_to == "x"
+
+
+@pytest.mark.parametrize(
+    ("first", "second", "negated"),
+    [
+        (lambda a, b: a < b, lambda a, b: b > a, False),
+        (lambda a, b: a < b, lambda a, b: a >= b, True),
+        (lambda a, b: a > b, lambda a, b: a <= b, True),
+        (lambda a, b: a <= b, lambda a, b: b >= a, False),
+        (lambda a, b: a == b, lambda a, b: b == a, False),
+        (lambda a, b: a == b, lambda a, b: a != b, True),
+        (lambda a, b: a != b, lambda a, b: b != a, False),
+    ],
+)
+def test_shared_comparison_elimination(party, first, second, negated):
+    a = secret_input("a", party)
+    b = secret_input("b", party)
+    first_value = first(a, b)
+    second_value = second(a, b)
+    outputs = [
+        Output(first_value, "first", party),
+        Output(second_value, "second", party),
+    ]
+
+    graph, statistics = optimize(outputs, SharedComparisonElimination())
+
+    assert graph.roots[0] == first_value.child.id
+    second_root = graph.operations[graph.roots[1]]
+    if negated:
+        assert second_root.variant == proto_op.UnaryOperationVariant.NOT
+        assert second_root.child == graph.roots[0]
+        assert second_root.source_ref == second_value.child.source_ref
+    else:
+        assert graph.roots[1] == graph.roots[0]
+    metrics = statistics["shared_comparison_elimination"].metrics
+    assert metrics == {"secret_comparisons_removed": 1}
+
+
+def test_shared_comparison_elimination_keeps_positive_form(party):
+    a = secret_input("a", party)
+    b = secret_input("b", party)
+    greater_equal = a >= b
+    less = a < b
+    less_equal = b <= a
+    outputs = [
+        Output(greater_equal, "greater_equal", party),
+        Output(less, "less", party),
+        Output(less_equal, "less_equal", party),
+    ]
+
+    graph, statistics = optimize(outputs, SharedComparisonElimination())
+
+    assert graph.roots[1] == less.child.id
+    assert graph.roots[0] == graph.roots[2]
+    assert graph.operations[graph.roots[0]].child == less.child.id
+    assert statistics["shared_comparison_elimination"].removed_operations == 1
+
+
+def test_shared_comparison_elimination_of_public_values(party):
+    a = PublicInteger(Input(name="a", party=party))
+    b = PublicInteger(Input(name="b", party=party))
+    outputs = [Output(a < b, "less", party), Output(b > a, "greater", party)]
+
+    graph, statistics = optimize(outputs, SharedComparisonElimination())
+
+    assert graph.roots[0] == graph.roots[1]
+    metrics = statistics["shared_comparison_elimination"].metrics
+    assert metrics == {"secret_comparisons_removed": 0}
+
+
+def public_input(name: str, party: Party) -> PublicInteger:
+    return PublicInteger(Input(name=name, party=party))
+
+
+def test_select_same_branches(party):
+    x = secret_input("x", party)
+    condition = secret_input("a", party) < secret_input("b", party)
+    graph, _ = optimize(
+        [Output(condition.if_else(x, x), "output", party)], SelectSimplification()
+    )
+    assert graph.roots == [x.child.id]
+
+
+def test_select_literal_condition(party):
+    x = secret_input("x", party)
+    y = secret_input("y", party)
+    condition = PublicBoolean(Input(name="c", party=party)) & Boolean(False)
+    output = Output(condition.if_else(x, y), "output", party)
+
+    graph = ProgramGraph.from_outputs([output])
+    pass_manager(1).run(graph)
+
+    assert graph.roots == [y.child.id]
+
+
+def test_select_negated_condition(party):
+    x = secret_input("x", party)
+    y = secret_input("y", party)
+    condition = secret_input("a", party) < secret_input("b", party)
+    result = (~condition).if_else(x, y)
+
+    graph, _ = optimize([Output(result, "output", party)], SelectSimplification())
+
+    root = graph.operations[graph.roots[0]]
+    assert root.condition == condition.child.id
+    assert root.true_branch_child == y.child.id
+    assert root.false_branch_child == x.child.id
+    assert root.source_ref == result.child.source_ref
+    assert graph.operation_count() == 6
+
+
+@pytest.mark.parametrize(
+    ("expression", "branches"),
+    [
+        (lambda c, x, y, z: c.if_else(c.if_else(x, y), z), ("x", "z")),
+        (lambda c, x, y, z: c.if_else(x, c.if_else(y, z)), ("x", "z")),
+    ],
+)
+def test_select_nested_condition(party, expression, branches):
+    values = {name: secret_input(name, party) for name in "xyz"}
+    condition = secret_input("a", party) < secret_input("b", party)
+    result = expression(condition, values["x"], values["y"], values["z"])
+
+    graph, _ = optimize([Output(result, "output", party)], SelectSimplification())
+
+    root = graph.operations[graph.roots[0]]
+    assert root.condition == condition.child.id
+    assert root.true_branch_child == values[branches[0]].child.id
+    assert root.false_branch_child == values[branches[1]].child.id
+
+
+def test_select_factors_public_chains(party):
+    s = secret_input("s", party)
+    w1, w2, w3 = [public_input(name, party) for name in ("w1", "w2", "w3")]
+    c1 = public_input("p", party) < public_input("q", party)
+    c2 = public_input("r", party) < public_input("t", party)
+    result = c1.if_else(s * w1, c2.if_else(w2 * s, s * w3))
+
+    mir = nada_dsl_to_nada_mir([Output(result, "output", party)], pass_manager(1).run)
+
+    assert (
+        binary_variants(mir).count(proto_op.BinaryOperationVariant.MULTIPLICATION) == 1
+    )
+    operations = {entry.id: entry.operation for entry in mir.operations}
+    root = operations[mir.outputs[0].operation_id].binary
+    assert root.variant == proto_op.BinaryOperationVariant.MULTIPLICATION
+    assert operations[root.left].input_ref.refers_to == "s"
+    select = operations[root.right]
+    assert hasattr(select, "ifelse")
+    assert select.type == AST_OPERATIONS[w1.child.id].ty
+
+
+def test_select_keeps_secret_condition_branches(party):
+    s = secret_input("s", party)
+    condition = secret_input("a", party) < secret_input("b", party)
+    result = condition.if_else(
+        s * public_input("w1", party), s * public_input("w2", party)
+    )
+
+    _, statistics = optimize([Output(result, "output", party)], SelectSimplification())
+
+    assert statistics["select_simplification"].changes == 0
+
+
+def secret_unsigned_input(name: str, party: Party) -> SecretUnsignedInteger:
+    return SecretUnsignedInteger(Input(name=name, party=party))
+
+
+def test_strength_reduction_of_unsigned_division(party):
+    x = secret_unsigned_input("x", party)
+    manager = pass_manager(0)
+    manager.passes = [StrengthReduction()]
+    mir = nada_dsl_to_nada_mir(
+        [Output(x / UnsignedInteger(8), "output", party)], manager.run
+    )
+
+    operations = {entry.id: entry.operation for entry in mir.operations}
+    root = operations[mir.outputs[0].operation_id].binary
+    assert root.variant == proto_op.BinaryOperationVariant.RIGHT_SHIFT
+    assert operations[root.left].input_ref.refers_to == "x"
+    amount = operations[root.right]
+    assert type_key(amount.type) == "unsigned_integer"
+    assert len(mir.operations) == 3
+
+
+def test_strength_reduction_of_unsigned_modulo(party):
+    x = secret_unsigned_input("x", party)
+    graph, statistics = optimize(
+        [Output(x % UnsignedInteger(16), "output", party)], StrengthReduction()
+    )
+
+    root = graph.operations[graph.roots[0]]
+    assert root.variant == proto_op.BinaryOperationVariant.SUBTRACTION
+    assert root.left == x.child.id
+    multiple = graph.operations[root.right]
+    assert multiple.variant == proto_op.BinaryOperationVariant.LEFT_SHIFT
+    quotient = graph.operations[multiple.left]
+    assert quotient.variant == proto_op.BinaryOperationVariant.RIGHT_SHIFT
+    assert quotient.left == x.child.id
+    assert literal_value(graph.operations[quotient.right]) == 4
+    assert len(statistics["strength_reduction"].notes) == 1
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        lambda x, y, p: x / Integer(4),
+        lambda x, y, p: x % Integer(4),
+        lambda x, y, p: y / UnsignedInteger(6),
+        lambda x, y, p: y / UnsignedInteger(1),
+        lambda x, y, p: p / Integer(4),
+    ],
+)
+def test_strength_reduction_skips_other_divisions(party, expression):
+    x = secret_input("x", party)
+    y = secret_unsigned_input("y", party)
+    p = public_input("p", party)
+    _, statistics = optimize(
+        [Output(expression(x, y, p), "output", party)], StrengthReduction()
+    )
+    assert statistics["strength_reduction"].changes == 0
+
+
+def test_strength_reduction_with_probabilistic_truncation(party):
+    x = secret_input("x", party)
+    graph, _ = optimize(
+        [
+            Output(x / Integer(4), "division", party),
+            Output(x % Integer(4), "mod", party),
+        ],
+        StrengthReduction(probabilistic_truncation=True),
+    )
+
+    division = graph.operations[graph.roots[0]]
+    assert division.variant == proto_op.BinaryOperationVariant.TRUNC_PR
+    assert literal_value(graph.operations[division.right]) == 2
+    modulo = graph.operations[graph.roots[1]]
+    assert modulo.variant == proto_op.BinaryOperationVariant.MODULO
+
+
+def multiply(acc: SecretInteger, x: SecretInteger) -> SecretInteger:
+    return x * acc
+
+
+def minimum(acc: SecretInteger, x: SecretInteger) -> SecretInteger:
+    return (x < acc).if_else(x, acc)
+
+
+def subtract(acc: SecretInteger, x: SecretInteger) -> SecretInteger:
+    return acc - x
+
+
+def combination_depth(operations, operation_id, kind):
+    operation = operations[operation_id]
+    if not isinstance(operation, kind):
+        return 0
+    return 1 + max(
+        combination_depth(operations, child, kind)
+        for child in operation.child_operations()
+    )
+
+
+@pytest.mark.parametrize(
+    ("function", "kind"),
+    [
+        (add, BinaryASTOperation),
+        (multiply, BinaryASTOperation),
+        (minimum, IfElseASTOperation),
+    ],
+)
+def test_reduce_unrolling(party, function, kind):
+    array = Array(secret_input("a", party), size=6)
+    result = array.reduce(function, secret_input("initial", party))
+    output = Output(result, "output", party)
+
+    graph, statistics = optimize([output], ReduceUnrolling())
+
+    assert statistics["reduce_unrolling"].notes == [
+        f"passes_test.py:{result.child.source_ref.lineno}: reduce unrolled"
+    ]
+    assert combination_depth(graph.operations, graph.roots[0], kind) == 3
+    assert len(graph.function_bodies) == 0
+
+
+def test_reduce_unrolling_in_optimization_level(party):
+    array = Array(secret_input("a", party), size=6)
+    result = array.reduce(multiply, secret_input("initial", party))
+
+    mir = nada_dsl_to_nada_mir([Output(result, "output", party)], pass_manager(2).run)
+
+    assert len(mir.functions) == 0
+    accessors = sorted(
+        entry.operation.array_accessor.index
+        for entry in mir.operations
+        if hasattr(entry.operation, "array_accessor")
+    )
+    assert accessors == list(range(6))
+    assert (
+        binary_variants(mir).count(proto_op.BinaryOperationVariant.MULTIPLICATION) == 6
+    )
+
+
+@pytest.mark.parametrize(
+    ("function", "size", "max_size"),
+    [(add, 6, 5), (subtract, 6, 16), (add, 0, 16)],
+)
+def test_reduce_unrolling_skips_other_reduces(party, function, size, max_size):
+    array = Array(secret_input("a", party), size=size)
+    result = array.reduce(function, secret_input("initial", party))
+
+    _, statistics = optimize(
+        [Output(result, "output", party)], ReduceUnrolling(max_size=max_size)
+    )
+
+    assert statistics["reduce_unrolling"].changes == 0
@@ -4,7 +4,10 @@ from typing import Union
 
 import pytest
 
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+
 from nada_dsl import Input, Party
+from nada_dsl.ast_util import AST_OPERATIONS, BinaryASTOperation
 from nada_dsl.nada_types import BaseType, Mode
 from nada_dsl.nada_types.scalar_types import (
     BooleanDslType,
@@ -146,6 +149,47 @@ def test_pow(left: ScalarDslType, right: ScalarDslType):
     assert result.mode.value, max([left.mode.value, right.mode.value])
 
 
+def multiplication_depth(operation_id) -> int:
+    operation = AST_OPERATIONS[operation_id]
+    if not isinstance(operation, BinaryASTOperation):
+        return 0
+    return 1 + max(
+        multiplication_depth(operation.left), multiplication_depth(operation.right)
+    )
+
+
+def multiplication_count(operation_id, counted=None) -> int:
+    counted = set() if counted is None else counted
+    operation = AST_OPERATIONS[operation_id]
+    if not isinstance(operation, BinaryASTOperation) or operation_id in counted:
+        return 0
+    counted.add(operation_id)
+    return (
+        1
+        + multiplication_count(operation.left, counted)
+        + multiplication_count(operation.right, counted)
+    )
+
+
+@pytest.mark.parametrize(
+    ("exponent", "multiplications", "depth"),
+    [(1, 0, 0), (2, 1, 1), (3, 2, 2), (8, 3, 3), (15, 6, 5), (16, 4, 4), (21, 6, 5)],
+)
+@pytest.mark.parametrize(
+    ("base_class", "exponent_class"),
+    [(SecretInteger, Integer), (SecretUnsignedInteger, UnsignedInteger)],
+)
+def test_secret_pow(base_class, exponent_class, exponent, multiplications, depth):
+    base = base_class(Input(name="secret", party=Party("party")))
+    result = base ** exponent_class(exponent)
+    assert isinstance(result, base_class)
+    assert multiplication_count(result.child.id) == multiplications
+    assert multiplication_depth(result.child.id) == depth
+    if exponent > 1:
+        operation = AST_OPERATIONS[result.child.id]
+        assert operation.variant == proto_op.BinaryOperationVariant.MULTIPLICATION
+
+
 # All shift operations.
 shift_functions = [
     lambda lhs, rhs: lhs << rhs,
@@ -397,12 +441,14 @@ not_allowed_pow = (
     + combine_lists(integers, booleans)
     + combine_lists(unsigned_integers, booleans)
     + combine_lists(booleans, integers)
-    + combine_lists(secret_integers, integers)
+    + combine_lists(secret_integers, variable_integers)
+    + combine_lists(secret_integers, [Integer(value=0), Integer(value=-2)])
     + combine_lists(public_integers, secret_integers)
     + combine_lists(integers, unsigned_integers)
     + combine_lists(booleans, unsigned_integers)
     + combine_lists(unsigned_integers, integers)
-    + combine_lists(secret_unsigned_integers, unsigned_integers)
+    + combine_lists(secret_unsigned_integers, variable_unsigned_integers)
+    + combine_lists(secret_unsigned_integers, [UnsignedInteger(value=0)])
     + combine_lists(public_unsigned_integers, secret_unsigned_integers)
 )
 
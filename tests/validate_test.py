@@ -0,0 +1,152 @@
+"""
+MIR validation tests.
+"""
+
+# pylint: disable=missing-function-docstring
+
+import io
+import os
+
+import pytest
+from betterproto.lib.google.protobuf import Empty
+from nada_mir_proto.nillion.nada.mir import v1 as proto_mir
+from nada_mir_proto.nillion.nada.operations import v1 as proto_op
+from nada_mir_proto.nillion.nada.types import v1 as proto_ty
+
+from nada_dsl.ast_util import reset_ast
+from nada_dsl.compile import compile_script
+from nada_dsl.errors import MirValidationError
+from nada_dsl.validate import check_mir, check_mir_stream, validate_mir, validate_stream
+
+
+@pytest.fixture(autouse=True)
+def clean_inputs():
+    reset_ast()
+    yield
+
+
+@pytest.fixture(name="mir")
+def mir_fixture():
+    # Operations 0 (my_array_1) and 5 (map of inc) in the program, 1 (my_int),
+    # 3 (argument a) and 4 (addition) in the body of inc
+    this_directory = os.path.dirname(os.path.realpath(__file__))
+    mir_bytes = compile_script(f"{this_directory}/../test-programs/map_simple.py").mir
+    return proto_mir.ProgramMir().parse(mir_bytes)
+
+
+def operation(entries, op_id):
+    return next(entry.operation for entry in entries if entry.id == op_id)
+
+
+def checks(mir):
+    return [(violation.check, violation.location) for violation in validate_mir(mir)]
+
+
+def test_valid_program(mir):
+    assert not validate_mir(mir)
+    check_mir(mir)
+
+
+def test_nested_function_arguments():
+    # The innermost functions use the argument of the function they are defined in
+    this_directory = os.path.dirname(os.path.realpath(__file__))
+    mir_bytes = compile_script(
+        f"{this_directory}/../test-programs/nested_closure.py"
+    ).mir
+    mir = proto_mir.ProgramMir().parse(mir_bytes)
+
+    assert len(mir.functions) == 3
+    assert not validate_mir(mir)
+
+    outer = next(function for function in mir.functions if function.name == "outer")
+    outer.args[0].name = "renamed"
+    assert {violation.check for violation in validate_mir(mir)} == {"unknown-argument"}
+
+
+def test_dangling_references(mir):
+    (function,) = mir.functions
+    operation(mir.operations, 5).map.child = 7
+    mir.outputs[0].operation_id = 8
+    function.return_operation_id = 9
+
+    assert checks(mir) == [
+        ("dangling-operand", "operation 5"),
+        ("dangling-output", "output my_output"),
+        ("dangling-return", "function inc"),
+    ]
+    with pytest.raises(MirValidationError) as error:
+        check_mir(mir)
+    assert len(error.value.violations) == 3
+    assert "operation 5: operand 7 does not exist [dangling-operand]" in str(
+        error.value
+    )
+
+
+def test_cycle(mir):
+    (function,) = mir.functions
+    operation(function.operations, 3).arg_ref = None
+    operation(function.operations, 3).unary = proto_op.UnaryOperation(
+        variant=proto_op.UnaryOperationVariant.NOT, this=4
+    )
+
+    assert checks(mir) == [("cycle", "operation 4 of function inc")]
+
+
+def test_operand_types(mir):
+    (function,) = mir.functions
+    operation(function.operations, 1).type = proto_ty.NadaType(boolean=Empty())
+    addition = operation(function.operations, 4)
+    (violation,) = validate_mir(mir)
+
+    assert violation.check == "operand-types"
+    assert violation.message == "ADDITION of integer and boolean"
+
+    addition.binary.variant = proto_op.BinaryOperationVariant.RIGHT_SHIFT
+    operation(function.operations, 1).type = proto_ty.NadaType(unsigned_integer=Empty())
+    assert not validate_mir(mir)
+
+
+def test_functions(mir):
+    (function,) = mir.functions
+    operation(mir.operations, 5).map = None
+    operation(mir.operations, 5).reduce = proto_op.ReduceOperation(
+        fn=function.id, child=0, initial=0
+    )
+    assert checks(mir) == [("function-arity", "operation 5")]
+
+    operation(mir.operations, 5).reduce.fn = 12
+    assert checks(mir) == [("unknown-function", "operation 5")]
+
+
+def test_references_and_source_refs(mir):
+    (function,) = mir.functions
+    operation(mir.operations, 0).input_ref.refers_to = "missing"
+    operation(function.operations, 3).arg_ref.refers_to = "b"
+    operation(function.operations, 1).input_ref = None
+    operation(function.operations, 1).literal_ref = proto_op.LiteralReference(
+        refers_to="missing"
+    )
+    mir.outputs[0].source_ref_index = len(mir.source_refs)
+
+    assert checks(mir) == [
+        ("unknown-input", "operation 0"),
+        ("source-ref", "output my_output"),
+        ("unknown-literal", "operation 1 of function inc"),
+        ("unknown-argument", "operation 3 of function inc"),
+    ]
+
+
+def test_validate_stream(mir):
+    assert not validate_stream(io.BytesIO(bytes(mir)))
+
+    (function,) = mir.functions
+    operation(mir.operations, 5).map.child = 7
+    operation(mir.operations, 0).input_ref.refers_to = "missing"
+    operation(function.operations, 1).type = proto_ty.NadaType(boolean=Empty())
+    function.return_operation_id = 9
+    violations = validate_stream(io.BytesIO(bytes(mir)))
+
+    assert sorted(map(str, violations)) == sorted(map(str, validate_mir(mir)))
+    assert len(violations) == 4
+    with pytest.raises(MirValidationError):
+        check_mir_stream(io.BytesIO(bytes(mir)))